@@ -1,19 +1,25 @@
 """Provide methods to bootstrap a Home Assistant instance."""
+import asyncio
 import logging
 import logging.handlers
 import os
 import sys
 from time import time
+from timeit import default_timer as timer
 from collections import OrderedDict
-from typing import Any, Optional, Dict
+from typing import (  # noqa: F401 pylint: disable=unused-import
+    Any, Awaitable, Iterable, List, Optional, Dict, Set)
 
 import voluptuous as vol
 
 from homeassistant import (
-    core, config as conf_util, config_entries, components as core_components)
+    core, config as conf_util, config_entries, components as core_components,
+    loader)
 from homeassistant.components import persistent_notification
 from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
-from homeassistant.setup import async_setup_component
+from homeassistant.setup import (
+    async_get_setup_timings, async_import_module, async_load_manifest_index,
+    async_setup_component)
 from homeassistant.util.logging import AsyncHandler
 from homeassistant.util.package import async_get_user_site, is_virtual_env
 from homeassistant.util.yaml import clear_secret_cache
@@ -29,6 +35,9 @@ DATA_LOGGING = 'logging'
 FIRST_INIT_COMPONENT = {'system_log', 'recorder', 'mqtt', 'mqtt_eventstream',
                         'logger', 'introduction', 'frontend', 'history'}
 
+# Maximum number of components that are set up at the same time
+MAX_PARALLEL_SETUPS = 16
+
 
 def from_config_dict(config: Dict[str, Any],
                      hass: Optional[core.HomeAssistant] = None,
@@ -140,20 +149,19 @@ async def async_from_config_dict(config: Dict[str, Any],
     _LOGGER.info("Home Assistant core initialized")
 
     # stage 1
-    for component in components:
-        if component not in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_create_task(async_setup_component(hass, component, config))
+    await _async_setup_components(
+        hass, components & FIRST_INIT_COMPONENT, config)
 
+    # Stage 2 relies on the config entries stage 1 components imported
     await hass.async_block_till_done()
 
     # stage 2
-    for component in components:
-        if component in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_create_task(async_setup_component(hass, component, config))
+    await _async_setup_components(
+        hass, components - FIRST_INIT_COMPONENT, config)
 
+    pending_start = timer()
     await hass.async_block_till_done()
+    _async_log_setup_timeline(hass, timer() - pending_start)
 
     stop = time()
     _LOGGER.info("Home Assistant initialized in %.2fs", stop-start)
@@ -161,6 +169,88 @@ async def async_from_config_dict(config: Dict[str, Any],
     return hass
 
 
+async def _async_setup_components(hass: core.HomeAssistant,
+                                  domains: Iterable[str],
+                                  config: Dict[str, Any]) -> None:
+    """Set up components in the order of their dependencies.
+
+    The dependency graph is built from the manifests up front. Each
+    component is imported right away and set up as soon as its dependencies
+    are, at most MAX_PARALLEL_SETUPS at a time. Tasks that were created by
+    the setups are not waited for.
+    """
+    await async_load_manifest_index(hass)
+
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_SETUPS, loop=hass.loop)
+    tasks = OrderedDict()  # type: Dict[str, Awaitable[bool]]
+    resolving = set()  # type: Set[str]
+
+    def schedule(domain: str) -> None:
+        """Schedule the setup of a component after its dependencies."""
+        if domain in tasks or domain in resolving:
+            return
+
+        # Modules without an indexed manifest resolve their dependencies
+        # when they are set up
+        manifest = loader.get_manifest(hass, domain, load_module=False)
+        dependencies = [] if manifest is None else [
+            dep for dep in manifest.dependencies
+            if dep not in loader.DEPENDENCY_BLACKLIST]
+
+        resolving.add(domain)
+        for dep in dependencies:
+            schedule(dep)
+        resolving.remove(domain)
+
+        # A dependency that is still resolving is circular, which the setup
+        # of the component reports
+        tasks[domain] = hass.async_create_task(_async_setup_when_ready(
+            hass, domain, config, manifest is not None,
+            [tasks[dep] for dep in dependencies if dep in tasks], semaphore))
+
+    for domain in domains:
+        schedule(domain)
+
+    if tasks:
+        await asyncio.wait(tasks.values(), loop=hass.loop)
+
+
+async def _async_setup_when_ready(hass: core.HomeAssistant, domain: str,
+                                  config: Dict[str, Any], indexed: bool,
+                                  dependencies: List[Awaitable[bool]],
+                                  semaphore: asyncio.Semaphore) -> bool:
+    """Import a component and set it up once its dependencies are set up."""
+    if indexed:
+        await async_import_module(hass, domain)
+
+    if dependencies:
+        await asyncio.wait(dependencies, loop=hass.loop)
+
+    async with semaphore:
+        return await async_setup_component(hass, domain, config)
+
+
+@core.callback
+def _async_log_setup_timeline(hass: core.HomeAssistant,
+                              pending_duration: float) -> None:
+    """Log when each component was set up and the critical path."""
+    timings = async_get_setup_timings(hass)
+
+    lines = []
+    for name, timing in timings['components'].items():
+        lines.append("{:8.2f}s {:8.2f}s  {} ({})".format(
+            timing['start'], timing['end'], name, ', '.join(
+                '{} {:.2f}s'.format(phase, duration)
+                for phase, duration in timing['phases'].items())))
+
+    _LOGGER.info(
+        "Setup timeline (start, end):\n%s\n"
+        "Critical path: %s (%.2fs)\n"
+        "Waiting for tasks created during setup took %.2fs",
+        '\n'.join(lines), ' > '.join(timings['critical_path']),
+        timings['total'], pending_duration)
+
+
 def from_config_file(config_path: str,
                      hass: Optional[core.HomeAssistant] = None,
                      verbose: bool = False,
@@ -17,14 +17,15 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED, HTTP_BAD_REQUEST,
     HTTP_CREATED, HTTP_NOT_FOUND, MATCH_ALL, URL_API, URL_API_COMPONENTS,
     URL_API_CONFIG, URL_API_DISCOVERY_INFO, URL_API_ERROR_LOG, URL_API_EVENTS,
-    URL_API_SERVICES, URL_API_STATES, URL_API_STATES_ENTITY, URL_API_STREAM,
-    URL_API_TEMPLATE, __version__)
+    URL_API_SERVICES, URL_API_SETUP_TIMINGS, URL_API_STATES,
+    URL_API_STATES_ENTITY, URL_API_STREAM, URL_API_TEMPLATE, __version__)
 import homeassistant.core as ha
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import template
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.state import AsyncTrackStates
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
+from homeassistant.setup import async_get_setup_timings
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,6 +54,7 @@ def setup(hass, config):
     hass.http.register_view(APIServicesView)
     hass.http.register_view(APIDomainServicesView)
     hass.http.register_view(APIComponentsView)
+    hass.http.register_view(APISetupTimingsView)
     hass.http.register_view(APITemplateView)
 
     if DATA_LOGGING in hass.data:
@@ -102,7 +104,7 @@ class APIEventStream(HomeAssistantView):
             if event.event_type == EVENT_HOMEASSISTANT_STOP:
                 data = stop_obj
             else:
-                data = json.dumps(event, cls=JSONEncoder)
+                data = json_dumps(event)
 
             await to_write.put(data)
 
@@ -336,6 +338,18 @@ class APIComponentsView(HomeAssistantView):
         return self.json(request.app['hass'].config.components)
 
 
+class APISetupTimingsView(HomeAssistantView):
+    """View to handle setup timings requests."""
+
+    url = URL_API_SETUP_TIMINGS
+    name = 'api:setup-timings'
+
+    @ha.callback
+    def get(self, request):
+        """Get the setup timeline of components and the critical path."""
+        return self.json(async_get_setup_timings(request.app['hass']))
+
+
 class APITemplateView(HomeAssistantView):
     """View to handle Template requests."""
 
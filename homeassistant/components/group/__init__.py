@@ -6,10 +6,10 @@ https://home-assistant.io/components/group/
 """
 import asyncio
 import logging
+import threading
 
 import voluptuous as vol
 
-from homeassistant import core as ha
 from homeassistant.const import (
     ATTR_ENTITY_ID, CONF_ICON, CONF_NAME, STATE_CLOSED, STATE_HOME,
     STATE_NOT_HOME, STATE_OFF, STATE_ON, STATE_OPEN, STATE_LOCKED,
@@ -26,6 +26,9 @@ from homeassistant.util.async_ import run_coroutine_threadsafe
 DOMAIN = 'group'
 
 ENTITY_ID_FORMAT = DOMAIN + '.{}'
+GROUP_PREFIX = DOMAIN + '.'
+
+DATA_MEMBERSHIP = 'group_membership'
 
 CONF_ENTITIES = 'entities'
 CONF_VIEW = 'view'
@@ -126,34 +129,31 @@ def expand_entity_ids(hass, entity_ids):
 
     Async friendly.
     """
+    membership = hass.data.get(DATA_MEMBERSHIP)
+
+    if membership is None:
+        membership = hass.data.setdefault(
+            DATA_MEMBERSHIP, GroupMembership(hass))
+
     found_ids = []
+    found = set()
+
     for entity_id in entity_ids:
         if not isinstance(entity_id, str):
             continue
 
         entity_id = entity_id.lower()
 
-        try:
-            # If entity_id points at a group, expand it
-            domain, _ = ha.split_entity_id(entity_id)
-
-            if domain == DOMAIN:
-                child_entities = get_entity_ids(hass, entity_id)
-                if entity_id in child_entities:
-                    child_entities = list(child_entities)
-                    child_entities.remove(entity_id)
-                found_ids.extend(
-                    ent_id for ent_id
-                    in expand_entity_ids(hass, child_entities)
-                    if ent_id not in found_ids)
-
-            else:
-                if entity_id not in found_ids:
-                    found_ids.append(entity_id)
+        # If entity_id points at a group, expand it
+        if entity_id.startswith(GROUP_PREFIX):
+            members = membership.get_members(entity_id)
+        else:
+            members = (entity_id,)
 
-        except AttributeError:
-            # Raised by split_entity_id if entity_id is not a string
-            pass
+        for ent_id in members:
+            if ent_id not in found:
+                found.add(ent_id)
+                found_ids.append(ent_id)
 
     return found_ids
 
@@ -179,6 +179,109 @@ def get_entity_ids(hass, entity_id, domain_filter=None):
             if ent_id.startswith(domain_filter)]
 
 
+class GroupMembership:
+    """Index of the members of groups and the groups of entities.
+
+    The members of a group, including those of nested groups, are expanded
+    once and reused until the state of one of the expanded groups changes.
+    The index is updated under a lock because groups are also expanded
+    from threads other than the event loop.
+    """
+
+    def __init__(self, hass):
+        """Initialize the index."""
+        self.hass = hass
+        self._lock = threading.Lock()
+        # Group entity id -> states of the expanded groups, members
+        self._members = {}
+        # Entity id -> entity ids of the groups containing it
+        self._groups = {}
+
+    def get_members(self, group_id):
+        """Return the entity ids in a group and its nested groups.
+
+        Async friendly.
+        """
+        group_id = group_id.lower()
+        cached = self._members.get(group_id)
+
+        if cached is not None and all(
+                self.hass.states.get(expanded_id) is state
+                for expanded_id, state in cached[0]):
+            return cached[1]
+
+        expanded, members = self._expand(group_id)
+
+        with self._lock:
+            cached = self._members.get(group_id)
+            self._members[group_id] = (expanded, members)
+
+            old_members = set(cached[1]) if cached is not None else set()
+            new_members = set(members)
+
+            for entity_id in old_members - new_members:
+                groups = self._groups.get(entity_id)
+                if groups is None:
+                    continue
+                groups.discard(group_id)
+                if not groups:
+                    del self._groups[entity_id]
+
+            for entity_id in new_members - old_members:
+                self._groups.setdefault(entity_id, set()).add(group_id)
+
+        return members
+
+    def get_groups(self, entity_id):
+        """Return the entity ids of the groups that contain an entity.
+
+        Async friendly.
+        """
+        group_ids = set(self.hass.states.async_entity_ids(DOMAIN))
+
+        with self._lock:
+            group_ids.update(self._members)
+
+        for group_id in group_ids:
+            self.get_members(group_id)
+
+        with self._lock:
+            return set(self._groups.get(entity_id.lower(), ()))
+
+    def _expand(self, group_id):
+        """Expand the members of a group and its nested groups."""
+        expanded = []
+        members = []
+        found = set()
+        visited = set()
+
+        def expand(group_id):
+            """Add the members of a group."""
+            visited.add(group_id)
+            state = self.hass.states.get(group_id)
+            expanded.append((group_id, state))
+
+            if state is None:
+                return
+
+            for entity_id in state.attributes.get(ATTR_ENTITY_ID, ()):
+                if not isinstance(entity_id, str):
+                    continue
+
+                entity_id = entity_id.lower()
+
+                if entity_id.startswith(GROUP_PREFIX):
+                    if entity_id not in visited:
+                        expand(entity_id)
+                elif entity_id not in found:
+                    found.add(entity_id)
+                    members.append(entity_id)
+
+        expand(group_id)
+
+        return tuple(expanded), members
+
+
 async def async_setup(hass, config):
     """Set up all groups found defined in the configuration."""
     component = hass.data.get(DOMAIN)
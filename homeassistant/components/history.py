@@ -4,9 +4,10 @@ Provide pre-made queries on top of the recorder component.
 For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/history/
 """
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from datetime import timedelta
-from itertools import groupby
+from itertools import chain, groupby
+import json
 import logging
 import time
 
@@ -18,8 +19,13 @@ import homeassistant.util.dt as dt_util
 from homeassistant.components import recorder, script
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
+from homeassistant.components.recorder import (
+    statistics as recorder_statistics)
 from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.core import Context, State
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.entityfilter import generate_filter
+from homeassistant.helpers.json import json_dumps
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +43,9 @@ CONFIG_SCHEMA = vol.Schema({
 SIGNIFICANT_DOMAINS = ('thermostat', 'climate')
 IGNORE_DOMAINS = ('zone', 'scene',)
 
+# Number of rows fetched at once when streaming history
+STREAM_PAGE_SIZE = 1000
+
 
 def last_recorder_run(hass):
     """Retrieve the last closed recorder run from the database."""
@@ -53,45 +62,287 @@ def last_recorder_run(hass):
 
 
 def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
-                           filters=None, include_start_time_state=True):
+                           filters=None, include_start_time_state=True,
+                           max_points=None, minimal_response=False):
     """
     Return states changes during UTC period start_time - end_time.
 
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    If max_points is given, numeric sensors are returned from the
+    statistics with a resolution that results in at most max_points
+    states per entity. Their raw states are only returned for the part of
+    the period before the first statistics.
+
+    With minimal_response only the first and last state of each entity
+    contain attributes, the others only their state and last_changed.
     """
     timer_start = time.perf_counter()
-    from homeassistant.components.recorder.models import States
+    from sqlalchemy import or_
+    from homeassistant.components.recorder.models import (
+        States, StateAttributes)
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.domain.in_(SIGNIFICANT_DOMAINS) |
-             (States.last_changed == States.last_updated)) &
-            (States.last_updated > start_time))
+        statistics = {}
+        if max_points:
+            statistics = _get_statistics(
+                hass, session, start_time, end_time, entity_ids, filters,
+                max_points)
+
+        if minimal_response:
+            query = session.query(
+                States.entity_id, States.domain, States.state,
+                States.last_changed, States.last_updated, States.attributes,
+                States.context_id, States.context_user_id,
+                StateAttributes.shared_attrs
+            ).outerjoin(
+                StateAttributes,
+                States.attributes_id == StateAttributes.attributes_id)
+        else:
+            query = session.query(States)
 
-        if filters:
-            query = filters.apply(query, entity_ids)
+        query = _filter_significant_states(
+            query, start_time, end_time, entity_ids, filters)
 
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+        if statistics:
+            query = query.filter(~or_(*(
+                (States.entity_id == ent_id) &
+                (States.last_updated >= stats[0].last_updated)
+                for ent_id, stats in statistics.items())))
 
         query = query.order_by(States.last_updated)
 
-        states = (
-            state for state in execute(query)
-            if (_is_significant(state) and
-                not state.attributes.get(ATTR_HIDDEN, False)))
+        if minimal_response:
+            minimal_states = _get_minimal_states(query)
+            states = []
+        else:
+            states = (
+                state for state in execute(query)
+                if (_is_significant(state) and
+                    not state.attributes.get(ATTR_HIDDEN, False)))
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
         _LOGGER.debug(
             'get_significant_states took %fs', elapsed)
 
-    return states_to_json(
+    result = states_to_json(
         hass, states, start_time, entity_ids, filters,
         include_start_time_state)
 
+    # Drop start time states that are covered by the statistics
+    for ent_id, stats in statistics.items():
+        if ent_id in result:
+            result[ent_id] = [
+                state for state in result[ent_id]
+                if state.last_updated < stats[0].last_updated]
+
+    if minimal_response:
+        for ent_id, ent_states in minimal_states.items():
+            result[ent_id].extend(ent_states)
+
+        statistics = {
+            ent_id: _minimize_states(stats)
+            for ent_id, stats in statistics.items()}
+
+    for ent_id, stats in statistics.items():
+        result[ent_id].extend(stats)
+
+    return result
+
+
+def stream_significant_states(hass, start_time, end_time=None,
+                              entity_ids=None, filters=None,
+                              include_start_time_state=True):
+    """Yield the significant states of a period grouped by entity.
+
+    Yields tuples of entity id and an iterator over its states. The rows are
+    read from the database in pages of STREAM_PAGE_SIZE, so memory use does
+    not depend on the length of the period. Must be consumed in one thread.
+    """
+    from homeassistant.components.recorder.models import States
+
+    initial_states = OrderedDict()
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids,
+                                filters=filters):
+            state.last_changed = start_time
+            state.last_updated = start_time
+            initial_states[state.entity_id] = state
+
+    with session_scope(hass=hass) as session:
+        query = _filter_significant_states(
+            session.query(States), start_time, end_time, entity_ids, filters)
+        query = query.order_by(States.entity_id, States.last_updated) \
+            .yield_per(STREAM_PAGE_SIZE) \
+            .execution_options(stream_results=True)
+
+        states = (
+            state for state in (row.to_native() for row in query)
+            if (state is not None and _is_significant(state) and
+                not state.attributes.get(ATTR_HIDDEN, False)))
+
+        for ent_id, group in groupby(states, lambda state: state.entity_id):
+            initial_state = initial_states.pop(ent_id, None)
+            if initial_state is not None:
+                group = chain((initial_state,), group)
+            yield ent_id, group
+
+    for ent_id, initial_state in initial_states.items():
+        yield ent_id, iter((initial_state,))
+
+
+def _filter_significant_states(query, start_time, end_time, entity_ids,
+                               filters):
+    """Filter a query on states down to the significant states of a period."""
+    from homeassistant.components.recorder.models import States
+
+    query = query.filter(
+        (States.domain.in_(SIGNIFICANT_DOMAINS) |
+         (States.last_changed == States.last_updated)) &
+        (States.last_updated > start_time))
+
+    if filters:
+        query = filters.apply(query, entity_ids)
+
+    if end_time is not None:
+        query = query.filter(States.last_updated < end_time)
+
+    return query
+
+
+def _get_minimal_states(query):
+    """Convert the rows of a column query into compact states per entity.
+
+    Attributes are only decoded for the rows that may be filtered out and
+    for the first and last row of each entity, once per distinct serialized
+    attributes.
+    """
+    from homeassistant.components.recorder.models import process_timestamp
+
+    result = defaultdict(list)
+    last_rows = {}
+    decoded = {}
+
+    for row in query:
+        if _is_row_excluded(row, decoded):
+            continue
+
+        ent_states = result[row.entity_id]
+        if not ent_states:
+            ent_states.append(
+                _row_to_state(row, _row_attributes(row, decoded)))
+            continue
+
+        ent_states.append({
+            'state': row.state,
+            'last_changed': process_timestamp(row.last_changed).isoformat(),
+        })
+        last_rows[row.entity_id] = row
+
+    for ent_id, row in last_rows.items():
+        result[ent_id][-1] = _row_to_state(row, _row_attributes(row, decoded))
+
+    return result
+
+
+def _minimize_states(states):
+    """Strip the attributes of all but the first and last state."""
+    return [
+        state if idx in (0, len(states) - 1) else {
+            'state': state.state,
+            'last_changed': state.last_changed.isoformat(),
+        } for idx, state in enumerate(states)]
+
+
+def _is_row_excluded(row, decoded):
+    """Return if a column query row is left out of the history.
+
+    Only rows whose serialized attributes mention the hidden attribute and
+    rows of scripts need their attributes decoded to tell.
+    """
+    if row.domain != 'script' and \
+            '"{}"'.format(ATTR_HIDDEN) not in _row_shared_attrs(row):
+        return False
+
+    attributes = _row_attributes(row, decoded)
+    if attributes.get(ATTR_HIDDEN, False):
+        return True
+    # scripts that are not cancellable will never change state
+    return row.domain == 'script' and \
+        not attributes.get(script.ATTR_CAN_CANCEL)
+
+
+def _row_shared_attrs(row):
+    """Return the serialized attributes of a column query row."""
+    if row.attributes is not None:
+        return row.attributes
+    return row.shared_attrs or '{}'
+
+
+def _row_attributes(row, decoded):
+    """Return the decoded attributes of a column query row.
+
+    Rows share their serialized attributes, decoded holds the attributes
+    decoded so far by their serialized form.
+    """
+    shared_attrs = _row_shared_attrs(row)
+    attributes = decoded.get(shared_attrs)
+
+    if attributes is None:
+        try:
+            attributes = json.loads(shared_attrs)
+        except ValueError:
+            _LOGGER.exception("Error converting row to state: %s", row)
+            attributes = {}
+        decoded[shared_attrs] = attributes
+
+    return attributes
+
+
+def _row_to_state(row, attributes):
+    """Convert a column query row into a state."""
+    from homeassistant.components.recorder.models import process_timestamp
+
+    return State(
+        row.entity_id, row.state, attributes,
+        process_timestamp(row.last_changed),
+        process_timestamp(row.last_updated),
+        Context(id=row.context_id, user_id=row.context_user_id))
+
+
+def _get_statistics(hass, session, start_time, end_time, entity_ids, filters,
+                    max_points):
+    """Return the statistics of numeric sensors for a history graph."""
+    period = recorder_statistics.pick_period(
+        start_time, end_time or dt_util.utcnow(), max_points)
+    if period is None:
+        return {}
+
+    statistics = recorder_statistics.statistics_during_period(
+        session, start_time, end_time, period, entity_ids)
+
+    if filters and entity_ids is None:
+        entity_filter = filters.entity_filter()
+        statistics = {
+            ent_id: stats for ent_id, stats in statistics.items()
+            if entity_filter(ent_id)}
+
+    # Add the current attributes, like the friendly name, to the statistics
+    for ent_id, stats in statistics.items():
+        current = hass.states.get(ent_id)
+        if current is None:
+            continue
+        statistics[ent_id] = [
+            State(ent_id, stat.state,
+                  dict(current.attributes, **stat.attributes),
+                  stat.last_changed, stat.last_updated)
+            for stat in stats]
+
+    return statistics
+
 
 def state_changes_during_period(hass, start_time, end_time=None,
                                 entity_id=None):
@@ -325,11 +576,30 @@ class HistoryPeriodView(HomeAssistantView):
             entity_ids = entity_ids.lower().split(',')
         include_start_time_state = 'skip_initial_state' not in request.query
 
+        max_points = request.query.get('max_points')
+        if max_points:
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if max_points < 1:
+                return self.json_message(
+                    'Invalid max_points', HTTP_BAD_REQUEST)
+
+        minimal_response = 'minimal_response' in request.query
+
         hass = request.app['hass']
 
+        if not (max_points or minimal_response or self.use_include_order):
+            return await self.json_stream(request, _states_json_fragments(
+                stream_significant_states(
+                    hass, start_time, end_time, entity_ids, self.filters,
+                    include_start_time_state)))
+
         result = await hass.async_add_job(
             get_significant_states, hass, start_time, end_time,
-            entity_ids, self.filters, include_start_time_state)
+            entity_ids, self.filters, include_start_time_state, max_points,
+            minimal_response)
         result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
@@ -353,6 +623,19 @@ class HistoryPeriodView(HomeAssistantView):
         return await hass.async_add_job(self.json, result)
 
 
+def _states_json_fragments(groups):
+    """Encode states grouped by entity as a JSON list of lists."""
+    yield '['
+    for idx, (_, states) in enumerate(groups):
+        yield '[' if idx == 0 else ',['
+        for state_idx, state in enumerate(states):
+            if state_idx:
+                yield ','
+            yield json_dumps(state, sort_keys=True)
+        yield ']'
+    yield ']'
+
+
 class Filters:
     """Container for the configured include and exclude filters."""
 
@@ -363,6 +646,12 @@ class Filters:
         self.included_entities = []
         self.included_domains = []
 
+    def entity_filter(self):
+        """Return a function that tests if an entity id is included."""
+        return generate_filter(
+            self.included_domains, self.included_entities,
+            self.excluded_domains, self.excluded_entities)
+
     def apply(self, query, entity_ids=None):
         """Apply the include/exclude filter on domains and entities on query.
 
@@ -5,8 +5,8 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/http/
 """
 import asyncio
-import json
 import logging
+import threading
 
 from aiohttp import web
 from aiohttp.web_exceptions import HTTPUnauthorized, HTTPInternalServerError
@@ -14,13 +14,18 @@ from aiohttp.web_exceptions import HTTPUnauthorized, HTTPInternalServerError
 from homeassistant.components.http.ban import process_success_login
 from homeassistant.core import Context, is_callback
 from homeassistant.const import CONTENT_TYPE_JSON
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
 from .const import KEY_AUTHENTICATED, KEY_REAL_IP
 
 
 _LOGGER = logging.getLogger(__name__)
 
+# Size of the buffer sent as one chunk by json_stream
+STREAM_CHUNK_SIZE = 65536
+# Number of chunks produced ahead of the client by json_stream
+STREAM_MAX_PENDING_CHUNKS = 4
+
 
 class HomeAssistantView:
     """Base view for all views."""
@@ -43,8 +48,7 @@ class HomeAssistantView:
     def json(self, result, status_code=200, headers=None):
         """Return a JSON response."""
         try:
-            msg = json.dumps(
-                result, sort_keys=True, cls=JSONEncoder).encode('UTF-8')
+            msg = json_dumps(result, sort_keys=True).encode('UTF-8')
         except TypeError as err:
             _LOGGER.error('Unable to serialize to JSON: %s\n%s', err, result)
             raise HTTPInternalServerError
@@ -54,6 +58,82 @@ class HomeAssistantView:
         response.enable_compression()
         return response
 
+    async def json_stream(self, request, fragments, status_code=200):
+        """Stream a JSON response produced by a generator.
+
+        The generator yields JSON encoded string fragments and runs in the
+        executor, so it may do blocking I/O like reading from the database.
+        Only a few chunks are kept in memory, the generator is paused until
+        the client has received them. It is closed in the executor when the
+        response is done, also when the client disconnected.
+
+        The status is sent before the generator runs. If it raises, the
+        error is logged and the connection is aborted, so the client does
+        not mistake the truncated JSON for a complete response.
+        """
+        hass = request.app['hass']
+        chunks = asyncio.Queue(STREAM_MAX_PENDING_CHUNKS, loop=hass.loop)
+        cancelled = threading.Event()
+
+        def put(chunk):
+            """Hand a chunk to the event loop and wait for room."""
+            asyncio.run_coroutine_threadsafe(
+                chunks.put(chunk), hass.loop).result()
+
+        def produce():
+            """Encode the fragments into chunks."""
+            buffer = []
+            size = 0
+            try:
+                for fragment in fragments:
+                    if cancelled.is_set():
+                        return
+                    buffer.append(fragment)
+                    size += len(fragment)
+                    if size >= STREAM_CHUNK_SIZE:
+                        put(''.join(buffer).encode('UTF-8'))
+                        buffer = []
+                        size = 0
+                if buffer:
+                    put(''.join(buffer).encode('UTF-8'))
+            finally:
+                try:
+                    fragments.close()
+                finally:
+                    put(None)
+
+        response = web.StreamResponse(status=status_code)
+        response.content_type = CONTENT_TYPE_JSON
+        response.enable_compression()
+        await response.prepare(request)
+
+        producer = hass.async_add_job(produce)
+        finished = False
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                await response.write(chunk)
+            finished = True
+        finally:
+            if not finished:
+                # Unblock the producer so the executor thread is released
+                cancelled.set()
+                while await chunks.get() is not None:
+                    pass
+
+        try:
+            await producer
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error streaming response for %s", request.path)
+            if request.transport is not None:
+                request.transport.close()
+            return response
+
+        await response.write_eof()
+        return response
+
     def json_message(self, message, status_code=200, message_code=None,
                      headers=None):
         """Return a JSON message response."""
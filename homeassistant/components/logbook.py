@@ -22,6 +22,7 @@ from homeassistant.core import (
     DOMAIN as HA_DOMAIN, State, callback, split_entity_id)
 from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.json import json_dumps
 import homeassistant.util.dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
@@ -38,6 +39,9 @@ DOMAIN = 'logbook'
 
 GROUP_BY_MINUTES = 15
 
+# Number of events fetched at once from the database
+STREAM_PAGE_SIZE = 1000
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
         CONF_EXCLUDE: vol.Schema({
@@ -137,12 +141,18 @@ class LogbookView(HomeAssistantView):
         end_day = start_day + timedelta(days=1)
         hass = request.app['hass']
 
-        def json_events():
-            """Fetch events and generate JSON."""
-            return self.json(list(
-                _get_events(hass, self.config, start_day, end_day)))
+        return await self.json_stream(request, _entries_json_fragments(
+            _get_events(hass, self.config, start_day, end_day)))
+
 
-        return await hass.async_add_job(json_events)
+def _entries_json_fragments(entries):
+    """Encode logbook entries as a JSON list."""
+    yield '['
+    for idx, entry in enumerate(entries):
+        if idx:
+            yield ','
+        yield json_dumps(entry, sort_keys=True)
+    yield ']'
 
 
 def humanify(hass, events):
@@ -288,10 +298,13 @@ def humanify(hass, events):
 
 
 def _get_events(hass, config, start_day, end_day):
-    """Get events for a period of time."""
+    """Get logbook entries for a period of time.
+
+    The events are read from the database in pages of STREAM_PAGE_SIZE while
+    the entries are consumed. Must be consumed in one thread.
+    """
     from homeassistant.components.recorder.models import Events, States
-    from homeassistant.components.recorder.util import (
-        execute, session_scope)
+    from homeassistant.components.recorder.util import session_scope
 
     with session_scope(hass=hass) as session:
         query = session.query(Events).order_by(Events.time_fired) \
@@ -300,13 +313,17 @@ def _get_events(hass, config, start_day, end_day):
             .filter((Events.time_fired > start_day)
                     & (Events.time_fired < end_day)) \
             .filter((States.last_updated == States.last_changed)
-                    | (States.state_id.is_(None)))
-        events = execute(query)
-    return humanify(hass, _exclude_events(events, config))
+                    | (States.state_id.is_(None))) \
+            .yield_per(STREAM_PAGE_SIZE) \
+            .execution_options(stream_results=True)
+        events = (
+            event for event in (row.to_native() for row in query)
+            if event is not None)
+        yield from humanify(hass, _exclude_events(events, config))
 
 
 def _exclude_events(events, config):
-    """Get list of filtered events."""
+    """Filter out the events that should not show up in the logbook."""
     excluded_entities = []
     excluded_domains = []
     included_entities = []
@@ -320,7 +337,6 @@ def _exclude_events(events, config):
         included_entities = include[CONF_ENTITIES]
         included_domains = include[CONF_DOMAINS]
 
-    filtered_events = []
     for event in events:
         domain, entity_id = None, None
 
@@ -391,8 +407,7 @@ def _exclude_events(events, config):
             # check if logbook entry is excluded for this entity
             if entity_id in excluded_entities:
                 continue
-        filtered_events.append(event)
-    return filtered_events
+        yield event
 
 
 def _entry_message_from_state(domain, state):
@@ -11,8 +11,10 @@ from operator import attrgetter
 import os
 import socket
 import ssl
+import threading
 import time
-from typing import Any, Callable, List, Optional, Union, cast  # noqa: F401
+from typing import (  # noqa: F401
+    Any, Callable, Dict, List, Optional, Union, cast)
 
 import attr
 import requests.certs
@@ -38,6 +40,7 @@ from homeassistant.util.async_ import (
 from . import config_flow  # noqa  # pylint: disable=unused-import
 from .const import CONF_BROKER, CONF_DISCOVERY, DEFAULT_DISCOVERY
 from .server import HBMQTT_CONFIG_SCHEMA
+from .trie import TopicTrie
 
 REQUIREMENTS = ['paho-mqtt==1.4.0']
 
@@ -64,6 +67,7 @@ CONF_TLS_VERSION = 'tls_version'
 
 CONF_BIRTH_MESSAGE = 'birth_message'
 CONF_WILL_MESSAGE = 'will_message'
+CONF_COALESCE_TOPICS = 'coalesce_topics'
 
 CONF_STATE_TOPIC = 'state_topic'
 CONF_COMMAND_TOPIC = 'command_topic'
@@ -77,6 +81,10 @@ PROTOCOL_31 = '3.1'
 PROTOCOL_311 = '3.1.1'
 
 DEFAULT_PORT = 1883
+
+# Maximum number of received messages that wait to be handled
+MAX_PENDING_MESSAGES = 10000
+
 DEFAULT_KEEPALIVE = 60
 DEFAULT_QOS = 0
 DEFAULT_RETAIN = False
@@ -183,6 +191,10 @@ CONFIG_SCHEMA = vol.Schema({
         # state topic is specified, it will be created with the given prefix.
         vol.Optional(CONF_DISCOVERY_PREFIX,
                      default=DEFAULT_DISCOVERY_PREFIX): valid_publish_topic,
+        # Only the latest message on these topics is handled if several are
+        # received before the event loop gets to them.
+        vol.Optional(CONF_COALESCE_TOPICS):
+            vol.All(cv.ensure_list, [valid_subscribe_topic]),
     }),
 }, extra=vol.ALLOW_EXTRA)
 
@@ -485,6 +497,7 @@ async def async_setup_entry(hass, entry):
         will_message=will_message,
         birth_message=birth_message,
         tls_version=tls_version,
+        coalesce_topics=conf.get(CONF_COALESCE_TOPICS),
     )
 
     success = await hass.data[DATA_MQTT].async_connect()  # type: bool
@@ -560,7 +573,8 @@ class MQTT:
                  client_cert: Optional[str], tls_insecure: Optional[bool],
                  protocol: Optional[str], will_message: Optional[Message],
                  birth_message: Optional[Message],
-                 tls_version: Optional[int]) -> None:
+                 tls_version: Optional[int],
+                 coalesce_topics: Optional[List[str]] = None) -> None:
         """Initialize Home Assistant MQTT client."""
         import paho.mqtt.client as mqtt
 
@@ -572,6 +586,18 @@ class MQTT:
         self.birth_message = birth_message
         self._mqttc = None  # type: mqtt.Client
         self._paho_lock = asyncio.Lock(loop=hass.loop)
+        self._subscription_trie = TopicTrie()
+        self._coalesce_trie = TopicTrie()
+        self._pending_lock = threading.Lock()
+        self._pending_messages = []  # type: List[Any]
+        self._pending_topics = {}  # type: Dict[str, int]
+        self._pending_dropped = 0
+        self.messages_received = 0
+        self.messages_coalesced = 0
+        self.messages_dropped = 0
+
+        for topic in coalesce_topics or []:
+            self._coalesce_trie.add(topic, True)
 
         if protocol == PROTOCOL_31:
             proto = mqtt.MQTTv31  # type: int
@@ -658,6 +684,7 @@ class MQTT:
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
         self.subscriptions.append(subscription)
+        self._subscription_trie.add(topic, subscription)
 
         await self._async_perform_subscription(topic, qos)
 
@@ -667,6 +694,7 @@ class MQTT:
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
+            self._subscription_trie.remove(topic, subscription)
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -724,17 +752,73 @@ class MQTT:
                 self.async_publish(*attr.astuple(self.birth_message)))
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are buffered and handed to the event loop in batches, so a
+        burst of messages only wakes up the event loop once.
+        """
+        coalesce = next(self._coalesce_trie.match(msg.topic), False)
+
+        with self._pending_lock:
+            self.messages_received += 1
+
+            if coalesce:
+                index = self._pending_topics.get(msg.topic)
+
+                if index is not None:
+                    self._pending_messages[index] = msg
+                    self.messages_coalesced += 1
+                    return
+
+            if len(self._pending_messages) >= MAX_PENDING_MESSAGES:
+                self.messages_dropped += 1
+                self._pending_dropped += 1
+                return
+
+            if coalesce:
+                self._pending_topics[msg.topic] = len(self._pending_messages)
+
+            self._pending_messages.append(msg)
+
+            # The batch has already been scheduled by its first message
+            if len(self._pending_messages) > 1:
+                return
+
+        self.hass.loop.call_soon_threadsafe(self._async_handle_messages)
+
+    @callback
+    def _async_handle_messages(self) -> None:
+        """Handle the batch of messages received since the last batch."""
+        with self._pending_lock:
+            messages = self._pending_messages
+            dropped = self._pending_dropped
+            self._pending_messages = []
+            self._pending_topics = {}
+            self._pending_dropped = 0
+
+        if dropped:
+            _LOGGER.warning(
+                "Dropped %s MQTT messages because more than %s messages were "
+                "waiting to be handled", dropped, MAX_PENDING_MESSAGES)
+
+        _LOGGER.debug("Handling %s MQTT messages (%s received, %s coalesced, "
+                      "%s dropped in total)", len(messages),
+                      self.messages_received, self.messages_coalesced,
+                      self.messages_dropped)
+
+        for msg in messages:
+            try:
+                self._mqtt_handle_message(msg)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling MQTT message on %s",
+                                  msg.topic)
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
         _LOGGER.debug("Received message on %s: %s", msg.topic, msg.payload)
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
-
+        # Callbacks can remove subscriptions while they are matched
+        for subscription in list(self._subscription_trie.match(msg.topic)):
             payload = msg.payload  # type: SubscribePayloadType
             if subscription.encoding is not None:
                 try:
@@ -782,18 +866,6 @@ def _raise_on_error(result_code: int) -> None:
             'Error talking to MQTT: {}'.format(mqtt.error_string(result_code)))
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    from paho.mqtt.matcher import MQTTMatcher
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-    try:
-        next(matcher.iter_match(topic))
-        return True
-    except StopIteration:
-        return False
-
-
 class MqttAvailability(Entity):
     """Mixin used for platforms that report availability."""
 
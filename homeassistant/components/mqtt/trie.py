@@ -0,0 +1,116 @@
+"""Trie of MQTT topic filters to route messages to subscriptions."""
+from typing import (  # noqa: F401 pylint: disable=unused-import
+    Any, Dict, Iterator, List)
+
+SINGLE_LEVEL_WILDCARD = '+'
+MULTI_LEVEL_WILDCARD = '#'
+
+
+class _Node:
+    """Level of a topic filter in the trie."""
+
+    __slots__ = ('children', 'values')
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children = {}  # type: Dict[str, _Node]
+        self.values = []  # type: List[Any]
+
+
+class TopicTrie:
+    """Map topic filters to values, split at the topic levels.
+
+    Adding and removing a value and matching a topic take time proportional
+    to the number of topic levels and matched values, independent of the
+    number of topic filters.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the trie."""
+        self._root = _Node()
+
+    def add(self, topic_filter: str, value: Any) -> None:
+        """Add a value for a topic filter."""
+        node = self._root
+
+        for level in topic_filter.split('/'):
+            child = node.children.get(level)
+
+            if child is None:
+                child = node.children[level] = _Node()
+
+            node = child
+
+        node.values.append(value)
+
+    def remove(self, topic_filter: str, value: Any) -> None:
+        """Remove a value of a topic filter.
+
+        Raises ValueError if the value was not added for the topic filter.
+        """
+        levels = topic_filter.split('/')
+        path = [self._root]
+
+        for level in levels:
+            node = path[-1].children.get(level)
+
+            if node is None:
+                raise ValueError(
+                    'Topic filter {} not found'.format(topic_filter))
+
+            path.append(node)
+
+        path[-1].values.remove(value)
+
+        # Prune the levels that no longer lead to any value
+        for level, parent, node in reversed(list(zip(levels, path,
+                                                     path[1:]))):
+            if node.values or node.children:
+                break
+
+            del parent.children[level]
+
+    def match(self, topic: str) -> Iterator[Any]:
+        """Iterate over the values of all topic filters matching a topic.
+
+        Wildcards at the first level do not match topics starting with $.
+        """
+        levels = topic.split('/')
+        match_wildcards = not topic.startswith('$')
+        nodes = [self._root]
+
+        for level in levels:
+            next_nodes = []
+
+            for node in nodes:
+                children = node.children
+
+                if not children:
+                    continue
+
+                if match_wildcards:
+                    multi_level = children.get(MULTI_LEVEL_WILDCARD)
+                    if multi_level is not None:
+                        yield from multi_level.values
+
+                    single_level = children.get(SINGLE_LEVEL_WILDCARD)
+                    if single_level is not None:
+                        next_nodes.append(single_level)
+
+                child = children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+
+            if not next_nodes:
+                return
+
+            nodes = next_nodes
+            match_wildcards = True
+
+        for node in nodes:
+            yield from node.values
+
+            # A multi-level wildcard also matches the parent level
+            multi_level = node.children.get(MULTI_LEVEL_WILDCARD)
+            if multi_level is not None:
+                yield from multi_level.values
@@ -17,7 +17,7 @@ from homeassistant.const import (
     EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL)
 from homeassistant.core import EventOrigin, State
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
 DOMAIN = 'mqtt_eventstream'
 DEPENDENCIES = ['mqtt']
@@ -80,7 +80,7 @@ def async_setup(hass, config):
             return
 
         event_info = {'event_type': event.event_type, 'event_data': event.data}
-        msg = json.dumps(event_info, cls=JSONEncoder)
+        msg = json_dumps(event_info)
         mqtt.async_publish(pub_topic, msg)
 
     # Only listen for local events if you are going to publish them.
@@ -8,14 +8,14 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/recorder/
 """
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 import concurrent.futures
 from datetime import datetime, timedelta
 import logging
 import queue
 import threading
 import time
-from typing import Any, Dict, Optional  # noqa: F401
+from typing import Any, Dict, List, Optional  # noqa: F401
 
 import voluptuous as vol
 
@@ -30,7 +30,7 @@ from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 from homeassistant.loader import bind_hass
 
-from . import migration, purge
+from . import migration, purge, statistics
 from .const import DATA_INSTANCE
 from .util import session_scope
 
@@ -57,9 +57,17 @@ CONF_DB_URL = 'db_url'
 CONF_PURGE_KEEP_DAYS = 'purge_keep_days'
 CONF_PURGE_INTERVAL = 'purge_interval'
 CONF_EVENT_TYPES = 'event_types'
+CONF_COMMIT_INTERVAL = 'commit_interval'
+CONF_MAX_BATCH_SIZE = 'max_batch_size'
 
 CONNECT_RETRY_WAIT = 3
 
+DEFAULT_COMMIT_INTERVAL = 0
+DEFAULT_MAX_BATCH_SIZE = 1000
+
+# Number of attribute hashes known to be stored in the database
+ATTRIBUTES_CACHE_SIZE = 2048
+
 FILTER_SCHEMA = vol.Schema({
     vol.Optional(CONF_EXCLUDE, default={}): vol.Schema({
         vol.Optional(CONF_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
@@ -79,6 +87,10 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_PURGE_INTERVAL, default=1):
             vol.All(vol.Coerce(int), vol.Range(min=0)),
         vol.Optional(CONF_DB_URL): cv.string,
+        vol.Optional(CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_MAX_BATCH_SIZE, default=DEFAULT_MAX_BATCH_SIZE):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -115,6 +127,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config.get(DOMAIN, {})
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL, DEFAULT_COMMIT_INTERVAL)
+    max_batch_size = conf.get(CONF_MAX_BATCH_SIZE, DEFAULT_MAX_BATCH_SIZE)
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -125,7 +139,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     exclude = conf.get(CONF_EXCLUDE, {})
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass=hass, keep_days=keep_days, purge_interval=purge_interval,
-        uri=db_url, include=include, exclude=exclude)
+        uri=db_url, include=include, exclude=exclude,
+        commit_interval=commit_interval, max_batch_size=max_batch_size)
     instance.async_initialize()
     instance.start()
 
@@ -148,13 +163,17 @@ class Recorder(threading.Thread):
 
     def __init__(self, hass: HomeAssistant, keep_days: int,
                  purge_interval: int, uri: str,
-                 include: Dict, exclude: Dict) -> None:
+                 include: Dict, exclude: Dict,
+                 commit_interval: float = DEFAULT_COMMIT_INTERVAL,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name='Recorder')
 
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
         self.queue = queue.Queue()  # type: Any
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -169,6 +188,21 @@ class Recorder(threading.Thread):
 
         self.get_session = None
 
+        self.last_batch_size = 0
+        self.last_batch_latency = 0.0
+
+        # Hashes of attributes recently written to the database
+        self._attributes_ids = OrderedDict()  # type: OrderedDict
+        # Last seen attributes and their hash per entity
+        self._entity_attributes = {}  # type: Dict[str, Any]
+        # Open statistics bucket per entity and period
+        self.statistics_buckets = {}  # type: Dict[Any, Dict[str, Any]]
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of items waiting to be processed."""
+        return self.queue.qsize()
+
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
@@ -183,9 +217,8 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import Events
         from homeassistant.components import persistent_notification
-        from sqlalchemy import exc
 
         tries = 1
         connected = False
@@ -275,8 +308,13 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        unfinished_purge = purge.get_unfinished_purge(self)
+        if unfinished_purge is not None:
+            self.queue.put(PurgeTask(*unfinished_purge))
+
+        pending = []  # type: List[Any]
         while True:
-            event = self.queue.get()
+            event = pending.pop() if pending else self.queue.get()
 
             if event is None:
                 self._close_run()
@@ -284,50 +322,173 @@ class Recorder(threading.Thread):
                 self.queue.task_done()
                 return
             if isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
+                finished = purge.purge_old_data(
+                    self, event.keep_days, event.repack)
+                # Every batch may remove attributes that are no longer used
+                self._attributes_ids.clear()
+                if not finished:
+                    # Continue purging after the events queued in between
+                    self.queue.put(event)
                 self.queue.task_done()
                 continue
-            elif event.event_type == EVENT_TIME_CHANGED:
+
+            batch = self._collect_batch(event, pending)
+            if batch:
+                self._commit_batch(batch)
+
+            for _ in batch:
                 self.queue.task_done()
-                continue
-            elif event.event_type in self.exclude_t:
+
+    def _should_record(self, event):
+        """Return if an event should be written to the database."""
+        if event.event_type == EVENT_TIME_CHANGED:
+            return False
+        if event.event_type in self.exclude_t:
+            return False
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        if entity_id is not None and not self.entity_filter(entity_id):
+            return False
+
+        return True
+
+    def _collect_batch(self, event, pending):
+        """Drain the queue into a batch of events to be committed together.
+
+        Collects events until the commit interval has passed or the batch is
+        full. Control items (shutdown and purge tasks) end the batch and are
+        appended to pending so they are handled after the commit.
+        """
+        batch = []
+        deadline = time.monotonic() + self.commit_interval
+
+        while True:
+            if self._should_record(event):
+                batch.append(event)
+            else:
                 self.queue.task_done()
-                continue
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    self.queue.task_done()
-                    continue
-
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
-                try:
-                    with session_scope(session=self.get_session()) as session:
-                        dbevent = Events.from_event(event)
-                        session.add(dbevent)
+            if len(batch) >= self.max_batch_size:
+                break
+
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    event = self.queue.get(timeout=timeout)
+                else:
+                    event = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if event is None or isinstance(event, PurgeTask):
+                pending.append(event)
+                break
+
+        return batch
+
+    def _commit_batch(self, batch):
+        """Write a batch of events to the database in one transaction."""
+        from .models import States, Events
+        from sqlalchemy import exc
+
+        timer_start = time.perf_counter()
+        tries = 1
+        updated = False
+        while not updated and tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    dbevents = [Events.from_event(event) for event in batch]
+                    session.add_all(dbevents)
+                    session.flush()
+
+                    dbstates = []
+                    new_attributes_ids = set()
+                    for event, dbevent in zip(batch, dbevents):
+                        if event.event_type != EVENT_STATE_CHANGED:
+                            continue
+                        dbstate = States.from_event(event)
+                        dbstate.event_id = dbevent.event_id
+                        dbstate.attributes_id = self._get_attributes_id(
+                            session, event.data.get('new_state'),
+                            new_attributes_ids)
+                        dbstates.append(dbstate)
+
+                    if dbstates:
                         session.flush()
+                        session.bulk_save_objects(dbstates)
+
+                    buckets = statistics.compile_statistics(
+                        self, session, batch)
+                updated = True
+
+                self.statistics_buckets.update(buckets)
+
+                for attributes_id in new_attributes_ids:
+                    self._cache_attributes_id(attributes_id)
+
+            except exc.OperationalError as err:
+                _LOGGER.error("Error in database connectivity: %s. "
+                              "(retrying in %s seconds)", err,
+                              CONNECT_RETRY_WAIT)
+                tries += 1
+
+        if not updated:
+            _LOGGER.error("Error in database update. Could not save "
+                          "after %d tries. Giving up", tries)
 
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            dbstate = States.from_event(event)
-                            dbstate.event_id = dbevent.event_id
-                            session.add(dbstate)
-                    updated = True
+        self.last_batch_size = len(batch)
+        self.last_batch_latency = time.perf_counter() - timer_start
+        _LOGGER.debug("Committed %d events in %.3fs, %d items queued",
+                      self.last_batch_size, self.last_batch_latency,
+                      self.queue_depth)
 
-                except exc.OperationalError as err:
-                    _LOGGER.error("Error in database connectivity: %s. "
-                                  "(retrying in %s seconds)", err,
-                                  CONNECT_RETRY_WAIT)
-                    tries += 1
+    def _get_attributes_id(self, session, state, new_attributes_ids):
+        """Return the id of the stored attributes of a state.
 
-            if not updated:
-                _LOGGER.error("Error in database update. Could not save "
-                              "after %d tries. Giving up", tries)
+        The attributes are only serialized if they differ from the previous
+        state of the entity and only written if they are not stored yet.
+        """
+        from .models import StateAttributes
 
-            self.queue.task_done()
+        if state is None:
+            return None
+
+        shared_attrs = None
+        cached = self._entity_attributes.get(state.entity_id)
+        if cached is not None and cached[0] == state.attributes:
+            attributes_id = cached[1]
+        else:
+            shared_attrs = StateAttributes.shared_attrs_from_state(state)
+            attributes_id = StateAttributes.hash_shared_attrs(shared_attrs)
+            self._entity_attributes[state.entity_id] = (
+                state.attributes, attributes_id)
+
+        if attributes_id in self._attributes_ids:
+            self._attributes_ids.move_to_end(attributes_id)
+            return attributes_id
+
+        if attributes_id in new_attributes_ids:
+            return attributes_id
+
+        stored = session.query(StateAttributes.attributes_id).filter_by(
+            attributes_id=attributes_id).first()
+        if stored is None:
+            if shared_attrs is None:
+                shared_attrs = StateAttributes.shared_attrs_from_state(state)
+            session.add(StateAttributes(
+                attributes_id=attributes_id, shared_attrs=shared_attrs))
+
+        new_attributes_ids.add(attributes_id)
+        return attributes_id
+
+    def _cache_attributes_id(self, attributes_id):
+        """Remember that attributes are stored in the database."""
+        self._attributes_ids[attributes_id] = True
+        self._attributes_ids.move_to_end(attributes_id)
+        while len(self._attributes_ids) > ATTRIBUTES_CACHE_SIZE:
+            self._attributes_ids.popitem(last=False)
 
     @callback
     def event_listener(self, event):
@@ -353,11 +514,15 @@ class Recorder(threading.Thread):
         # pylint: disable=unused-variable
         @event.listens_for(Engine, "connect")
         def set_sqlite_pragma(dbapi_connection, connection_record):
-            """Set sqlite's WAL mode."""
+            """Set sqlite's WAL mode and incremental auto vacuum.
+
+            Auto vacuum only changes for new databases or on the next VACUUM.
+            """
             if isinstance(dbapi_connection, Connection):
                 old_isolation = dbapi_connection.isolation_level
                 dbapi_connection.isolation_level = None
                 cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
                 cursor.execute("PRAGMA journal_mode=WAL")
                 cursor.close()
                 dbapi_connection.isolation_level = old_isolation
@@ -218,6 +218,17 @@ def _apply_update(engine, new_version, old_version):
         ])
         _create_index(engine, "states", "ix_states_context_id")
         _create_index(engine, "states", "ix_states_context_user_id")
+    elif new_version == 7:
+        # Attributes are stored deduplicated in the state_attributes table,
+        # which is created with the other tables. Existing rows keep their
+        # attributes in the states table.
+        _add_columns(engine, "states", [
+            'attributes_id CHARACTER(40)',
+        ])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 8:
+        # The statistics table is created with the other tables
+        pass
     else:
         raise ValueError("No schema migration defined for version {}"
                          .format(new_version))
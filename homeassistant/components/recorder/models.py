@@ -1,23 +1,25 @@
 """Models for SQLAlchemy."""
+import hashlib
 import json
 from datetime import datetime
 import logging
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String,
+    Text, distinct)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 
 import homeassistant.util.dt as dt_util
 from homeassistant.core import (
     Context, Event, EventOrigin, State, split_entity_id)
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import BACKEND_JSON, json_dumps
 
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 6
+SCHEMA_VERSION = 8
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,7 +41,7 @@ class Events(Base):  # type: ignore
     def from_event(event):
         """Create an event database object from a native event."""
         return Events(event_type=event.event_type,
-                      event_data=json.dumps(event.data, cls=JSONEncoder),
+                      event_data=json_dumps(event.data),
                       origin=str(event.origin),
                       time_fired=event.time_fired,
                       context_id=event.context.id,
@@ -56,7 +58,7 @@ class Events(Base):  # type: ignore
                 self.event_type,
                 json.loads(self.event_data),
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired),
+                process_timestamp(self.time_fired),
                 context=context,
             )
         except ValueError:
@@ -65,6 +67,29 @@ class Events(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):   # type: ignore
+    """Attributes shared between state rows, addressed by content hash."""
+
+    __tablename__ = 'state_attributes'
+    attributes_id = Column(String(40), primary_key=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def shared_attrs_from_state(state):
+        """Serialize the attributes of a native state.
+
+        The json module is always used so the content hash does not depend
+        on which serializers are installed.
+        """
+        return json_dumps(dict(state.attributes), sort_keys=True,
+                          backend=BACKEND_JSON)
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the content address of serialized attributes."""
+        return hashlib.sha1(shared_attrs.encode('utf-8')).hexdigest()
+
+
 class States(Base):   # type: ignore
     """State change history."""
 
@@ -74,6 +99,9 @@ class States(Base):   # type: ignore
     entity_id = Column(String(255))
     state = Column(String(255))
     attributes = Column(Text)
+    attributes_id = Column(String(40),
+                           ForeignKey('state_attributes.attributes_id'),
+                           index=True)
     event_id = Column(Integer, ForeignKey('events.event_id'), index=True)
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_updated = Column(DateTime(timezone=True), default=datetime.utcnow,
@@ -82,6 +110,9 @@ class States(Base):   # type: ignore
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
 
+    # Attributes are joined in with every query on states
+    state_attributes = relationship(StateAttributes, lazy='joined')
+
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
         # (get_states in history.py)
@@ -90,7 +121,11 @@ class States(Base):   # type: ignore
 
     @staticmethod
     def from_event(event):
-        """Create object from a state_changed event."""
+        """Create object from a state_changed event.
+
+        Attributes are not stored on the row itself, the recorder links the
+        row to a StateAttributes row by setting attributes_id.
+        """
         entity_id = event.data['entity_id']
         state = event.data.get('new_state')
 
@@ -110,8 +145,6 @@ class States(Base):   # type: ignore
         else:
             dbstate.domain = state.domain
             dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes),
-                                            cls=JSONEncoder)
             dbstate.last_changed = state.last_changed
             dbstate.last_updated = state.last_updated
 
@@ -123,12 +156,20 @@ class States(Base):   # type: ignore
             id=self.context_id,
             user_id=self.context_user_id
         )
+        if self.attributes is not None:
+            # Rows written before attributes were deduplicated
+            shared_attrs = self.attributes
+        elif self.state_attributes is not None:
+            shared_attrs = self.state_attributes.shared_attrs
+        else:
+            shared_attrs = '{}'
+
         try:
             return State(
                 self.entity_id, self.state,
-                json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated),
+                json.loads(shared_attrs),
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated),
                 context=context,
             )
         except ValueError:
@@ -137,6 +178,41 @@ class States(Base):   # type: ignore
             return None
 
 
+class Statistics(Base):   # type: ignore
+    """Numeric states of an entity rolled up per period."""
+
+    __tablename__ = 'statistics'
+    statistic_id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    period = Column(Integer)
+    start = Column(DateTime(timezone=True))
+    unit_of_measurement = Column(String(255))
+    min = Column(Float)
+    max = Column(Float)
+    mean = Column(Float)
+    last = Column(Float)
+    count = Column(Integer)
+
+    __table_args__ = (
+        # Used for fetching the statistics of a time span
+        # (statistics_during_period in statistics.py)
+        Index('ix_statistics_period_start', 'period', 'start'),
+        # Used for finding the open bucket of an entity
+        Index('ix_statistics_entity_id_period_start',
+              'entity_id', 'period', 'start'),)
+
+    def to_native(self):
+        """Convert to a native HA state with the mean as state."""
+        start = process_timestamp(self.start)
+        return State(
+            self.entity_id, str(self.mean), {
+                'unit_of_measurement': self.unit_of_measurement,
+                'min': self.min,
+                'max': self.max,
+                'last': self.last,
+            }, start, start)
+
+
 class RecorderRuns(Base):   # type: ignore
     """Representation of recorder run."""
 
@@ -185,7 +261,7 @@ class SchemaChanges(Base):   # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
-def _process_timestamp(ts):
+def process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
         return None
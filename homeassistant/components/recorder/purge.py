@@ -1,70 +1,208 @@
 """Purge old data helper."""
 from datetime import timedelta
 import logging
+import os
 
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.util.dt as dt_util
+from homeassistant.util.json import load_json, save_json
 
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+PROGRESS_FILE = '.recorder_purge_progress'
 
-def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
-    from sqlalchemy import func
+# Maximum number of rows of each table deleted in one batch
+MAX_ROWS_TO_PURGE = 1000
+
+# Value of PRAGMA auto_vacuum of SQLite databases that free pages on request
+SQLITE_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def purge_old_data(instance, purge_days, repack, batch_size=None):
+    """Purge events and states older than purge_days ago.
+
+    Rows are deleted in batches of at most batch_size rows per table, so the
+    database is never locked for long. A repack of SQLite frees at most
+    batch_size pages per call if the database supports it. Returns True when
+    everything has been purged and False when the purge should be called
+    again.
+    """
+    from .models import States, StateAttributes, Statistics, Events
+    from .statistics import PERIOD_5MINUTE
+    from sqlalchemy import exists
+    from sqlalchemy.orm import aliased
+
+    if batch_size is None:
+        batch_size = MAX_ROWS_TO_PURGE
 
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
-    _LOGGER.debug("Purging events before %s", purge_before)
+    _LOGGER.debug("Purging states and events before %s", purge_before)
 
     with session_scope(session=instance.get_session()) as session:
-        delete_states = session.query(States) \
-                            .filter((States.last_updated < purge_before))
-
         # For each entity, the most recent state is protected from deletion
         # s.t. we can properly restore state even if the entity has not been
-        # updated in a long time
-        protected_states = session.query(func.max(States.state_id)) \
-            .group_by(States.entity_id).all()
+        # updated in a long time. Only states that have a newer state of the
+        # same entity are purged, which is answered from the
+        # entity_id/last_updated index.
+        newer_states = aliased(States)
+        has_newer_state = exists().where(
+            (newer_states.entity_id == States.entity_id) &
+            (newer_states.last_updated > States.last_updated))
+
+        state_ids = [row[0] for row in session.query(States.state_id)
+                     .filter(States.last_updated < purge_before)
+                     .filter(has_newer_state)
+                     .order_by(States.state_id)
+                     .limit(batch_size)]
+
+        deleted_rows = 0
+        if state_ids:
+            deleted_rows = session.query(States) \
+                .filter(States.state_id.in_(state_ids)) \
+                .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s states", deleted_rows)
 
-        protected_state_ids = tuple(state[0] for state in protected_states)
+        # We also need to protect the events belonging to the remaining
+        # states. Otherwise, if the SQL server has "ON DELETE CASCADE" as
+        # default, it will delete the protected state when deleting its
+        # associated event. Also, we would be producing NULLed foreign keys
+        # otherwise.
+        has_state = exists().where(States.event_id == Events.event_id)
+
+        event_ids = [row[0] for row in session.query(Events.event_id)
+                     .filter(Events.time_fired < purge_before)
+                     .filter(~has_state)
+                     .order_by(Events.event_id)
+                     .limit(batch_size)]
+
+        deleted_rows = 0
+        if event_ids:
+            deleted_rows = session.query(Events) \
+                .filter(Events.event_id.in_(event_ids)) \
+                .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s events", deleted_rows)
 
-        if protected_state_ids:
-            delete_states = delete_states \
-                .filter(~States.state_id.in_(protected_state_ids))
+        # Only the hourly statistics are kept for longer than the states
+        old_statistics = session.query(Statistics.statistic_id) \
+            .filter(Statistics.period == PERIOD_5MINUTE) \
+            .filter(Statistics.start < purge_before) \
+            .limit(batch_size)
+        statistic_ids = [row[0] for row in old_statistics]
+
+        deleted_rows = 0
+        if statistic_ids:
+            deleted_rows = session.query(Statistics) \
+                .filter(Statistics.statistic_id.in_(statistic_ids)) \
+                .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s statistics", deleted_rows)
+
+        # Attributes are shared between states, only delete the ones that are
+        # no longer referenced by any state.
+        has_state = exists().where(
+            States.attributes_id == StateAttributes.attributes_id)
+
+        attributes_ids = [row[0] for row in
+                          session.query(StateAttributes.attributes_id)
+                          .filter(~has_state)
+                          .limit(batch_size)]
+
+        deleted_rows = 0
+        if attributes_ids:
+            deleted_rows = session.query(StateAttributes) \
+                .filter(StateAttributes.attributes_id.in_(attributes_ids)) \
+                .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s state attributes", deleted_rows)
+
+        if batch_size in (len(state_ids), len(event_ids), len(statistic_ids),
+                          len(attributes_ids)):
+            _save_progress(instance, purge_days, repack)
+            return False
 
-        deleted_rows = delete_states.delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s states", deleted_rows)
+    # Execute sqlite vacuum command to free up space on disk
+    _LOGGER.debug("DB engine driver: %s", instance.engine.driver)
+    if repack and instance.engine.driver == 'pysqlite' and \
+            not _repack_sqlite(instance, batch_size):
+        _save_progress(instance, purge_days, repack)
+        return False
 
-        delete_events = session.query(Events) \
-            .filter((Events.time_fired < purge_before))
+    _clear_progress(instance)
 
-        # We also need to protect the events belonging to the protected states.
-        # Otherwise, if the SQL server has "ON DELETE CASCADE" as default, it
-        # will delete the protected state when deleting its associated
-        # event. Also, we would be producing NULLed foreign keys otherwise.
-        if protected_state_ids:
-            protected_events = session.query(States.event_id) \
-                .filter(States.state_id.in_(protected_state_ids)) \
-                .filter(States.event_id.isnot(None)) \
-                .all()
+    return True
 
-            protected_event_ids = tuple(state[0] for state in protected_events)
 
-            if protected_event_ids:
-                delete_events = delete_events \
-                    .filter(~Events.event_id.in_(protected_event_ids))
+def _repack_sqlite(instance, max_pages):
+    """Free the unused pages of an SQLite database.
 
-        deleted_rows = delete_events.delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s events", deleted_rows)
+    Databases with incremental auto vacuum free at most max_pages pages and
+    False is returned while free pages are left. Other databases are vacuumed
+    at once, which also enables incremental auto vacuum for them.
+    """
+    import sqlite3
+    from sqlalchemy import exc
 
-    # Execute sqlite vacuum command to free up space on disk
-    _LOGGER.debug("DB engine driver: %s", instance.engine.driver)
-    if repack and instance.engine.driver == 'pysqlite':
-        from sqlalchemy import exc
+    try:
+        if instance.engine.execute("PRAGMA auto_vacuum").scalar() != \
+                SQLITE_AUTO_VACUUM_INCREMENTAL:
+            _LOGGER.debug("Vacuuming SQLite to free space")
+            instance.engine.execute("VACUUM")
+            return True
 
-        _LOGGER.debug("Vacuuming SQLite to free space")
+        _LOGGER.debug("Freeing up to %s pages of SQLite", max_pages)
+        connection = instance.engine.raw_connection()
         try:
-            instance.engine.execute("VACUUM")
-        except exc.OperationalError as err:
-            _LOGGER.error("Error vacuuming SQLite: %s.", err)
+            cursor = connection.cursor()
+            # Each step of the statement frees one page
+            cursor.execute(
+                "PRAGMA incremental_vacuum({})".format(int(max_pages)))
+            cursor.fetchall()
+            cursor.execute("PRAGMA freelist_count")
+            free_pages = cursor.fetchone()[0]
+            cursor.close()
+        finally:
+            connection.close()
+    except (exc.OperationalError, sqlite3.OperationalError) as err:
+        _LOGGER.error("Error vacuuming SQLite: %s.", err)
+        return True
+
+    return free_pages == 0
+
+
+def get_unfinished_purge(instance):
+    """Return the purge that was interrupted by a restart, if any.
+
+    Returns a tuple of purge days and repack.
+    """
+    progress_path = instance.hass.config.path(PROGRESS_FILE)
+    if not os.path.isfile(progress_path):
+        return None
+
+    try:
+        progress = load_json(progress_path)
+    except HomeAssistantError:
+        progress = {}
+
+    if 'purge_days' not in progress:
+        _clear_progress(instance)
+        return None
+
+    _LOGGER.info("Resuming unfinished purge of data older than %s days",
+                 progress['purge_days'])
+    return progress['purge_days'], progress.get('repack', False)
+
+
+def _save_progress(instance, purge_days, repack):
+    """Store the running purge so it can be resumed after a restart."""
+    progress_path = instance.hass.config.path(PROGRESS_FILE)
+    if os.path.isfile(progress_path):
+        return
+
+    save_json(progress_path, {'purge_days': purge_days, 'repack': repack})
+
+
+def _clear_progress(instance):
+    """Remove the progress of a finished purge."""
+    progress_path = instance.hass.config.path(PROGRESS_FILE)
+    if os.path.isfile(progress_path):
+        os.remove(progress_path)
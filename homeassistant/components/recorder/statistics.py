@@ -0,0 +1,181 @@
+"""Roll up numeric sensor states into long-term statistics."""
+import logging
+import math
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, EVENT_STATE_CHANGED
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_5MINUTE = 300
+PERIOD_HOUR = 3600
+PERIODS = (PERIOD_5MINUTE, PERIOD_HOUR)
+
+
+def period_start(timestamp, period):
+    """Return the start of the period a timestamp falls in."""
+    seconds = int(dt_util.as_timestamp(timestamp))
+    return dt_util.utc_from_timestamp(seconds - seconds % period)
+
+
+def pick_period(start_time, end_time, max_points):
+    """Pick the statistics period for at most max_points per entity.
+
+    Returns None when the requested resolution is finer than the shortest
+    period and the raw states should be used.
+    """
+    span = (end_time - start_time).total_seconds()
+    seconds_per_point = span / max_points
+
+    if seconds_per_point < PERIODS[0]:
+        return None
+
+    for period in PERIODS:
+        if period >= seconds_per_point:
+            return period
+    return PERIODS[-1]
+
+
+def compile_statistics(instance, session, events):
+    """Fold the numeric states of committed events into the statistics.
+
+    Returns the updated buckets, which the recorder stores as its open
+    buckets once the transaction has been committed.
+
+    The mean of a bucket is the mean of the states recorded in its period,
+    it is not weighted by how long each state lasted.
+    """
+    updated = {}
+
+    for event in events:
+        if event.event_type != EVENT_STATE_CHANGED:
+            continue
+
+        state = event.data.get('new_state')
+        if state is None:
+            continue
+
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        if unit is None:
+            continue
+
+        try:
+            value = float(state.state)
+        except ValueError:
+            continue
+
+        # Not a measurement, and would poison the mean of the bucket
+        if not math.isfinite(value):
+            continue
+
+        for period in PERIODS:
+            key = (state.entity_id, period)
+            start = period_start(state.last_updated, period)
+            bucket = updated.get(key)
+
+            if bucket is None:
+                bucket = instance.statistics_buckets.get(key)
+                if bucket is not None:
+                    bucket = dict(bucket)
+
+            if bucket is not None and bucket['start'] != start:
+                if key in updated:
+                    # The bucket was closed within this batch
+                    _save_bucket(session, state.entity_id, period, bucket)
+                bucket = None
+
+            if bucket is None:
+                bucket = _load_bucket(session, state.entity_id, period, start)
+
+            if bucket is None:
+                bucket = {
+                    'statistic_id': None,
+                    'start': start,
+                    'unit_of_measurement': unit,
+                    'min': value,
+                    'max': value,
+                    'mean': value,
+                    'last': value,
+                    'count': 1,
+                }
+            else:
+                count = bucket['count'] + 1
+                bucket.update({
+                    'unit_of_measurement': unit,
+                    'min': min(bucket['min'], value),
+                    'max': max(bucket['max'], value),
+                    'mean': bucket['mean'] + (value - bucket['mean']) / count,
+                    'last': value,
+                    'count': count,
+                })
+
+            updated[key] = bucket
+
+    for (entity_id, period), bucket in updated.items():
+        _save_bucket(session, entity_id, period, bucket)
+
+    return updated
+
+
+def statistics_during_period(session, start_time, end_time, period,
+                             entity_ids=None):
+    """Return the statistics of a period grouped by entity id."""
+    from .models import Statistics
+
+    query = session.query(Statistics).filter(
+        (Statistics.period == period) &
+        (Statistics.start >= period_start(start_time, period)))
+
+    if end_time is not None:
+        query = query.filter(Statistics.start < end_time)
+
+    if entity_ids is not None:
+        query = query.filter(Statistics.entity_id.in_(entity_ids))
+
+    result = {}
+    for row in query.order_by(Statistics.entity_id, Statistics.start):
+        result.setdefault(row.entity_id, []).append(row.to_native())
+    return result
+
+
+def _load_bucket(session, entity_id, period, start):
+    """Load a bucket that was written before the recorder was started."""
+    from .models import Statistics
+
+    row = session.query(Statistics).filter_by(
+        entity_id=entity_id, period=period, start=start).first()
+
+    if row is None:
+        return None
+
+    return {
+        'statistic_id': row.statistic_id,
+        'start': start,
+        'unit_of_measurement': row.unit_of_measurement,
+        'min': row.min,
+        'max': row.max,
+        'mean': row.mean,
+        'last': row.last,
+        'count': row.count,
+    }
+
+
+def _save_bucket(session, entity_id, period, bucket):
+    """Insert or update the row of a bucket."""
+    from .models import Statistics
+
+    values = {
+        key: bucket[key] for key in
+        ('unit_of_measurement', 'min', 'max', 'mean', 'last', 'count')}
+
+    if bucket['statistic_id'] is not None:
+        session.query(Statistics).filter_by(
+            statistic_id=bucket['statistic_id']).update(values)
+        return
+
+    row = Statistics(
+        entity_id=entity_id, period=period, start=bucket['start'],
+        **values)
+    session.add(row)
+    session.flush()
+    bucket['statistic_id'] = row.statistic_id
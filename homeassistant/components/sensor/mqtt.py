@@ -102,6 +102,8 @@ async def _async_setup_entity(hass: HomeAssistantType, config: ConfigType,
 class MqttSensor(MqttAvailability, MqttDiscoveryUpdate, Entity):
     """Representation of a sensor that can be updated using MQTT."""
 
+    static_attributes = True
+
     def __init__(self, name, state_topic, qos, unit_of_measurement,
                  force_update, expire_after, icon, device_class: Optional[str],
                  value_template, json_attributes, unique_id: Optional[str],
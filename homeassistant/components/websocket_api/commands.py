@@ -2,8 +2,9 @@
 import voluptuous as vol
 
 from homeassistant.const import MATCH_ALL, EVENT_TIME_CHANGED
-from homeassistant.core import callback
+from homeassistant.core import callback, split_entity_id
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_state_change
 from homeassistant.helpers.service import async_get_all_descriptions
 
 from . import const, decorators, messages
@@ -16,7 +17,9 @@ TYPE_GET_SERVICES = 'get_services'
 TYPE_GET_STATES = 'get_states'
 TYPE_PING = 'ping'
 TYPE_PONG = 'pong'
+TYPE_SUBSCRIBE_ENTITIES = 'subscribe_entities'
 TYPE_SUBSCRIBE_EVENTS = 'subscribe_events'
+TYPE_SUPPORTED_FEATURES = 'supported_features'
 TYPE_UNSUBSCRIBE_EVENTS = 'unsubscribe_events'
 
 
@@ -28,11 +31,15 @@ def async_register_commands(hass):
               SCHEMA_SUBSCRIBE_EVENTS)
     async_reg(TYPE_UNSUBSCRIBE_EVENTS, handle_unsubscribe_events,
               SCHEMA_UNSUBSCRIBE_EVENTS)
+    async_reg(TYPE_SUBSCRIBE_ENTITIES, handle_subscribe_entities,
+              SCHEMA_SUBSCRIBE_ENTITIES)
     async_reg(TYPE_CALL_SERVICE, handle_call_service, SCHEMA_CALL_SERVICE)
     async_reg(TYPE_GET_STATES, handle_get_states, SCHEMA_GET_STATES)
     async_reg(TYPE_GET_SERVICES, handle_get_services, SCHEMA_GET_SERVICES)
     async_reg(TYPE_GET_CONFIG, handle_get_config, SCHEMA_GET_CONFIG)
     async_reg(TYPE_PING, handle_ping, SCHEMA_PING)
+    async_reg(TYPE_SUPPORTED_FEATURES, handle_supported_features,
+              SCHEMA_SUPPORTED_FEATURES)
 
 
 SCHEMA_SUBSCRIBE_EVENTS = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
@@ -47,6 +54,14 @@ SCHEMA_UNSUBSCRIBE_EVENTS = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
 })
 
 
+SCHEMA_SUBSCRIBE_ENTITIES = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_SUBSCRIBE_ENTITIES,
+    vol.Optional('entity_ids'): cv.entity_ids,
+    vol.Optional('domains'): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional('rate_limit'): vol.All(vol.Coerce(float), vol.Range(min=0)),
+})
+
+
 SCHEMA_CALL_SERVICE = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
     vol.Required('type'): TYPE_CALL_SERVICE,
     vol.Required('domain'): str,
@@ -75,6 +90,12 @@ SCHEMA_PING = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
 })
 
 
+SCHEMA_SUPPORTED_FEATURES = messages.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_SUPPORTED_FEATURES,
+    vol.Required('features'): {str: int},
+})
+
+
 def event_message(iden, event):
     """Return an event message."""
     return {
@@ -84,6 +105,15 @@ def event_message(iden, event):
     }
 
 
+def entities_message(iden, entities_event):
+    """Return an entities subscription message."""
+    return {
+        'id': iden,
+        'type': TYPE_EVENT,
+        'event': entities_event,
+    }
+
+
 def pong_message(iden):
     """Return a pong message."""
     return {
@@ -127,6 +157,109 @@ def handle_unsubscribe_events(hass, connection, msg):
             msg['id'], const.ERR_NOT_FOUND, 'Subscription not found.'))
 
 
+@callback
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    Sends the states of the matching entities, followed by the fields that
+    changed. With a rate limit, the changes are sent at most once per
+    rate_limit seconds and only the latest state of an entity is sent.
+
+    Async friendly.
+    """
+    entity_ids = set(msg.get('entity_ids', ()))
+    domains = set(msg.get('domains', ()))
+    rate_limit = msg.get('rate_limit')
+    pending = {}
+    flush_handle = None
+
+    def matches(entity_id):
+        """Return if the subscription includes an entity."""
+        if not entity_ids and not domains:
+            return True
+        return entity_id in entity_ids or \
+            split_entity_id(entity_id)[0] in domains
+
+    @callback
+    def flush():
+        """Send the pending changes."""
+        nonlocal flush_handle
+        flush_handle = None
+
+        added = {}
+        changed = {}
+        removed = []
+
+        for entity_id, (old_state, new_state) in pending.items():
+            if new_state is None:
+                if old_state is not None:
+                    removed.append(entity_id)
+            elif old_state is None:
+                added[entity_id] = messages.compressed_state(new_state)
+            else:
+                diff = messages.state_diff(old_state, new_state)
+                if diff:
+                    changed[entity_id] = diff
+
+        pending.clear()
+
+        entities_event = {}
+        if added:
+            entities_event[messages.ENTITY_EVENT_ADD] = added
+        if changed:
+            entities_event[messages.ENTITY_EVENT_CHANGE] = changed
+        if removed:
+            entities_event[messages.ENTITY_EVENT_REMOVE] = removed
+
+        if entities_event:
+            connection.send_message(
+                entities_message(msg['id'], entities_event))
+
+    @callback
+    def forward_state_change(entity_id, old_state, new_state):
+        """Queue the change of an entity."""
+        nonlocal flush_handle
+        if domains and not matches(entity_id):
+            return
+
+        if entity_id in pending:
+            old_state = pending[entity_id][0]
+        pending[entity_id] = (old_state, new_state)
+
+        if not rate_limit:
+            flush()
+        elif flush_handle is None:
+            flush_handle = hass.loop.call_later(rate_limit, flush)
+
+    # Only the listeners of the entities are called when no domains are
+    # included
+    if entity_ids and not domains:
+        track_entity_ids = list(entity_ids)
+    else:
+        track_entity_ids = MATCH_ALL
+
+    unsub_state_change = async_track_state_change(
+        hass, track_entity_ids, forward_state_change)
+
+    @callback
+    def unsubscribe():
+        """Stop forwarding state changes."""
+        unsub_state_change()
+        if flush_handle is not None:
+            flush_handle.cancel()
+
+    connection.event_listeners[msg['id']] = unsubscribe
+
+    connection.send_message(messages.result_message(msg['id']))
+    connection.send_message(entities_message(msg['id'], {
+        messages.ENTITY_EVENT_ADD: {
+            state.entity_id: messages.compressed_state(state)
+            for state in hass.states.async_all()
+            if matches(state.entity_id)
+        }
+    }))
+
+
 @decorators.async_response
 async def handle_call_service(hass, connection, msg):
     """Handle call service command.
@@ -181,3 +314,13 @@ def handle_ping(hass, connection, msg):
     Async friendly.
     """
     connection.send_message(pong_message(msg['id']))
+
+
+@callback
+def handle_supported_features(hass, connection, msg):
+    """Handle supported features command.
+
+    Async friendly.
+    """
+    connection.supported_features = msg['features']
+    connection.send_message(messages.result_message(msg['id']))
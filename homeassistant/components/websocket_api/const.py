@@ -4,7 +4,13 @@ from concurrent import futures
 
 DOMAIN = 'websocket_api'
 URL = '/api/websocket'
-MAX_PENDING_MSG = 512
+# Pending messages that are logged as a client falling behind, and the
+# number at which the connection is closed
+PENDING_MSG_PEAK = 512
+MAX_PENDING_MSG = 2048
+
+# Client features that can be enabled with the supported_features command
+FEATURE_COALESCE_MESSAGES = 'coalesce_messages'
 
 ERR_ID_REUSE = 1
 ERR_INVALID_FORMAT = 2
@@ -1,23 +1,24 @@
 """View to accept incoming websocket connection."""
 import asyncio
+from collections import deque
 from contextlib import suppress
-from functools import partial
-import json
 import logging
 
 from aiohttp import web, WSMsgType
 import async_timeout
 
-from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, EVENT_STATE_CHANGED
 from homeassistant.core import callback
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers.json import json_dumps
 
-from .const import MAX_PENDING_MSG, CANCELLATION_ERRORS, URL
+from .const import (
+    MAX_PENDING_MSG, PENDING_MSG_PEAK, CANCELLATION_ERRORS, URL,
+    FEATURE_COALESCE_MESSAGES)
 from .auth import AuthPhase, auth_required_message
 from .error import Disconnect
 
-JSON_DUMP = partial(json.dumps, cls=JSONEncoder)
+JSON_DUMP = json_dumps
 
 
 class WebsocketAPIView(HomeAssistantView):
@@ -41,41 +42,115 @@ class WebSocketHandler:
         self.hass = hass
         self.request = request
         self.wsock = None
-        self._to_write = asyncio.Queue(maxsize=MAX_PENDING_MSG, loop=hass.loop)
+        self._to_write = deque()
+        self._ready_future = None
         self._handle_task = None
         self._writer_task = None
+        self._connection = None
         self._logger = logging.getLogger(
             "{}.connection.{}".format(__name__, id(self)))
+        self._peak_warned = False
+
+        # Backlog metrics of the connection
+        self.peak_backlog = 0
+        self.coalesced_messages = 0
+        self.sent_messages = 0
+        self.sent_frames = 0
 
     async def _writer(self):
-        """Write outgoing messages."""
+        """Write outgoing messages.
+
+        All pending messages are written in one pass. When the client
+        supports it, they are joined into a single frame. When the client
+        has fallen behind, superseded state changes are dropped.
+        """
         # Exceptions if Socket disconnected or cancelled by connection handler
         with suppress(RuntimeError, *CANCELLATION_ERRORS):
             while not self.wsock.closed:
-                message = await self._to_write.get()
-                if message is None:
+                if not self._to_write:
+                    self._ready_future = self.hass.loop.create_future()
+                    await self._ready_future
+
+                if len(self._to_write) > PENDING_MSG_PEAK:
+                    messages = _coalesce_state_changes(self._to_write)
+                    self.coalesced_messages += \
+                        len(self._to_write) - len(messages)
+                else:
+                    messages = list(self._to_write)
+                self._to_write.clear()
+
+                closing = None in messages
+                if closing:
+                    messages = messages[:messages.index(None)]
+
+                encoded = []
+                for message in messages:
+                    try:
+                        encoded.append(JSON_DUMP(message))
+                    except TypeError as err:
+                        self._logger.error(
+                            'Unable to serialize to JSON: %s\n%s',
+                            err, message)
+
+                if len(encoded) > 1 and self._coalesce_messages:
+                    encoded = ['[{}]'.format(','.join(encoded))]
+
+                for frame in encoded:
+                    self._logger.debug("Sending %s", frame)
+                    await self.wsock.send_str(frame)
+
+                self.sent_messages += len(messages)
+                self.sent_frames += len(encoded)
+
+                if closing:
                     break
-                self._logger.debug("Sending %s", message)
-                try:
-                    await self.wsock.send_json(message, dumps=JSON_DUMP)
-                except TypeError as err:
-                    self._logger.error('Unable to serialize to JSON: %s\n%s',
-                                       err, message)
+
+    @property
+    def _coalesce_messages(self):
+        """Return if the client accepts multiple messages per frame."""
+        return self._connection is not None and \
+            self._connection.supported_features.get(
+                FEATURE_COALESCE_MESSAGES) == 1
 
     @callback
     def _send_message(self, message):
         """Send a message to the client.
 
-        Closes connection if the client is not reading the messages.
+        When the client falls behind, superseded state changes are dropped.
+        Closes connection if the client is still not reading the messages.
 
         Async friendly.
         """
-        try:
-            self._to_write.put_nowait(message)
-        except asyncio.QueueFull:
-            self._logger.error("Client exceeded max pending messages [2]: %s",
-                               MAX_PENDING_MSG)
-            self._cancel()
+        self._to_write.append(message)
+        backlog = len(self._to_write)
+
+        if backlog > self.peak_backlog:
+            self.peak_backlog = backlog
+
+            if backlog > PENDING_MSG_PEAK and not self._peak_warned:
+                self._peak_warned = True
+                self._logger.warning(
+                    "Client is falling behind, %s pending messages", backlog)
+
+        if backlog > MAX_PENDING_MSG:
+            messages = _coalesce_state_changes(self._to_write)
+            self.coalesced_messages += backlog - len(messages)
+            self._to_write = deque(messages)
+
+            if len(messages) > MAX_PENDING_MSG:
+                self._logger.error(
+                    "Client exceeded max pending messages [2]: %s",
+                    MAX_PENDING_MSG)
+                self._cancel()
+                return
+
+        self._async_wake_writer()
+
+    @callback
+    def _async_wake_writer(self):
+        """Wake up the writer if it is waiting for messages."""
+        if self._ready_future is not None and not self._ready_future.done():
+            self._ready_future.set_result(None)
 
     @callback
     def _cancel(self):
@@ -137,7 +212,7 @@ class WebSocketHandler:
                 raise Disconnect
 
             self._logger.debug("Received %s", msg)
-            connection = await auth.async_handle(msg)
+            connection = self._connection = await auth.async_handle(msg)
 
             # Command phase
             while not wsock.closed:
@@ -174,16 +249,50 @@ class WebSocketHandler:
             if connection is not None:
                 connection.async_close()
 
-            try:
-                self._to_write.put_nowait(None)
+            if len(self._to_write) >= MAX_PENDING_MSG:
+                self._writer_task.cancel()
+            else:
                 # Make sure all error messages are written before closing
+                self._to_write.append(None)
+                self._async_wake_writer()
                 await self._writer_task
-            except asyncio.QueueFull:
-                self._writer_task.cancel()
 
             await wsock.close()
 
+            self._logger.debug(
+                "Sent %s messages in %s frames, coalesced %s state changes, "
+                "peak backlog %s", self.sent_messages, self.sent_frames,
+                self.coalesced_messages, self.peak_backlog)
+
             if disconnect_warn is None:
                 self._logger.debug("Disconnected")
             else:
                 self._logger.warning("Disconnected: %s", disconnect_warn)
+
+
+def _coalesce_state_changes(messages):
+    """Return the messages without superseded state changes.
+
+    A state_changed event of a subscription is superseded by a later
+    state_changed event for the same entity.
+    """
+    keys = [_state_changed_key(message) for message in messages]
+    latest = {key: index for index, key in enumerate(keys)
+              if key is not None}
+
+    return [message for index, (message, key)
+            in enumerate(zip(messages, keys))
+            if key is None or latest[key] == index]
+
+
+def _state_changed_key(message):
+    """Return the subscription and entity of a state_changed event message."""
+    if not isinstance(message, dict) or message.get('type') != 'event':
+        return None
+
+    event = message.get('event')
+    if not isinstance(event, dict) or \
+            event.get('event_type') != EVENT_STATE_CHANGED:
+        return None
+
+    return message['id'], event['data'].get('entity_id')
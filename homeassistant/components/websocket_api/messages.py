@@ -40,3 +40,72 @@ def error_message(iden, code, message):
             'message': message,
         },
     }
+
+
+# Keys of the compressed states and state diffs of entity subscriptions
+ENTITY_EVENT_ADD = 'a'
+ENTITY_EVENT_REMOVE = 'r'
+ENTITY_EVENT_CHANGE = 'c'
+
+COMPRESSED_STATE_STATE = 's'
+COMPRESSED_STATE_ATTRIBUTES = 'a'
+COMPRESSED_STATE_CONTEXT = 'c'
+COMPRESSED_STATE_LAST_CHANGED = 'lc'
+COMPRESSED_STATE_LAST_UPDATED = 'lu'
+
+DIFF_ADDITIONS = '+'
+DIFF_REMOVALS = '-'
+
+
+def compressed_state(state):
+    """Return the compressed representation of a state.
+
+    The last changed time is left out when it equals the last updated time.
+    """
+    compressed = {
+        COMPRESSED_STATE_STATE: state.state,
+        COMPRESSED_STATE_ATTRIBUTES: dict(state.attributes),
+        COMPRESSED_STATE_CONTEXT: state.context.id,
+        COMPRESSED_STATE_LAST_UPDATED: state.last_updated.timestamp(),
+    }
+    if state.last_changed != state.last_updated:
+        compressed[COMPRESSED_STATE_LAST_CHANGED] = \
+            state.last_changed.timestamp()
+    return compressed
+
+
+def state_diff(old_state, new_state):
+    """Return the fields that changed between two states of an entity."""
+    additions = {}
+    removals = {}
+
+    if old_state.state != new_state.state:
+        additions[COMPRESSED_STATE_STATE] = new_state.state
+    if old_state.context.id != new_state.context.id:
+        additions[COMPRESSED_STATE_CONTEXT] = new_state.context.id
+    if old_state.last_changed != new_state.last_changed:
+        additions[COMPRESSED_STATE_LAST_CHANGED] = \
+            new_state.last_changed.timestamp()
+    if old_state.last_updated != new_state.last_updated:
+        additions[COMPRESSED_STATE_LAST_UPDATED] = \
+            new_state.last_updated.timestamp()
+
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+    changed_attributes = {
+        key: value for key, value in new_attributes.items()
+        if key not in old_attributes or old_attributes[key] != value}
+    if changed_attributes:
+        additions[COMPRESSED_STATE_ATTRIBUTES] = changed_attributes
+
+    removed_attributes = [
+        key for key in old_attributes if key not in new_attributes]
+    if removed_attributes:
+        removals[COMPRESSED_STATE_ATTRIBUTES] = removed_attributes
+
+    diff = {}
+    if additions:
+        diff[DIFF_ADDITIONS] = additions
+    if removals:
+        diff[DIFF_REMOVALS] = removals
+    return diff
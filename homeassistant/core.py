@@ -8,6 +8,7 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import datetime
 import enum
+import json
 import logging
 import os
 import pathlib
@@ -20,7 +21,7 @@ import uuid
 from types import MappingProxyType
 from typing import (  # noqa: F401 pylint: disable=unused-import
     Optional, Any, Callable, List, TypeVar, Dict, Coroutine, Set,
-    TYPE_CHECKING, Awaitable, Iterator)
+    TYPE_CHECKING, Awaitable, Iterator, Mapping, Tuple)
 
 from async_timeout import timeout
 import attr
@@ -109,6 +110,45 @@ def async_loop_exception_handler(_: Any, context: Dict) -> None:
         "Error doing job: %s", context['message'], **kwargs)
 
 
+class HassJobType(enum.Enum):
+    """Represent how a job is run."""
+
+    Coroutinefunction = 1
+    Callback = 2
+    Executor = 3
+
+
+class HassJob:
+    """Represent a callable that is run as a job.
+
+    The type of the callable is determined once when the job is created
+    instead of every time it is run.
+    """
+
+    __slots__ = ('job_type', 'target')
+
+    def __init__(self, target: Callable) -> None:
+        """Create a job object."""
+        if asyncio.iscoroutine(target):
+            raise ValueError("Coroutine not allowed to be passed to HassJob")
+
+        self.target = target
+        self.job_type = _get_callable_job_type(target)
+
+    def __repr__(self) -> str:
+        """Return the job."""
+        return "<Job {} {}>".format(self.job_type, self.target)
+
+
+def _get_callable_job_type(target: Callable) -> HassJobType:
+    """Determine the job type from the callable."""
+    if is_callback(target):
+        return HassJobType.Callback
+    if asyncio.iscoroutinefunction(target):
+        return HassJobType.Coroutinefunction
+    return HassJobType.Executor
+
+
 class CoreState(enum.Enum):
     """Represent the current state of Home Assistant."""
 
@@ -274,6 +314,34 @@ class HomeAssistant:
 
         return task
 
+    @callback
+    def async_add_hass_job(
+            self,
+            hassjob: HassJob,
+            *args: Any) -> Optional[asyncio.Future]:
+        """Add a job whose type was determined in advance.
+
+        This method must be run in the event loop.
+
+        hassjob: job to run.
+        args: parameters for method to call.
+        """
+        if hassjob.job_type == HassJobType.Callback:
+            self.loop.call_soon(hassjob.target, *args)
+            return None
+
+        if hassjob.job_type == HassJobType.Coroutinefunction:
+            task = self.loop.create_task(hassjob.target(*args))
+        else:
+            task = self.loop.run_in_executor(  # type: ignore
+                None, hassjob.target, *args)
+
+        # If a task is scheduled
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
     @callback
     def async_create_task(self, target: Coroutine) -> asyncio.tasks.Task:
         """Create a task from within the eventloop.
@@ -482,7 +550,9 @@ class EventBus:
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners = {}  # type: Dict[str, List[Callable]]
+        self._listeners = {}  # type: Dict[str, List[HassJob]]
+        # Listeners per event type, including the MATCH_ALL listeners
+        self._dispatch = {}  # type: Dict[str, Tuple[HassJob, ...]]
         self._hass = hass
 
     @callback
@@ -514,6 +584,27 @@ class EventBus:
                    context: Optional[Context] = None) -> None:
         """Fire an event.
 
+        This method must be run in the event loop.
+        """
+        jobs = self._dispatch.get(event_type)
+        if jobs is None:
+            jobs = self._dispatch[event_type] = self._async_build_dispatch(
+                event_type)
+
+        event = Event(event_type, event_data, origin, None, context)
+
+        if event_type != EVENT_TIME_CHANGED and \
+                _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Bus:Handling %s", event)
+
+        add_hass_job = self._hass.async_add_hass_job
+        for job in jobs:
+            add_hass_job(job, event)
+
+    @callback
+    def _async_build_dispatch(self, event_type: str) -> Tuple[HassJob, ...]:
+        """Return the listeners that an event type is dispatched to.
+
         This method must be run in the event loop.
         """
         listeners = self._listeners.get(event_type, [])
@@ -524,16 +615,18 @@ class EventBus:
                 event_type != EVENT_HOMEASSISTANT_CLOSE):
             listeners = match_all_listeners + listeners
 
-        event = Event(event_type, event_data, origin, None, context)
+        return tuple(listeners)
 
-        if event_type != EVENT_TIME_CHANGED:
-            _LOGGER.debug("Bus:Handling %s", event)
-
-        if not listeners:
-            return
+    @callback
+    def _async_invalidate_dispatch(self, event_type: str) -> None:
+        """Drop the cached listeners after listeners changed.
 
-        for func in listeners:
-            self._hass.async_add_job(func, event)
+        This method must be run in the event loop.
+        """
+        if event_type == MATCH_ALL:
+            self._dispatch.clear()
+        else:
+            self._dispatch.pop(event_type, None)
 
     def listen(
             self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
@@ -560,16 +653,26 @@ class EventBus:
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
 
+        This method must be run in the event loop.
+        """
+        return self._async_listen_job(event_type, HassJob(listener))
+
+    @callback
+    def _async_listen_job(
+            self, event_type: str, job: HassJob) -> CALLBACK_TYPE:
+        """Add a job as listener of an event type.
+
         This method must be run in the event loop.
         """
         if event_type in self._listeners:
-            self._listeners[event_type].append(listener)
+            self._listeners[event_type].append(job)
         else:
-            self._listeners[event_type] = [listener]
+            self._listeners[event_type] = [job]
+        self._async_invalidate_dispatch(event_type)
 
         def remove_listener() -> None:
             """Remove the listener."""
-            self._async_remove_listener(event_type, listener)
+            self._async_remove_listener(event_type, job)
 
         return remove_listener
 
@@ -616,20 +719,21 @@ class EventBus:
             # multiple times as well.
             # This will make sure the second time it does nothing.
             setattr(onetime_listener, 'run', True)
-            self._async_remove_listener(event_type, onetime_listener)
+            self._async_remove_listener(event_type, job)
             self._hass.async_run_job(listener, event)
 
-        return self.async_listen(event_type, onetime_listener)
+        job = HassJob(onetime_listener)
+        return self._async_listen_job(event_type, job)
 
     @callback
     def _async_remove_listener(
-            self, event_type: str, listener: Callable) -> None:
+            self, event_type: str, job: HassJob) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(listener)
+            self._listeners[event_type].remove(job)
 
             # delete event_type list if empty
             if not self._listeners[event_type]:
@@ -637,7 +741,11 @@ class EventBus:
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
-            _LOGGER.warning("Unable to remove unknown listener %s", listener)
+            _LOGGER.warning("Unable to remove unknown listener %s",
+                            job.target)
+            return
+
+        self._async_invalidate_dispatch(event_type)
 
 
 class State:
@@ -652,10 +760,10 @@ class State:
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated', 'context']
+                 'last_changed', 'last_updated', 'context', '_as_json']
 
     def __init__(self, entity_id: str, state: Any,
-                 attributes: Optional[Dict] = None,
+                 attributes: Optional[Mapping] = None,
                  last_changed: Optional[datetime.datetime] = None,
                  last_updated: Optional[datetime.datetime] = None,
                  context: Optional[Context] = None) -> None:
@@ -674,10 +782,15 @@ class State:
 
         self.entity_id = entity_id.lower()
         self.state = state
-        self.attributes = MappingProxyType(attributes or {})
+        if isinstance(attributes, MappingProxyType):
+            # Read-only attributes can be shared between states
+            self.attributes = attributes  # type: MappingProxyType
+        else:
+            self.attributes = MappingProxyType(attributes or {})
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
         self.context = context or Context()
+        self._as_json = None  # type: Optional[str]
 
     @property
     def domain(self) -> str:
@@ -711,6 +824,20 @@ class State:
                 'last_updated': self.last_updated,
                 'context': self.context.as_dict()}
 
+    def as_json(self) -> str:
+        """Return the JSON representation of the State.
+
+        Async friendly.
+
+        The JSON is encoded once and reused by every message the state is
+        sent in. Keys are sorted, so it fits messages with sorted keys.
+        """
+        if self._as_json is None:
+            from homeassistant.helpers.json import JSONEncoder
+            self._as_json = json.dumps(
+                self.as_dict(), cls=JSONEncoder, sort_keys=True)
+        return self._as_json
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
         """Initialize a state from a dict.
@@ -867,12 +994,14 @@ class StateMachine:
 
     @callback
     def async_set(self, entity_id: str, new_state: Any,
-                  attributes: Optional[Dict] = None,
+                  attributes: Optional[Mapping] = None,
                   force_update: bool = False,
                   context: Optional[Context] = None) -> None:
         """Set the state of an entity, add entity if it does not exist.
 
         Attributes is an optional dict to specify attributes of this state.
+        A read-only mapping of attributes, like the attributes of the current
+        state, is used as is and is compared by identity first.
 
         If you just update the attributes and not the state, last changed will
         not be affected.
@@ -890,12 +1019,18 @@ class StateMachine:
         else:
             same_state = (old_state.state == new_state and
                           not force_update)
-            same_attr = old_state.attributes == attributes
+            same_attr = (old_state.attributes is attributes or
+                         old_state.attributes == attributes)
             last_changed = old_state.last_changed if same_state else None
 
         if same_state and same_attr:
             return
 
+        if same_attr and old_state is not None:
+            # Keep sharing the attributes, s.t. the next update of the entity
+            # can be compared by identity.
+            attributes = old_state.attributes
+
         if context is None:
             context = Context()
 
@@ -1058,12 +1193,8 @@ class ServiceRegistry:
         If blocking = True, will return boolean if service executed
         successfully within SERVICE_CALL_LIMIT.
 
-        This method will fire an event to call the service.
-        This event will be picked up by this ServiceRegistry and any
-        other ServiceRegistry that is listening on the EventBus.
-
-        Because the service is sent as an event you are not allowed to use
-        the keys ATTR_DOMAIN and ATTR_SERVICE in your service_data.
+        The service is called directly. A call_service event is fired to
+        notify listeners of the call, it does not execute the service.
         """
         return run_coroutine_threadsafe(  # type: ignore
             self.async_call(domain, service, service_data, blocking, context),
@@ -1083,108 +1214,115 @@ class ServiceRegistry:
         If blocking = True, will return boolean if service executed
         successfully within SERVICE_CALL_LIMIT.
 
-        This method will fire an event to call the service.
-        This event will be picked up by this ServiceRegistry and any
-        other ServiceRegistry that is listening on the EventBus.
-
-        Because the service is sent as an event you are not allowed to use
-        the keys ATTR_DOMAIN and ATTR_SERVICE in your service_data.
+        The service is called directly. A call_service event is fired to
+        notify listeners of the call, it does not execute the service.
 
         This method is a coroutine.
         """
+        domain = domain.lower()
+        service = service.lower()
         context = context or Context()
-        call_id = uuid.uuid4().hex
-        event_data = {
-            ATTR_DOMAIN: domain.lower(),
-            ATTR_SERVICE: service.lower(),
+
+        self._hass.bus.async_fire(EVENT_CALL_SERVICE, {
+            ATTR_DOMAIN: domain,
+            ATTR_SERVICE: service,
             ATTR_SERVICE_DATA: service_data,
-            ATTR_SERVICE_CALL_ID: call_id,
-        }
+        }, EventOrigin.local, context)
 
-        if not blocking:
-            self._hass.bus.async_fire(
-                EVENT_CALL_SERVICE, event_data, EventOrigin.local, context)
-            return None
+        handler = self._services.get(domain, {}).get(service)
 
-        fut = asyncio.Future()  # type: asyncio.Future
+        if handler is None:
+            _LOGGER.warning("Unable to find service %s/%s", domain, service)
+            return False if blocking else None
 
-        @callback
-        def service_executed(event: Event) -> None:
-            """Handle an executed service."""
-            if event.data[ATTR_SERVICE_CALL_ID] == call_id:
-                fut.set_result(True)
-                unsub()
-
-        unsub = self._hass.bus.async_listen(
-            EVENT_SERVICE_EXECUTED, service_executed)
-
-        self._hass.bus.async_fire(EVENT_CALL_SERVICE, event_data,
-                                  EventOrigin.local, context)
-
-        done, _ = await asyncio.wait([fut], timeout=SERVICE_CALL_LIMIT)
-        success = bool(done)
-        if not success:
-            unsub()
-        return success
-
-    async def _event_to_service_call(self, event: Event) -> None:
-        """Handle the SERVICE_CALLED events from the EventBus."""
-        service_data = event.data.get(ATTR_SERVICE_DATA) or {}
-        domain = event.data.get(ATTR_DOMAIN).lower()  # type: ignore
-        service = event.data.get(ATTR_SERVICE).lower()  # type: ignore
-        call_id = event.data.get(ATTR_SERVICE_CALL_ID)
+        service_call = self._async_validate_call(
+            handler, domain, service, service_data, context)
 
-        if not self.has_service(domain, service):
-            if event.origin == EventOrigin.local:
-                _LOGGER.warning("Unable to find service %s/%s",
-                                domain, service)
-            return
+        if service_call is None:
+            return True if blocking else None
 
-        service_handler = self._services[domain][service]
+        if not blocking:
+            self._hass.async_create_task(
+                self._async_execute(handler, service_call))
+            return None
 
-        def fire_service_executed() -> None:
-            """Fire service executed event."""
-            if not call_id:
-                return
+        if handler.is_callback:
+            return await self._async_execute(handler, service_call)
 
-            data = {ATTR_SERVICE_CALL_ID: call_id}
+        task = self._hass.async_create_task(
+            self._async_execute(handler, service_call))
 
-            if (service_handler.is_coroutinefunction or
-                    service_handler.is_callback):
-                self._hass.bus.async_fire(EVENT_SERVICE_EXECUTED, data,
-                                          EventOrigin.local, event.context)
-            else:
-                self._hass.bus.fire(EVENT_SERVICE_EXECUTED, data,
-                                    EventOrigin.local, event.context)
+        done, _ = await asyncio.wait([task], timeout=SERVICE_CALL_LIMIT)
+        return bool(done) and task.result()
+
+    # pylint: disable=no-self-use
+    @callback
+    def _async_validate_call(self, handler: Service, domain: str,
+                             service: str, service_data: Optional[Dict],
+                             context: Context) -> Optional[ServiceCall]:
+        """Return the call of a service, None if the data is invalid."""
+        service_data = service_data or {}
 
         try:
-            if service_handler.schema:
-                service_data = service_handler.schema(service_data)
+            if handler.schema:
+                service_data = handler.schema(service_data)
         except vol.Invalid as ex:
             _LOGGER.error("Invalid service data for %s.%s: %s",
                           domain, service, humanize_error(service_data, ex))
-            fire_service_executed()
-            return
+            return None
 
-        service_call = ServiceCall(
-            domain, service, service_data, event.context)
+        return ServiceCall(domain, service, service_data, context)
 
+    async def _async_execute(self, handler: Service,
+                             service_call: ServiceCall) -> bool:
+        """Execute a service, return if it was executed successfully."""
         try:
-            if service_handler.is_callback:
-                service_handler.func(service_call)
-                fire_service_executed()
-            elif service_handler.is_coroutinefunction:
-                await service_handler.func(service_call)
-                fire_service_executed()
+            if handler.is_callback:
+                handler.func(service_call)
+            elif handler.is_coroutinefunction:
+                await handler.func(service_call)
             else:
-                def execute_service() -> None:
-                    """Execute a service and fires a SERVICE_EXECUTED event."""
-                    service_handler.func(service_call)
-                    fire_service_executed()
-
-                await self._hass.async_add_executor_job(execute_service)
+                await self._hass.async_add_executor_job(
+                    handler.func, service_call)
         except Exception:  # pylint: disable=broad-except
             _LOGGER.exception('Error executing service %s', service_call)
+            return False
+
+        return True
+
+    @callback
+    def _event_to_service_call(self, event: Event) -> None:
+        """Handle the call_service events fired by remote instances.
+
+        Local service calls execute the service directly, their events are
+        only a notification.
+        """
+        if event.origin == EventOrigin.remote:
+            self._hass.async_create_task(self._async_remote_call(event))
+
+    async def _async_remote_call(self, event: Event) -> None:
+        """Execute the service of a remote call_service event."""
+        service_data = event.data.get(ATTR_SERVICE_DATA) or {}
+        domain = event.data.get(ATTR_DOMAIN).lower()  # type: ignore
+        service = event.data.get(ATTR_SERVICE).lower()  # type: ignore
+        call_id = event.data.get(ATTR_SERVICE_CALL_ID)
+
+        handler = self._services.get(domain, {}).get(service)
+
+        if handler is None:
+            return
+
+        service_call = self._async_validate_call(
+            handler, domain, service, service_data, event.context)
+
+        if service_call is not None and \
+                not await self._async_execute(handler, service_call):
+            return
+
+        if call_id:
+            self._hass.bus.async_fire(
+                EVENT_SERVICE_EXECUTED, {ATTR_SERVICE_CALL_ID: call_id},
+                EventOrigin.local, event.context)
 
 
 class Config:
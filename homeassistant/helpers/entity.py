@@ -3,6 +3,7 @@ from datetime import timedelta
 import logging
 import functools as ft
 from timeit import default_timer as timer
+from types import MappingProxyType
 from typing import Optional, List, Iterable
 
 from homeassistant.const import (
@@ -79,6 +80,12 @@ class Entity:
     # Process updates in parallel
     parallel_updates = None
 
+    # If the name, icon, entity picture, hidden, assumed state, supported
+    # features, device class and unit of measurement of the entity do not
+    # change. They are read once when the entity is added and only the state
+    # attributes are built on updates.
+    static_attributes = False
+
     # Name in the entity registry
     registry_name = None
 
@@ -89,6 +96,12 @@ class Entity:
     _context = None
     _context_set = None
 
+    # Cached attributes of an entity with static attributes, if the state
+    # needs a temperature conversion and the customization they include
+    _static_attr = None
+    _static_attr_convert = False
+    _static_attr_customize = None
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -241,6 +254,61 @@ class Entity:
             if device_attr is not None:
                 attr.update(device_attr)
 
+        if self.static_attributes:
+            # Customization is replaced when the core config is reloaded
+            if (self._static_attr is None or
+                    self._static_attr_customize is not
+                    self.hass.data.get(DATA_CUSTOMIZE)):
+                self._async_cache_static_attributes()
+
+            convert = self._static_attr_convert
+            if attr or convert:
+                attr.update(self._static_attr)
+            else:
+                # The state machine compares the shared attributes by identity
+                attr = self._static_attr
+        else:
+            self._async_add_entity_attributes(attr)
+            convert = True
+
+        end = timer()
+
+        if end - start > 0.4 and not self._slow_reported:
+            self._slow_reported = True
+            _LOGGER.warning("Updating state for %s (%s) took %.3f seconds. "
+                            "Please report platform to the developers at "
+                            "https://goo.gl/Nvioub", self.entity_id,
+                            type(self), end - start)
+
+        # Convert temperature if we detect one
+        if convert:
+            try:
+                unit_of_measure = attr.get(ATTR_UNIT_OF_MEASUREMENT)
+                units = self.hass.config.units
+                if (unit_of_measure in (TEMP_CELSIUS, TEMP_FAHRENHEIT) and
+                        unit_of_measure != units.temperature_unit):
+                    prec = len(state) - state.index('.') - 1 \
+                        if '.' in state else 0
+                    temp = units.temperature(float(state), unit_of_measure)
+                    state = str(round(temp) if prec == 0 else
+                                round(temp, prec))
+                    attr[ATTR_UNIT_OF_MEASUREMENT] = units.temperature_unit
+            except ValueError:
+                # Could not convert state to float
+                pass
+
+        if (self._context is not None and
+                dt_util.utcnow() - self._context_set >
+                self.context_recent_time):
+            self._context = None
+            self._context_set = None
+
+        self.hass.states.async_set(
+            self.entity_id, state, attr, self.force_update, self._context)
+
+    @callback
+    def _async_add_entity_attributes(self, attr):
+        """Add the attributes of the entity properties to the attributes."""
         unit_of_measurement = self.unit_of_measurement
         if unit_of_measurement is not None:
             attr[ATTR_UNIT_OF_MEASUREMENT] = unit_of_measurement
@@ -273,41 +341,25 @@ class Entity:
         if device_class is not None:
             attr[ATTR_DEVICE_CLASS] = str(device_class)
 
-        end = timer()
-
-        if end - start > 0.4 and not self._slow_reported:
-            self._slow_reported = True
-            _LOGGER.warning("Updating state for %s (%s) took %.3f seconds. "
-                            "Please report platform to the developers at "
-                            "https://goo.gl/Nvioub", self.entity_id,
-                            type(self), end - start)
-
         # Overwrite properties that have been set in the config file.
         if DATA_CUSTOMIZE in self.hass.data:
             attr.update(self.hass.data[DATA_CUSTOMIZE].get(self.entity_id))
 
-        # Convert temperature if we detect one
-        try:
-            unit_of_measure = attr.get(ATTR_UNIT_OF_MEASUREMENT)
-            units = self.hass.config.units
-            if (unit_of_measure in (TEMP_CELSIUS, TEMP_FAHRENHEIT) and
-                    unit_of_measure != units.temperature_unit):
-                prec = len(state) - state.index('.') - 1 if '.' in state else 0
-                temp = units.temperature(float(state), unit_of_measure)
-                state = str(round(temp) if prec == 0 else round(temp, prec))
-                attr[ATTR_UNIT_OF_MEASUREMENT] = units.temperature_unit
-        except ValueError:
-            # Could not convert state to float
-            pass
-
-        if (self._context is not None and
-                dt_util.utcnow() - self._context_set >
-                self.context_recent_time):
-            self._context = None
-            self._context_set = None
+    @callback
+    def _async_cache_static_attributes(self):
+        """Read the static attributes of the entity."""
+        attr = {}
+        self._async_add_entity_attributes(attr)
+        self._static_attr = MappingProxyType(attr)
+        self._static_attr_customize = self.hass.data.get(DATA_CUSTOMIZE)
+        self._static_attr_convert = (
+            attr.get(ATTR_UNIT_OF_MEASUREMENT) in
+            (TEMP_CELSIUS, TEMP_FAHRENHEIT))
 
-        self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update, self._context)
+    @callback
+    def async_reset_static_attributes(self):
+        """Read the static attributes again on the next update."""
+        self._static_attr = None
 
     def schedule_update_ha_state(self, force_refresh=False):
         """Schedule an update ha state change task.
@@ -376,6 +428,7 @@ class Entity:
     def async_registry_updated(self, old, new):
         """Handle entity registry update."""
         self.registry_name = new.name
+        self.async_reset_static_attributes()
 
         if new.entity_id == self.entity_id:
             self.async_schedule_update_ha_state()
@@ -1,7 +1,6 @@
 """Helpers for components that manage entities."""
 import asyncio
 from datetime import timedelta
-from itertools import chain
 
 from homeassistant import config as conf_util
 from homeassistant.setup import async_prepare_setup_platform
@@ -39,6 +38,8 @@ class EntityComponent:
 
         self.config = None
 
+        # Entities of all platforms by entity id
+        self._entities = {}
         self._platforms = {
             domain: self._async_init_entity_platform(domain, None)
         }
@@ -48,16 +49,11 @@ class EntityComponent:
     @property
     def entities(self):
         """Return an iterable that returns all entities."""
-        return chain.from_iterable(platform.entities.values() for platform
-                                   in self._platforms.values())
+        return self._entities.values()
 
     def get_entity(self, entity_id):
         """Get an entity."""
-        for platform in self._platforms.values():
-            entity = platform.entities.get(entity_id)
-            if entity is not None:
-                return entity
-        return None
+        return self._entities.get(entity_id)
 
     def setup(self, config):
         """Set up a full entity component.
@@ -138,9 +134,15 @@ class EntityComponent:
         if ATTR_ENTITY_ID not in service.data:
             return [entity for entity in self.entities if entity.available]
 
-        entity_ids = set(extract_entity_ids(self.hass, service, expand_group))
-        return [entity for entity in self.entities
-                if entity.available and entity.entity_id in entity_ids]
+        entities = []
+        found = set()
+        for entity_id in extract_entity_ids(self.hass, service, expand_group):
+            entity = self._entities.get(entity_id)
+            if entity is not None and entity.available and \
+                    entity_id not in found:
+                found.add(entity_id)
+                entities.append(entity)
+        return entities
 
     @callback
     def async_register_entity_service(self, name, schema, func):
@@ -261,4 +263,5 @@ class EntityComponent:
             scan_interval=scan_interval,
             entity_namespace=entity_namespace,
             async_entities_added_callback=self._async_update_group,
+            domain_entities=self._entities,
         )
@@ -19,7 +19,7 @@ class EntityPlatform:
 
     def __init__(self, *, hass, logger, domain, platform_name, platform,
                  scan_interval, entity_namespace,
-                 async_entities_added_callback):
+                 async_entities_added_callback, domain_entities=None):
         """Initialize the entity platform.
 
         hass: HomeAssistant
@@ -30,6 +30,7 @@ class EntityPlatform:
         parallel_updates: int
         entity_namespace: str
         async_entities_added_callback: @callback method
+        domain_entities: dict shared by the platforms of the domain
         """
         self.hass = hass
         self.logger = logger
@@ -41,6 +42,9 @@ class EntityPlatform:
         self.async_entities_added_callback = async_entities_added_callback
         self.config_entry = None
         self.entities = {}
+        # Entities of all platforms of the domain by entity id
+        self.domain_entities = \
+            {} if domain_entities is None else domain_entities
         self._tasks = []
         # Method to cancel the state change listener
         self._async_unsub_polling = None
@@ -339,6 +343,7 @@ class EntityPlatform:
                 msg)
 
         self.entities[entity.entity_id] = entity
+        self.domain_entities[entity.entity_id] = entity
         component_entities.add(entity.entity_id)
 
         if hasattr(entity, 'async_added_to_hass'):
@@ -381,6 +386,7 @@ class EntityPlatform:
     async def _async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         entity = self.entities.pop(entity_id)
+        self.domain_entities.pop(entity_id, None)
 
         if hasattr(entity, 'async_will_remove_from_hass'):
             await entity.async_will_remove_from_hass()
@@ -5,7 +5,8 @@ identified by their domain, platform and a unique id provided by that platform.
 
 The Entity Registry will persist itself 10 seconds after a new entity is
 registered. Registering a new entity while a timer is in progress resets the
-timer.
+timer. Once the registry file has been written, new and changed entities are
+appended to its journal instead.
 """
 from collections import OrderedDict
 from itertools import chain
@@ -15,6 +16,7 @@ import weakref
 import attr
 
 from homeassistant.core import callback, split_entity_id, valid_entity_id
+from homeassistant.helpers.storage import journal_remove, journal_set
 from homeassistant.loader import bind_hass
 from homeassistant.util import ensure_unique_string, slugify
 from homeassistant.util.yaml import load_yaml
@@ -78,7 +80,8 @@ class EntityRegistry:
         """Initialize the registry."""
         self.hass = hass
         self.entities = None
-        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
+        self._store = hass.helpers.storage.Store(
+            STORAGE_VERSION, STORAGE_KEY, journal=True)
 
     @callback
     def async_is_registered(self, entity_id):
@@ -130,7 +133,8 @@ class EntityRegistry:
         self.entities[entity_id] = entity
         _LOGGER.info('Registered new %s.%s entity: %s',
                      domain, platform, entity_id)
-        self.async_schedule_save()
+        self.async_schedule_save([journal_set(
+            'entities', 'entity_id', _entry_to_dict(entity))])
         return entity
 
     @callback
@@ -195,7 +199,13 @@ class EntityRegistry:
         for ref in to_remove:
             new.update_listeners.remove(ref)
 
-        self.async_schedule_save()
+        records = []
+        if new.entity_id != old.entity_id:
+            records.append(
+                journal_remove('entities', 'entity_id', old.entity_id))
+        records.append(journal_set('entities', 'entity_id',
+                                   _entry_to_dict(new)))
+        self.async_schedule_save(records)
 
         return new
 
@@ -223,9 +233,16 @@ class EntityRegistry:
         self.entities = entities
 
     @callback
-    def async_schedule_save(self):
-        """Schedule saving the entity registry."""
-        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+    def async_schedule_save(self, records=None):
+        """Schedule saving the entity registry.
+
+        Changed entities are saved to the journal if records are given.
+        """
+        if records is None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        else:
+            self._store.async_journal_save(
+                self._data_to_save, records, SAVE_DELAY)
 
     @callback
     def _data_to_save(self):
@@ -233,15 +250,7 @@ class EntityRegistry:
         data = {}
 
         data['entities'] = [
-            {
-                'entity_id': entry.entity_id,
-                'config_entry_id': entry.config_entry_id,
-                'device_id': entry.device_id,
-                'unique_id': entry.unique_id,
-                'platform': entry.platform,
-                'name': entry.name,
-                'disabled_by': entry.disabled_by,
-            } for entry in self.entities.values()
+            _entry_to_dict(entry) for entry in self.entities.values()
         ]
 
         return data
@@ -254,6 +263,19 @@ class EntityRegistry:
                 self._async_update_entity(entity_id, config_entry_id=None)
 
 
+def _entry_to_dict(entry):
+    """Return the stored data of a registry entry."""
+    return {
+        'entity_id': entry.entity_id,
+        'config_entry_id': entry.config_entry_id,
+        'device_id': entry.device_id,
+        'unique_id': entry.unique_id,
+        'platform': entry.platform,
+        'name': entry.name,
+        'disabled_by': entry.disabled_by,
+    }
+
+
 @bind_hass
 async def async_get_registry(hass) -> EntityRegistry:
     """Return entity registry instance."""
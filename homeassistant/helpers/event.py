@@ -1,6 +1,8 @@
 """Helpers for listening to events."""
-from datetime import timedelta
+from datetime import datetime, timedelta
 import functools as ft
+import heapq
+import logging
 
 from homeassistant.loader import bind_hass
 from homeassistant.helpers.sun import get_astral_event_next
@@ -10,6 +12,14 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async_ import run_callback_threadsafe
 
+_LOGGER = logging.getLogger(__name__)
+
+DATA_STATE_CHANGE_DISPATCHER = 'state_change_dispatcher'
+DATA_TIMER_SCHEDULER = 'timer_scheduler'
+
+# Number of years searched for the next match of a time pattern
+MAX_PATTERN_YEARS = 100
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -58,15 +68,11 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
     elif isinstance(entity_ids, str):
         entity_ids = (entity_ids.lower(),)
     else:
-        entity_ids = tuple(entity_id.lower() for entity_id in entity_ids)
+        entity_ids = tuple(set(entity_id.lower() for entity_id in entity_ids))
 
     @callback
     def state_change_listener(event):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and \
-           event.data.get('entity_id') not in entity_ids:
-            return
-
         old_state = event.data.get('old_state')
         if old_state is not None:
             old_state = old_state.state
@@ -80,7 +86,15 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
                                event.data.get('old_state'),
                                event.data.get('new_state'))
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    dispatcher = _async_get_state_change_dispatcher(hass)
+    dispatcher.async_add(entity_ids, state_change_listener)
+
+    @callback
+    def remove_listener():
+        """Remove state change listener."""
+        dispatcher.async_remove(entity_ids, state_change_listener)
+
+    return remove_listener
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
@@ -89,17 +103,56 @@ track_state_change = threaded_listener_factory(async_track_state_change)
 @callback
 @bind_hass
 def async_track_template(hass, template, action, variables=None):
-    """Add a listener that track state changes with template condition."""
-    from . import condition
+    """Add a listener that track state changes with template condition.
 
+    The template is rendered again when an entity changes that it read
+    during the previous render.
+    """
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
+    render_info = None
+    unsub = None
+
+    @callback
+    def async_track_render_info(new_render_info):
+        """Listen for changes of the states read by a render."""
+        nonlocal render_info, unsub
+
+        # Keep listening to the same states when the render failed
+        if new_render_info.exception is not None and render_info is not None:
+            return
+
+        if render_info is not None and unsub is not None and \
+                _render_info_tracks(render_info) == \
+                _render_info_tracks(new_render_info):
+            render_info = new_render_info
+            return
+
+        if unsub is not None:
+            unsub()  # pylint: disable=not-callable
+
+        render_info = new_render_info
+        unsub = async_track_state_change(
+            hass, _render_info_tracks(render_info),
+            template_condition_listener)
 
     @callback
     def template_condition_listener(entity_id, from_s, to_s):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        if (render_info.entities or render_info.domains) and \
+                not render_info.filter(entity_id):
+            return
+
+        new_render_info = template.async_render_to_info(variables)
+        async_track_render_info(new_render_info)
+
+        if new_render_info.exception is not None:
+            _LOGGER.error("Error during template condition: %s",
+                          new_render_info.exception)
+            template_result = False
+        else:
+            template_result = new_render_info.result.lower() == 'true'
 
         # Check to see if template returns true
         if template_result and not already_triggered:
@@ -108,9 +161,14 @@ def async_track_template(hass, template, action, variables=None):
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables),
-        template_condition_listener)
+    async_track_render_info(template.async_render_to_info(variables))
+
+    @callback
+    def remove_listener():
+        """Remove the template listener."""
+        unsub()  # pylint: disable=not-callable
+
+    return remove_listener
 
 
 track_template = threaded_listener_factory(async_track_template)
@@ -191,28 +249,8 @@ def async_track_point_in_utc_time(hass, action, point_in_time):
     # Ensure point_in_time is UTC
     point_in_time = dt_util.as_utc(point_in_time)
 
-    @callback
-    def point_in_time_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if now < point_in_time or hasattr(point_in_time_listener, 'run'):
-            return
-
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        point_in_time_listener.run = True
-        async_unsub()
-
-        hass.async_run_job(action, now)
-
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                        point_in_time_listener)
-
-    return async_unsub
+    return _async_get_timer_scheduler(hass).async_schedule(
+        point_in_time, action)
 
 
 track_point_in_utc_time = threaded_listener_factory(
@@ -336,26 +374,46 @@ def async_track_utc_time_change(hass, action, year=None, month=None, day=None,
 
         return hass.bus.async_listen(EVENT_TIME_CHANGED, time_change_listener)
 
-    pmp = _process_time_match
-    year, month, day = pmp(year), pmp(month), pmp(day)
-    hour, minute, second = pmp(hour), pmp(minute), pmp(second)
+    pattern = _TimePattern(year, month, day, hour, minute, second, local)
+    scheduler = _async_get_timer_scheduler(hass)
+    remove_timer = None
 
     @callback
-    def pattern_time_change_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
+    def schedule(point_in_time):
+        """Schedule the first match at or after point_in_time."""
+        nonlocal remove_timer
+        if remove_timer is not None:
+            remove_timer()  # pylint: disable=not-callable
+
+        next_time = pattern.next_time(point_in_time)
+        if next_time is None:
+            remove_timer = None
+        else:
+            remove_timer = scheduler.async_schedule(
+                next_time, pattern_time_change_listener)
 
-        if local:
-            now = dt_util.as_local(now)
+    @callback
+    def pattern_time_change_listener(now):
+        """Run the action if the time matches and schedule the next match."""
+        schedule(now.replace(microsecond=0) + timedelta(seconds=1))
 
-        # pylint: disable=too-many-boolean-expressions
-        if second(now.second) and minute(now.minute) and hour(now.hour) and \
-           day(now.day) and month(now.month) and year(now.year):
+        # The scheduled time is never later than the next match, the match
+        # is checked against the time of the time_changed event.
+        if pattern.matches(now):
+            hass.async_run_job(
+                action, dt_util.as_local(now) if local else now)
 
-            hass.async_run_job(action, now)
+    remove_clock_listener = scheduler.async_listen_clock_set_back(schedule)
+    schedule(scheduler.last_now)
 
-    return hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                 pattern_time_change_listener)
+    @callback
+    def remove_listener():
+        """Remove the time pattern listener."""
+        remove_clock_listener()
+        if remove_timer is not None:
+            remove_timer()  # pylint: disable=not-callable
+
+    return remove_listener
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
@@ -373,6 +431,377 @@ def async_track_time_change(hass, action, year=None, month=None, day=None,
 track_time_change = threaded_listener_factory(async_track_time_change)
 
 
+class _StateChangeDispatcher:
+    """Dispatch state changes to the listeners of the changed entity.
+
+    A single state_changed listener is registered on the bus for all
+    listeners, which are looked up by entity id. Listeners that track all
+    entities are kept apart and receive every state change.
+    """
+
+    def __init__(self, hass):
+        """Initialize the dispatcher."""
+        self.hass = hass
+        # Listeners are stored in tuples that are replaced on every change,
+        # so a dispatch is not affected by listeners that are removed by
+        # the listeners it calls.
+        self.listeners = {}
+        self.match_all_listeners = ()
+        self._unsub = None
+
+    @callback
+    def async_add(self, entity_ids, listener):
+        """Add a listener for entity ids or MATCH_ALL."""
+        if entity_ids == MATCH_ALL:
+            self.match_all_listeners += (listener,)
+        else:
+            for entity_id in entity_ids:
+                self.listeners[entity_id] = \
+                    self.listeners.get(entity_id, ()) + (listener,)
+
+        if self._unsub is None:
+            self._unsub = self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_dispatch)
+
+    @callback
+    def async_remove(self, entity_ids, listener):
+        """Remove a listener for entity ids or MATCH_ALL."""
+        try:
+            if entity_ids == MATCH_ALL:
+                self.match_all_listeners = _tuple_without(
+                    self.match_all_listeners, listener)
+            else:
+                for entity_id in entity_ids:
+                    listeners = _tuple_without(
+                        self.listeners[entity_id], listener)
+                    if listeners:
+                        self.listeners[entity_id] = listeners
+                    else:
+                        self.listeners.pop(entity_id)
+        except (KeyError, ValueError):
+            _LOGGER.warning("Unable to remove unknown state change listener")
+            return
+
+        if not self.listeners and not self.match_all_listeners and \
+           self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_dispatch(self, event):
+        """Call the listeners of the changed entity."""
+        entity_id = event.data.get('entity_id')
+
+        for listener in self.listeners.get(entity_id, ()):
+            self._async_call(listener, event)
+
+        for listener in self.match_all_listeners:
+            self._async_call(listener, event)
+
+    @staticmethod
+    def _async_call(listener, event):
+        """Call a listener without affecting the other listeners."""
+        # pylint: disable=broad-except
+        try:
+            listener(event)
+        except Exception:
+            _LOGGER.exception("Error handling state change of %s",
+                              event.data.get('entity_id'))
+
+
+def _render_info_tracks(render_info):
+    """Return the entity ids to listen to for the states a render read.
+
+    Templates that read all states or the states of a domain, or that did
+    not read any state, listen to all state changes.
+    """
+    if render_info.all_states or render_info.domains or \
+            not render_info.entities:
+        return MATCH_ALL
+    return sorted(render_info.entities)
+
+
+@callback
+def _async_get_state_change_dispatcher(hass):
+    """Return the state change dispatcher of a hass instance."""
+    dispatcher = hass.data.get(DATA_STATE_CHANGE_DISPATCHER)
+
+    if dispatcher is None:
+        dispatcher = hass.data[DATA_STATE_CHANGE_DISPATCHER] = \
+            _StateChangeDispatcher(hass)
+
+    return dispatcher
+
+
+class _TimerScheduler:
+    """Run the listeners of points in time when they are due.
+
+    Pending points in time are kept in a heap that is drained by a single
+    time_changed listener, so a pending timer costs nothing until it is due.
+    """
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self.hass = hass
+        # Heap of [point_in_time, sequence, action] entries. Removed timers
+        # keep their entry with the action set to None until they are popped
+        # or the heap is compacted.
+        self.timers = []
+        self.last_now = dt_util.utcnow()
+        self._clock_listeners = []
+        self._sequence = 0
+        self._removed = 0
+        self._unsub = None
+
+    @callback
+    def async_schedule(self, point_in_time, action):
+        """Schedule an action and return a function that removes it."""
+        self._sequence += 1
+        entry = [point_in_time, self._sequence, action]
+        heapq.heappush(self.timers, entry)
+        self._async_start()
+
+        @callback
+        def remove_listener():
+            """Remove the scheduled action."""
+            if entry[2] is None:
+                return
+
+            entry[2] = None
+            self._removed += 1
+
+            if self._removed > len(self.timers) // 2:
+                self._async_compact()
+
+        return remove_listener
+
+    @callback
+    def async_listen_clock_set_back(self, listener):
+        """Call a listener with the new time when the clock is set back.
+
+        Schedules that are computed ahead use this to recompute the next
+        point in time. Returns a function that removes the listener.
+        """
+        self._async_start()
+        self._clock_listeners.append(listener)
+
+        @callback
+        def remove_listener():
+            """Remove the clock listener."""
+            if listener not in self._clock_listeners:
+                return
+
+            self._clock_listeners.remove(listener)
+
+            if not self.timers and not self._clock_listeners:
+                self._async_stop()
+
+        return remove_listener
+
+    @callback
+    def _async_compact(self):
+        """Drop the entries of removed timers from the heap."""
+        self.timers = [entry for entry in self.timers if entry[2] is not None]
+        heapq.heapify(self.timers)
+        self._removed = 0
+
+        if not self.timers and not self._clock_listeners:
+            self._async_stop()
+
+    @callback
+    def _async_start(self):
+        """Start listening for time changes."""
+        if self._unsub is None:
+            self.last_now = dt_util.utcnow()
+            self._unsub = self.hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed)
+
+    @callback
+    def _async_stop(self):
+        """Stop listening for time changes."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_time_changed(self, event):
+        """Run the actions that are due."""
+        now = event.data[ATTR_NOW]
+        if now.tzinfo is None:
+            now = dt_util.UTC.localize(now)
+
+        if now < self.last_now:
+            for listener in list(self._clock_listeners):
+                listener(now)
+        self.last_now = now
+
+        timers = self.timers
+        # Timers that the actions schedule wait for the next time change
+        last_sequence = self._sequence
+        rescheduled = []
+
+        while timers and timers[0][0] <= now:
+            entry = heapq.heappop(timers)
+            action = entry[2]
+
+            if action is None:
+                self._removed -= 1
+                continue
+
+            if entry[1] > last_sequence:
+                rescheduled.append(entry)
+                continue
+
+            # Mark the entry as done, so removing it is a noop
+            entry[2] = None
+
+            # pylint: disable=broad-except
+            try:
+                self.hass.async_run_job(action, now)
+            except Exception:
+                _LOGGER.exception("Error running timer %s", action)
+
+            # Actions can compact the heap by removing other timers
+            timers = self.timers
+
+        for entry in rescheduled:
+            heapq.heappush(timers, entry)
+
+        if not timers and not self._clock_listeners:
+            self._async_stop()
+
+
+class _TimePattern:
+    """Time pattern that computes the next point in time it matches."""
+
+    def __init__(self, year, month, day, hour, minute, second, local):
+        """Compile the pattern."""
+        self.year = _process_time_match(year)
+        self.months = _time_match_values(month, range(1, 13))
+        self.days = _time_match_values(day, range(1, 32))
+        self.hours = _time_match_values(hour, range(24))
+        self.minutes = _time_match_values(minute, range(60))
+        self.seconds = _time_match_values(second, range(60))
+        self.local = local
+
+    def _wall_time(self, point_in_time):
+        """Return the time the pattern is matched against."""
+        if self.local:
+            return dt_util.as_local(point_in_time)
+        return dt_util.as_utc(point_in_time)
+
+    def matches(self, point_in_time):
+        """Return if a point in time matches the pattern."""
+        now = self._wall_time(point_in_time)
+
+        # pylint: disable=too-many-boolean-expressions
+        return (now.second in self.seconds and now.minute in self.minutes and
+                now.hour in self.hours and now.day in self.days and
+                now.month in self.months and self.year(now.year))
+
+    def next_time(self, point_in_time):
+        """Return the first match at or after the second of point_in_time.
+
+        Returns None when the pattern does not match within the next
+        MAX_PATTERN_YEARS years.
+        """
+        if not (self.months and self.days and self.hours and self.minutes and
+                self.seconds):
+            return None
+
+        start = dt_util.as_utc(point_in_time).replace(microsecond=0)
+        last_year = start.year + MAX_PATTERN_YEARS + 1
+
+        if not self.local:
+            now = self._next_wall_time(start.replace(tzinfo=None), last_year)
+            return None if now is None else now.replace(tzinfo=dt_util.UTC)
+
+        local_start = dt_util.as_local(start)
+        wall_start = local_start.replace(tzinfo=None)
+        next_time = self._next_local_time(
+            wall_start, start, (True, False), last_year)
+
+        if next_time is None:
+            return None
+
+        # When the clock is set back before the next match, the wall clock
+        # times just before the start occur once more.
+        setback = local_start.utcoffset() - \
+            dt_util.as_local(next_time).utcoffset()
+
+        if setback > timedelta(0):
+            repeated_time = self._next_local_time(
+                wall_start - setback, start, (False,), last_year, wall_start)
+            if repeated_time is not None and repeated_time < next_time:
+                return repeated_time
+
+        return next_time
+
+    def _next_local_time(self, now, start, dst_options, last_year,
+                         end=None):
+        """Return the first match at or after start in UTC.
+
+        Searches the local wall clock times from now until end. Times that
+        are skipped or repeated by a DST change resolve to the earliest UTC
+        time that is not before the start, so the next match is never
+        missed.
+        """
+        while True:
+            now = self._next_wall_time(now, last_year)
+
+            if now is None or (end is not None and now >= end):
+                return None
+
+            for is_dst in dst_options:
+                next_time = dt_util.as_utc(
+                    dt_util.DEFAULT_TIME_ZONE.localize(now, is_dst=is_dst))
+                if next_time >= start:
+                    return next_time
+
+            now += timedelta(seconds=1)
+
+    def _next_wall_time(self, now, last_year):
+        """Return the first naive time at or after now that matches."""
+        while now.year < last_year:
+            if not self.year(now.year):
+                now = datetime(now.year + 1, 1, 1)
+            elif now.month not in self.months:
+                if now.month == 12:
+                    now = datetime(now.year + 1, 1, 1)
+                else:
+                    now = datetime(now.year, now.month + 1, 1)
+            elif now.day not in self.days:
+                now = datetime(now.year, now.month, now.day) + \
+                    timedelta(days=1)
+            elif now.hour not in self.hours:
+                now = now.replace(minute=0, second=0) + timedelta(hours=1)
+            elif now.minute not in self.minutes:
+                now = now.replace(second=0) + timedelta(minutes=1)
+            elif now.second not in self.seconds:
+                now += timedelta(seconds=1)
+            else:
+                return now
+
+        return None
+
+
+@callback
+def _async_get_timer_scheduler(hass):
+    """Return the timer scheduler of a hass instance."""
+    scheduler = hass.data.get(DATA_TIMER_SCHEDULER)
+
+    if scheduler is None:
+        scheduler = hass.data[DATA_TIMER_SCHEDULER] = _TimerScheduler(hass)
+
+    return scheduler
+
+
+def _tuple_without(items, item):
+    """Return a tuple without the first occurrence of item."""
+    index = items.index(item)
+    return items[:index] + items[index + 1:]
+
+
 def _process_state_match(parameter):
     """Convert parameter to function that matches input against parameter."""
     if parameter is None or parameter == MATCH_ALL:
@@ -385,6 +814,12 @@ def _process_state_match(parameter):
     return lambda state: state in parameter
 
 
+def _time_match_values(parameter, values):
+    """Return the values of a time field that match the parameter."""
+    match = _process_time_match(parameter)
+    return frozenset(value for value in values if match(value))
+
+
 def _process_time_match(parameter):
     """Wrap parameter in a tuple if it is not one and returns it."""
     if parameter is None or parameter == MATCH_ALL:
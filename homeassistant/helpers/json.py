@@ -2,7 +2,13 @@
 from datetime import datetime
 import json
 import logging
-from typing import Any
+from typing import (  # noqa: F401 pylint: disable=unused-import
+    Any, Callable, Dict, List, Optional)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,3 +30,106 @@ class JSONEncoder(json.JSONEncoder):
             return o.as_dict()
 
         return json.JSONEncoder.default(self, o)
+
+
+# Placeholder for the cached JSON of an object while encoding a message
+_FRAGMENT = '\x00fragment\x00'
+
+
+def _default(value: Any) -> Any:
+    """Convert Home Assistant objects that JSON does not support."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, set):
+        return list(value)
+    if hasattr(value, 'as_dict'):
+        return value.as_dict()
+
+    raise TypeError(
+        '{} is not JSON serializable'.format(type(value).__name__))
+
+
+def _json_dumps(obj: Any, sort_keys: bool, pretty: bool,
+                default: Callable[[Any], Any]) -> str:
+    """Serialize an object with the json module of the standard library."""
+    return json.dumps(obj, sort_keys=sort_keys, default=default,
+                      indent=4 if pretty else None)
+
+
+def _orjson_dumps(obj: Any, sort_keys: bool, pretty: bool,
+                  default: Callable[[Any], Any]) -> str:
+    """Serialize an object with orjson."""
+    # pylint: disable=no-member
+    if pretty:
+        # orjson can only indent by two spaces
+        return _json_dumps(obj, sort_keys, pretty, default)
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+
+
+BACKEND_JSON = 'json'
+BACKEND_ORJSON = 'orjson'
+
+# Serializers that are available, by name
+BACKENDS = {
+    BACKEND_JSON: _json_dumps,
+}  # type: Dict[str, Callable[[Any, bool, bool, Callable[[Any], Any]], str]]
+
+if orjson is not None:
+    BACKENDS[BACKEND_ORJSON] = _orjson_dumps
+
+# Serializer used unless another one is requested
+DEFAULT_BACKEND = BACKEND_ORJSON if orjson is not None else BACKEND_JSON
+
+_ENCODED_FRAGMENTS = {
+    name: dumps(_FRAGMENT, False, False, _default)
+    for name, dumps in BACKENDS.items()
+}
+
+
+def json_dumps(obj: Any, sort_keys: bool = False, pretty: bool = False,
+               backend: Optional[str] = None) -> str:
+    """Serialize an object to JSON.
+
+    Datetimes, sets and objects with an as_dict method are supported. Objects
+    with an as_json method, like states, are encoded once and their cached
+    JSON is spliced into every message they are part of, unless the message
+    is pretty printed.
+
+    The C-accelerated orjson serializer is used when it is installed. Objects
+    it refuses to serialize are handed to the json module instead.
+    """
+    if backend is None:
+        backend = DEFAULT_BACKEND
+    fragments = []  # type: List[str]
+
+    def default(value: Any) -> Any:
+        """Replace objects with cached JSON by a placeholder."""
+        if not pretty and hasattr(value, 'as_json'):
+            fragments.append(value.as_json())
+            return _FRAGMENT
+        return _default(value)
+
+    try:
+        encoded = BACKENDS[backend](obj, sort_keys, pretty, default)
+    except TypeError:
+        if backend == BACKEND_JSON:
+            raise
+        return json_dumps(obj, sort_keys, pretty, BACKEND_JSON)
+
+    if not fragments:
+        return encoded
+
+    parts = encoded.split(_ENCODED_FRAGMENTS[backend])
+
+    # A string in the message contained the placeholder
+    if len(parts) != len(fragments) + 1:
+        return _json_dumps(obj, sort_keys, pretty, _default)
+
+    result = [parts[0]]
+    for fragment, part in zip(fragments, parts[1:]):
+        result.append(fragment)
+        result.append(part)
+    return ''.join(result)
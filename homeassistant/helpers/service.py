@@ -2,6 +2,7 @@
 import asyncio
 import logging
 from os import path
+from timeit import default_timer as timer
 
 import voluptuous as vol
 
@@ -185,13 +186,12 @@ async def async_get_all_descriptions(hass):
 async def entity_service_call(hass, platforms, func, call):
     """Handle an entity service call.
 
-    Calls all platforms simultaneously.
+    Calls all platforms and their entities simultaneously.
     """
     tasks = []
     all_entities = ATTR_ENTITY_ID not in call.data
     if not all_entities:
-        entity_ids = set(
-            extract_entity_ids(hass, call, True))
+        entity_ids = extract_entity_ids(hass, call, True)
 
     if isinstance(func, str):
         data = {key: val for key, val in call.data.items()
@@ -199,34 +199,60 @@ async def entity_service_call(hass, platforms, func, call):
     else:
         data = call
 
+    if all_entities:
+        platform_entities = [
+            list(platform.entities.values()) for platform in platforms]
+    else:
+        platform_entities = [
+            [platform.entities[entity_id] for entity_id in entity_ids
+             if entity_id in platform.entities]
+            for platform in platforms]
+
     tasks = [
-        _handle_service_platform_call(func, data, [
-            entity for entity in platform.entities.values()
-            if all_entities or entity.entity_id in entity_ids
-        ], call.context) for platform in platforms
+        _handle_service_platform_call(func, data, entities, call.context)
+        for entities in platform_entities if entities
     ]
 
     if tasks:
-        await asyncio.wait(tasks)
+        done, _ = await asyncio.wait(tasks)
+        for future in done:
+            future.result()  # pop exception if have
 
 
 async def _handle_service_platform_call(func, data, entities, context):
-    """Handle a function call."""
-    tasks = []
+    """Handle a function call for the entities of a platform.
+
+    The entities are called concurrently, limited by the parallel updates
+    of the platform.
+    """
+    tasks = [_handle_entity_call(func, data, entity, context)
+             for entity in entities if entity.available]
+
+    if tasks:
+        done, _ = await asyncio.wait(tasks)
+        for future in done:
+            future.result()  # pop exception if have
+
+
+async def _handle_entity_call(func, data, entity, context):
+    """Call a function for an entity and update its state if polled."""
+    entity.async_set_context(context)
 
-    for entity in entities:
-        if not entity.available:
-            continue
+    if entity.parallel_updates:
+        await entity.parallel_updates.acquire()
 
-        entity.async_set_context(context)
+    start = timer()
 
+    try:
         if isinstance(func, str):
             await getattr(entity, func)(**data)
         else:
             await func(entity, data)
-
-        if entity.should_poll:
-            tasks.append(entity.async_update_ha_state(True))
-
-    if tasks:
-        await asyncio.wait(tasks)
+    finally:
+        _LOGGER.debug("Service call of %s took %.3f seconds",
+                      entity.entity_id, timer() - start)
+        if entity.parallel_updates:
+            entity.parallel_updates.release()
+
+    if entity.should_poll:
+        await entity.async_update_ha_state(True)
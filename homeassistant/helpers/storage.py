@@ -1,18 +1,73 @@
 """Helper to help store data."""
 import asyncio
+from collections import OrderedDict
+from functools import partial
+from json import loads as json_loads
 import logging
 import os
-from typing import Dict, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
 from homeassistant.loader import bind_hass
 from homeassistant.util import json
 from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.json import json_dumps
 
 STORAGE_DIR = '.storage'
 _LOGGER = logging.getLogger(__name__)
 
+JOURNAL_SUFFIX = '.journal'
+# Seconds after the first journal record that the journal is compacted
+JOURNAL_COMPACT_DELAY = 600
+# Number of journal records after which the journal is compacted right away
+JOURNAL_MAX_RECORDS = 1000
+
+JOURNAL_SET = 'set'
+JOURNAL_REMOVE = 'remove'
+
+
+def journal_set(list_key: str, key: str, item: Dict) -> Dict:
+    """Return a journal record that adds or replaces an item of a list."""
+    return {
+        'op': JOURNAL_SET,
+        'list': list_key,
+        'key': key,
+        'item': item,
+    }
+
+
+def journal_remove(list_key: str, key: str, item_id: Any) -> Dict:
+    """Return a journal record that removes an item from a list."""
+    return {
+        'op': JOURNAL_REMOVE,
+        'list': list_key,
+        'key': key,
+        'id': item_id,
+    }
+
+
+def _replay_journal(data: Dict, records: List[Dict]) -> None:
+    """Apply journal records to the lists of the data."""
+    lists = {}  # type: Dict[str, OrderedDict]
+
+    for record in records:
+        list_key = record['list']
+        items = lists.get(list_key)
+
+        if items is None:
+            items = lists[list_key] = OrderedDict(
+                (item[record['key']], item)
+                for item in data.get(list_key, []))
+
+        if record['op'] == JOURNAL_SET:
+            items[record['item'][record['key']]] = record['item']
+        else:
+            items.pop(record['id'], None)
+
+    for list_key, items in lists.items():
+        data[list_key] = list(items.values())
+
 
 @bind_hass
 async def async_migrator(hass, old_path, store, *,
@@ -46,23 +101,37 @@ async def async_migrator(hass, old_path, store, *,
 class Store:
     """Class to help storing data."""
 
-    def __init__(self, hass, version: int, key: str, private: bool = False):
+    def __init__(self, hass, version: int, key: str, private: bool = False,
+                 journal: bool = False):
         """Initialize storage class."""
         self.version = version
         self.key = key
         self.hass = hass
         self._private = private
+        self._journal = journal
         self._data = None
         self._unsub_delay_listener = None
         self._unsub_stop_listener = None
         self._write_lock = asyncio.Lock(loop=hass.loop)
         self._load_task = None
+        # Id of the journal that belongs to the data file, None while the
+        # data file cannot be journaled
+        self._journal_id = None
+        self._journal_started = False
+        self._journal_pending = []  # type: List[Dict]
+        self._journal_records = 0
+        self._journal_flush = None
 
     @property
     def path(self):
         """Return the config path."""
         return self.hass.config.path(STORAGE_DIR, self.key)
 
+    @property
+    def journal_path(self):
+        """Return the path of the journal."""
+        return self.path + JOURNAL_SUFFIX
+
     async def async_load(self) -> Optional[Dict[str, Any]]:
         """Load data.
 
@@ -87,11 +156,16 @@ class Store:
             if 'data_func' in data:
                 data['data'] = data.pop('data_func')()
         else:
-            data = await self.hass.async_add_executor_job(
-                json.load_json, self.path)
+            data, journal_started = await self.hass.async_add_executor_job(
+                self._load_data)
 
             if data == {}:
                 return None
+
+            if self._journal and data['version'] == self.version:
+                self._journal_id = data.get('journal', 0)
+                self._journal_started = journal_started
+
         if data['version'] == self.version:
             stored = data['data']
         else:
@@ -132,6 +206,73 @@ class Store:
 
         self._async_ensure_stop_listener()
 
+    @callback
+    def async_journal_save(self, data_func: Callable[[], Dict],
+                           records: List[Dict],
+                           delay: Optional[int] = None):
+        """Save changes of the data as journal records.
+
+        The records, made with journal_set and journal_remove, are appended
+        to the journal right away. The data of data_func is written and the
+        journal emptied after a delay, once the journal holds too many
+        records and when Home Assistant stops.
+
+        Until the data file has been written in the current version, the
+        data is saved after the optional delay instead.
+        """
+        if self._journal_id is None:
+            self.async_delay_save(data_func, delay)
+            return
+
+        self._journal_pending.extend(records)
+        self._journal_records += len(records)
+
+        if self._journal_records >= JOURNAL_MAX_RECORDS:
+            self.async_delay_save(data_func, 0)
+        else:
+            self._data = {
+                'version': self.version,
+                'key': self.key,
+                'data_func': data_func,
+            }
+
+            if self._unsub_delay_listener is None:
+                self._unsub_delay_listener = async_call_later(
+                    self.hass, JOURNAL_COMPACT_DELAY,
+                    self._async_callback_delayed_write)
+
+            self._async_ensure_stop_listener()
+
+        self._async_schedule_journal_flush()
+
+    @callback
+    def _async_schedule_journal_flush(self):
+        """Schedule appending the pending records to the journal."""
+        if self._journal_flush is None and self._journal_pending:
+            self._journal_flush = self.hass.async_add_job(
+                self._async_flush_journal())
+
+    async def _async_flush_journal(self):
+        """Append the pending records to the journal."""
+        async with self._write_lock:
+            self._journal_flush = None
+            records = self._journal_pending
+            self._journal_pending = []
+
+            if not records or self._journal_id is None:
+                return
+
+            try:
+                await self.hass.async_add_executor_job(
+                    self._write_journal, self.journal_path, self._journal_id,
+                    records, not self._journal_started)
+            except (OSError, TypeError) as err:
+                _LOGGER.error('Error writing journal for %s: %s',
+                              self.key, err)
+                return
+
+            self._journal_started = True
+
     @callback
     def _async_ensure_stop_listener(self):
         """Ensure that we write if we quit before delay has passed."""
@@ -167,19 +308,87 @@ class Store:
 
     async def _async_handle_write_data(self, *_args):
         """Handle writing the config."""
-        data = self._data
+        async with self._write_lock:
+            data = self._data
 
-        if 'data_func' in data:
-            data['data'] = data.pop('data_func')()
+            # Written while waiting for the lock
+            if data is None:
+                return
 
-        self._data = None
+            if 'data_func' in data:
+                data['data'] = data.pop('data_func')()
+
+            self._data = None
+
+            # The data contains the changes of all pending journal records,
+            # the data file starts a new journal.
+            compacted = len(self._journal_pending)
+            if self._journal:
+                data['journal'] = (self._journal_id or 0) + 1
 
-        async with self._write_lock:
             try:
                 await self.hass.async_add_executor_job(
                     self._write_data, self.path, data)
             except (json.SerializationError, json.WriteError) as err:
                 _LOGGER.error('Error writing config for %s: %s', self.key, err)
+                self._async_schedule_journal_flush()
+                return
+
+            if self._journal:
+                del self._journal_pending[:compacted]
+                self._journal_id = data['journal']
+                self._journal_started = False
+                self._journal_records = len(self._journal_pending)
+
+    def _load_data(self):
+        """Load the data and replay its journal.
+
+        Returns the data and if its journal exists.
+        """
+        data = json.load_json(self.path)
+
+        if not data or not self._journal:
+            return data, False
+
+        records = self._load_journal(data.get('journal', 0))
+
+        if records is None:
+            return data, False
+
+        _LOGGER.debug('Replaying %s journal records for %s',
+                      len(records), self.key)
+        _replay_journal(data['data'], records)
+        return data, True
+
+    def _load_journal(self, journal_id: int) -> Optional[List[Dict]]:
+        """Load the records of the journal that belongs to the data file."""
+        try:
+            with open(self.journal_path, encoding='utf-8') as fdesc:
+                lines = fdesc.read().split('\n')
+        except FileNotFoundError:
+            return None
+        except OSError as err:
+            _LOGGER.error('Error reading journal for %s: %s', self.key, err)
+            return None
+
+        records = []
+        for line in lines:
+            if not line:
+                continue
+
+            try:
+                records.append(json_loads(line))
+            except ValueError:
+                # A write that was interrupted by a crash
+                _LOGGER.warning('Ignoring incomplete journal record for %s',
+                                self.key)
+
+        # A journal that was left behind when the data file was written
+        if not records or records[0] != {'journal': journal_id}:
+            _LOGGER.debug('Ignoring outdated journal for %s', self.key)
+            return None
+
+        return records[1:]
 
     def _write_data(self, path: str, data: Dict):
         """Write the data."""
@@ -187,7 +396,37 @@ class Store:
             os.makedirs(os.path.dirname(path))
 
         _LOGGER.debug('Writing data for %s', self.key)
-        json.save_json(path, data, self._private)
+        json.save_json(path, data, self._private,
+                       partial(json_dumps, sort_keys=True, pretty=True))
+
+        if self._journal and os.path.isfile(path + JOURNAL_SUFFIX):
+            try:
+                os.remove(path + JOURNAL_SUFFIX)
+            except OSError as err:
+                _LOGGER.warning('Error removing journal for %s: %s',
+                                self.key, err)
+
+    def _write_journal(self, path: str, journal_id: int,
+                       records: List[Dict], start: bool):
+        """Append records to the journal.
+
+        Each record is written on a line of its own, even if the previous
+        write was interrupted. A new journal starts with its id.
+        """
+        lines = [json_dumps(record) for record in records]
+
+        if start:
+            lines.insert(0, json_dumps({'journal': journal_id}))
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        else:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+
+        mode = 0o600 if self._private else 0o644
+        with open(os.open(path, flags, mode), 'w',
+                  encoding='utf-8') as fdesc:
+            fdesc.write(''.join('\n' + line for line in lines))
+            fdesc.flush()
+            os.fsync(fdesc.fileno())
 
     async def _async_migrate_func(self, old_version, old_data):
         """Migrate to the new version."""
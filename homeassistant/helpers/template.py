@@ -1,5 +1,7 @@
 """Template helper methods for rendering strings with Home Assistant data."""
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 import json
 import logging
 import math
@@ -7,13 +9,13 @@ import random
 import re
 
 import jinja2
-from jinja2 import contextfilter
+from jinja2 import contextfilter, meta, nodes
 from jinja2.sandbox import ImmutableSandboxedEnvironment
 
 from homeassistant.const import (
     ATTR_LATITUDE, ATTR_LONGITUDE, ATTR_UNIT_OF_MEASUREMENT, MATCH_ALL,
     STATE_UNKNOWN)
-from homeassistant.core import State, valid_entity_id
+from homeassistant.core import State, split_entity_id, valid_entity_id
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
 from homeassistant.loader import bind_hass
@@ -26,6 +28,24 @@ _LOGGER = logging.getLogger(__name__)
 _SENTINEL = object()
 DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Key in hass.data of the RenderInfo of the template that is being rendered
+_RENDER_INFO = 'template.render_info'
+# Key in hass.data of the templates bound to the hass instance
+_BOUND_TEMPLATES = 'template.bound_templates'
+
+# Number of compiled templates that are shared between template instances
+COMPILED_CACHE_SIZE = 1024
+# Number of bound templates that are shared per hass instance
+BOUND_CACHE_SIZE = 1024
+# Number of results remembered per template that does not read states
+RENDER_CACHE_SIZE = 64
+
+# Globals and filters whose result is not determined by the variables
+_IMPURE_GLOBALS = frozenset((
+    'closest', 'cycler', 'distance', 'is_state', 'is_state_attr', 'joiner',
+    'lipsum', 'now', 'relative_time', 'state_attr', 'states', 'utcnow'))
+_IMPURE_FILTERS = frozenset(('random',))
+
 _RE_NONE_ENTITIES = re.compile(r"distance\(|closest\(", re.I | re.M)
 _RE_GET_ENTITIES = re.compile(
     r"(?:(?:states\.|(?:is_state|is_state_attr|state_attr|states)"
@@ -82,6 +102,24 @@ def extract_entities(template, variables=None):
     return MATCH_ALL
 
 
+class RenderInfo:
+    """Result of a template render and the states it read."""
+
+    def __init__(self, template):
+        """Initialize the render info."""
+        self.template = template
+        self.result = None
+        self.exception = None
+        self.all_states = False
+        self.domains = set()
+        self.entities = set()
+
+    def filter(self, entity_id):
+        """Return if a change of an entity can change the result."""
+        return (self.all_states or entity_id in self.entities or
+                split_entity_id(entity_id)[0] in self.domains)
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
@@ -93,6 +131,7 @@ class Template:
         self.template = template
         self._compiled_code = None
         self._compiled = None
+        self._render_cache = None
         self.hass = hass
 
     def ensure_valid(self):
@@ -101,10 +140,13 @@ class Template:
             return
 
         try:
-            self._compiled_code = ENV.compile(self.template)
+            self._compiled_code, pure = _compile(self.template)
         except jinja2.exceptions.TemplateSyntaxError as err:
             raise TemplateError(err)
 
+        if pure:
+            self._render_cache = OrderedDict()
+
     def extract_entities(self, variables=None):
         """Extract all entities for state_changed listener."""
         return extract_entities(self.template, variables)
@@ -133,6 +175,31 @@ class Template:
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
+    def async_render_to_info(self, variables=None, **kwargs):
+        """Render the template and collect the states it read.
+
+        Render errors are stored in the exception of the render info.
+
+        This method must be run in the event loop.
+        """
+        assert self.hass is not None, 'hass variable not set on template'
+
+        render_info = RenderInfo(self)
+        parent_render_info = self.hass.data.get(_RENDER_INFO)
+        self.hass.data[_RENDER_INFO] = render_info
+
+        try:
+            render_info.result = self.async_render(variables, **kwargs)
+        except TemplateError as ex:
+            render_info.exception = ex
+        finally:
+            if parent_render_info is None:
+                del self.hass.data[_RENDER_INFO]
+            else:
+                self.hass.data[_RENDER_INFO] = parent_render_info
+
+        return render_info
+
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
 
@@ -148,11 +215,23 @@ class Template:
 
         If valid JSON will expose value_json too.
 
+        The result is remembered per value if the template does not read
+        states or the time.
+
         This method must be run in the event loop.
         """
         if self._compiled is None:
             self._ensure_compiled()
 
+        render_cache = self._render_cache
+        if render_cache is not None and isinstance(value, str):
+            result = render_cache.get(value)
+            if result is not None:
+                render_cache.move_to_end(value)
+                return result
+        else:
+            render_cache = None
+
         variables = {
             'value': value
         }
@@ -162,39 +241,79 @@ class Template:
             pass
 
         try:
-            return self._compiled.render(variables).strip()
+            result = self._compiled.render(variables).strip()
         except jinja2.TemplateError as ex:
             _LOGGER.error("Error parsing value: %s (value: %s, template: %s)",
                           ex, value, self.template)
             return value if error_value is _SENTINEL else error_value
 
+        if render_cache is not None:
+            render_cache[value] = result
+            if len(render_cache) > RENDER_CACHE_SIZE:
+                render_cache.popitem(last=False)
+
+        return result
+
     def _ensure_compiled(self):
         """Bind a template to a specific hass instance."""
         self.ensure_valid()
 
         assert self.hass is not None, 'hass variable not set on template'
 
-        template_methods = TemplateMethods(self.hass)
+        self._compiled = _bind(self.hass, self.template, self._compiled_code)
+
+        return self._compiled
+
+    def __eq__(self, other):
+        """Compare template with another."""
+        return (self.__class__ == other.__class__ and
+                self.template == other.template and
+                self.hass == other.hass)
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def _compile(template):
+    """Compile a template source.
+
+    Returns the compiled code and if the result of the template only depends
+    on its variables.
+    """
+    source = ENV.parse(template)
+    pure = not (meta.find_undeclared_variables(source) & _IMPURE_GLOBALS or
+                any(node.name in _IMPURE_FILTERS
+                    for node in source.find_all(nodes.Filter)))
+    return ENV.compile(source), pure
+
+
+def _bind(hass, template, compiled_code):
+    """Return the template bound to the globals of a hass instance."""
+    bound_templates = hass.data.get(_BOUND_TEMPLATES)
 
+    if bound_templates is None:
+        template_methods = TemplateMethods(hass)
         global_vars = ENV.make_globals({
             'closest': template_methods.closest,
             'distance': template_methods.distance,
-            'is_state': self.hass.states.is_state,
+            'is_state': template_methods.is_state,
             'is_state_attr': template_methods.is_state_attr,
             'state_attr': template_methods.state_attr,
-            'states': AllStates(self.hass),
+            'states': AllStates(hass),
         })
+        bound_templates = hass.data[_BOUND_TEMPLATES] = \
+            (global_vars, OrderedDict())
 
-        self._compiled = jinja2.Template.from_code(
-            ENV, self._compiled_code, global_vars, None)
+    global_vars, templates = bound_templates
+    compiled = templates.get(template)
 
-        return self._compiled
+    if compiled is None:
+        compiled = templates[template] = jinja2.Template.from_code(
+            ENV, compiled_code, global_vars, None)
+        if len(templates) > BOUND_CACHE_SIZE:
+            templates.popitem(last=False)
+    else:
+        templates.move_to_end(template)
 
-    def __eq__(self, other):
-        """Compare template with another."""
-        return (self.__class__ == other.__class__ and
-                self.template == other.template and
-                self.hass == other.hass)
+    return compiled
 
 
 class AllStates:
@@ -210,6 +329,7 @@ class AllStates:
 
     def __iter__(self):
         """Return all states."""
+        _collect_all_states(self._hass)
         return iter(
             _wrap_state(state) for state in
             sorted(self._hass.states.async_all(),
@@ -217,11 +337,12 @@ class AllStates:
 
     def __len__(self):
         """Return number of states."""
+        _collect_all_states(self._hass)
         return len(self._hass.states.async_entity_ids())
 
     def __call__(self, entity_id):
         """Return the states."""
-        state = self._hass.states.get(entity_id)
+        state = _get_state(self._hass, entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
 
@@ -236,10 +357,11 @@ class DomainStates:
     def __getattr__(self, name):
         """Return the states."""
         return _wrap_state(
-            self._hass.states.get('{}.{}'.format(self._domain, name)))
+            _get_state(self._hass, '{}.{}'.format(self._domain, name)))
 
     def __iter__(self):
         """Return the iteration over all the states."""
+        _collect_domain(self._hass, self._domain)
         return iter(sorted(
             (_wrap_state(state) for state in self._hass.states.async_all()
              if state.domain == self._domain),
@@ -247,6 +369,7 @@ class DomainStates:
 
     def __len__(self):
         """Return number of states."""
+        _collect_domain(self._hass, self._domain)
         return len(self._hass.states.async_entity_ids(self._domain))
 
 
@@ -285,6 +408,28 @@ def _wrap_state(state):
     return None if state is None else TemplateState(state)
 
 
+def _get_state(hass, entity_id):
+    """Return a state and collect the entity for the render info."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.entities.add(entity_id.lower())
+    return hass.states.get(entity_id)
+
+
+def _collect_domain(hass, domain):
+    """Collect a domain for the render info."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.domains.add(domain)
+
+
+def _collect_all_states(hass):
+    """Collect that all states were read for the render info."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.all_states = True
+
+
 class TemplateMethods:
     """Class to expose helpers to templates."""
 
@@ -350,6 +495,8 @@ class TemplateMethods:
 
             group = self._hass.components.group
 
+            # Expanding reads the states of the groups
+            _collect_all_states(self._hass)
             states = [self._hass.states.get(entity_id) for entity_id
                       in group.expand_entity_ids([gr_entity_id])]
 
@@ -403,6 +550,11 @@ class TemplateMethods:
         return self._hass.config.units.length(
             loc_util.distance(*locations[0] + locations[1]), 'm')
 
+    def is_state(self, entity_id, state):
+        """Test if a state is a specific value."""
+        state_obj = _get_state(self._hass, entity_id)
+        return state_obj is not None and state_obj.state == state
+
     def is_state_attr(self, entity_id, name, value):
         """Test if a state is a specific attribute."""
         state_attr = self.state_attr(entity_id, name)
@@ -410,7 +562,7 @@ class TemplateMethods:
 
     def state_attr(self, entity_id, name):
         """Get a specific attribute from a state."""
-        state_obj = self._hass.states.get(entity_id)
+        state_obj = _get_state(self._hass, entity_id)
         if state_obj is not None:
             return state_obj.attributes.get(name)
         return None
@@ -420,7 +572,7 @@ class TemplateMethods:
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         if isinstance(entity_id_or_state, str):
-            return self._hass.states.get(entity_id_or_state)
+            return _get_state(self._hass, entity_id_or_state)
         return None
 
 
@@ -12,10 +12,13 @@ available it will check the built-in components and platforms.
 """
 import functools as ft
 import importlib
+import json
 import logging
+import os
+import pkgutil
 import sys
 from types import ModuleType
-from typing import Optional, Set, TYPE_CHECKING, Callable, Any, TypeVar  # noqa pylint: disable=unused-import
+from typing import Optional, Set, TYPE_CHECKING, Callable, Any, TypeVar, List, Dict  # noqa pylint: disable=unused-import
 
 from homeassistant.const import PLATFORM_FORMAT
 from homeassistant.util import OrderedSet
@@ -35,8 +38,11 @@ _LOGGER = logging.getLogger(__name__)
 
 
 DATA_KEY = 'components'
+DATA_MANIFEST_INDEX = 'manifest_index'
+DATA_CUSTOM_COMPONENTS = 'custom_component_names'
 PATH_CUSTOM_COMPONENTS = 'custom_components'
 PACKAGE_COMPONENTS = 'homeassistant.components'
+MANIFEST_INDEX = 'manifest_index.json'
 
 
 def set_component(hass,  # type: HomeAssistant
@@ -60,6 +66,26 @@ def get_platform(hass,  # type: HomeAssistant
     return get_component(hass, PLATFORM_FORMAT.format(domain, platform))
 
 
+def get_component_cache(hass  # type: HomeAssistant
+                        ) -> Optional[Dict[str, Optional[ModuleType]]]:
+    """Return the cache of loaded components, creating it on first use.
+
+    Creating the cache adds the config dir to the module search path, so
+    it is done once before components are imported in multiple threads.
+    Async friendly.
+    """
+    cache = hass.data.get(DATA_KEY)
+    if cache is None:
+        if hass.config.config_dir is None:
+            _LOGGER.error("Can't load components - config dir is not set")
+            return None
+        # Only insert if it's not there (happens during tests)
+        if sys.path[0] != hass.config.config_dir:
+            sys.path.insert(0, hass.config.config_dir)
+        cache = hass.data[DATA_KEY] = {}
+    return cache
+
+
 def get_component(hass,  # type: HomeAssistant
                   comp_or_platform: str) -> Optional[ModuleType]:
     """Try to load specified component.
@@ -73,15 +99,9 @@ def get_component(hass,  # type: HomeAssistant
     except KeyError:
         pass
 
-    cache = hass.data.get(DATA_KEY)
+    cache = get_component_cache(hass)
     if cache is None:
-        if hass.config.config_dir is None:
-            _LOGGER.error("Can't load components - config dir is not set")
-            return None
-        # Only insert if it's not there (happens during tests)
-        if sys.path[0] != hass.config.config_dir:
-            sys.path.insert(0, hass.config.config_dir)
-        cache = hass.data[DATA_KEY] = {}
+        return None
 
     # First check custom, then built-in
     potential_paths = ['custom_components.{}'.format(comp_or_platform),
@@ -139,6 +159,111 @@ def get_component(hass,  # type: HomeAssistant
     return None
 
 
+class Manifest:
+    """Dependencies and requirements of a component or platform."""
+
+    def __init__(self, name: str, dependencies: Optional[List[str]] = None,
+                 requirements: Optional[List[str]] = None) -> None:
+        """Initialize the manifest."""
+        self.name = name
+        self.dependencies = dependencies or []
+        self.requirements = requirements or []
+
+    @classmethod
+    def from_module(cls, name: str, module: Any) -> 'Manifest':
+        """Create the manifest of an imported module."""
+        return cls(name, list(getattr(module, 'DEPENDENCIES', [])),
+                   list(getattr(module, 'REQUIREMENTS', [])))
+
+
+def load_manifest_index(hass):  # type: (HomeAssistant) -> None
+    """Load the manifest index and find the custom components.
+
+    Both are read once and kept in hass.data for get_manifest.
+    This method must be run in the executor.
+    """
+    try:
+        # Read as package data, the index ships with the components
+        data = pkgutil.get_data(PACKAGE_COMPONENTS, MANIFEST_INDEX)
+        if data is None:
+            raise OSError("Package data of {} can't be read".format(
+                PACKAGE_COMPONENTS))
+        index = json.loads(data.decode('utf-8'))
+    except (OSError, ValueError) as err:
+        _LOGGER.warning("Unable to load the manifest index, components will "
+                        "be imported to resolve dependencies: %s", err)
+        index = {}
+
+    custom = set()  # type: Set[str]
+
+    if hass.config.config_dir is not None:
+        _find_custom_components(os.path.join(
+            hass.config.config_dir, PATH_CUSTOM_COMPONENTS), '', custom)
+
+    hass.data[DATA_CUSTOM_COMPONENTS] = custom
+    hass.data[DATA_MANIFEST_INDEX] = index
+
+
+def _find_custom_components(path: str, prefix: str, found: Set[str]) -> None:
+    """Add the names of the modules in a custom components folder."""
+    try:
+        entries = os.listdir(path)
+    except OSError:
+        return
+
+    for entry in entries:
+        entry_path = os.path.join(path, entry)
+
+        if entry.endswith('.py'):
+            if entry != '__init__.py':
+                found.add(prefix + entry[:-3])
+        elif not entry.startswith(('.', '_')) and os.path.isdir(entry_path):
+            if os.path.isfile(os.path.join(entry_path, '__init__.py')):
+                found.add(prefix + entry)
+            # Platforms are in the folder of their component
+            if not prefix:
+                _find_custom_components(entry_path, entry + '.', found)
+
+
+def get_manifest(hass,  # type: HomeAssistant
+                 comp_or_platform: str,
+                 load_module: bool = True) -> Optional[Manifest]:
+    """Return the manifest of a component or platform.
+
+    Built-in modules are looked up in the manifest index once it has been
+    loaded with load_manifest_index, other modules are imported. If
+    load_module is False, None is returned instead of importing.
+    Async friendly.
+    """
+    cache = hass.data.get(DATA_KEY)
+
+    if cache is not None and comp_or_platform in cache:
+        module = cache[comp_or_platform]
+        if module is None:
+            return None
+        return Manifest.from_module(comp_or_platform, module)
+
+    index = hass.data.get(DATA_MANIFEST_INDEX)
+
+    if index is not None and \
+            comp_or_platform not in hass.data[DATA_CUSTOM_COMPONENTS]:
+        indexed = index.get(comp_or_platform)
+
+        if indexed is not None:
+            return Manifest(comp_or_platform, indexed.get('dependencies'),
+                            indexed.get('requirements'))
+
+    if not load_module:
+        return None
+
+    module = get_component(hass, comp_or_platform)
+
+    if module is None:
+        return None
+
+    return Manifest.from_module(comp_or_platform, module)
+
+
 class ModuleWrapper:
     """Class to wrap a Python module and auto fill in hass argument."""
 
@@ -224,15 +349,15 @@ def _load_order_component(hass,  # type: HomeAssistant
 
     Async friendly.
     """
-    component = get_component(hass, comp_name)
+    manifest = get_manifest(hass, comp_name)
 
     # If None it does not exist, error already thrown by get_component.
-    if component is None:
+    if manifest is None:
         return OrderedSet()
 
     loading.add(comp_name)
 
-    for dependency in getattr(component, 'DEPENDENCIES', []):
+    for dependency in manifest.dependencies:
         # Check not already loaded
         if dependency in load_order:
             continue
@@ -2,13 +2,13 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from timeit import default_timer as timer
 
 from homeassistant import core
 from homeassistant.const import (
-    ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED)
+    ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL)
 from homeassistant.util import dt as dt_util
 
 BENCHMARKS = {}
@@ -67,11 +67,48 @@ async def async_million_events(hass):
 
     hass.bus.async_listen(event_name, listener)
 
+    start = timer()
+
     for _ in range(10**6):
         hass.bus.async_fire(event_name)
 
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def async_million_events_mixed_listeners(hass):
+    """Run a million events through callback and MATCH_ALL listeners."""
+    count = 0
+    event_name = 'benchmark_event'
+    other_event_name = 'benchmark_other_event'
+    event = asyncio.Event(loop=hass.loop)
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 10**6:
+            event.set()
+
+    @core.callback
+    def other_listener(_):
+        """Handle an event that is not fired."""
+
+    hass.bus.async_listen(event_name, listener)
+    for _ in range(5):
+        hass.bus.async_listen(MATCH_ALL, other_listener)
+    for _ in range(20):
+        hass.bus.async_listen(other_event_name, other_listener)
+
     start = timer()
 
+    for _ in range(10**6):
+        hass.bus.async_fire(event_name)
+
     await event.wait()
 
     return timer() - start
@@ -141,6 +178,82 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_million_state_changed_many_listeners(hass):
+    """Run a million events through 1000 state changed helpers."""
+    count = 0
+    entity_id = 'light.kitchen'
+    event = asyncio.Event(loop=hass.loop)
+
+    @core.callback
+    def listener(*args):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 10**6:
+            event.set()
+
+    @core.callback
+    def other_listener(*args):
+        """Handle event of other entities."""
+
+    for idx in range(999):
+        hass.helpers.event.async_track_state_change(
+            'light.other_{}'.format(idx), other_listener)
+    hass.helpers.event.async_track_state_change(entity_id, listener)
+    event_data = {
+        'entity_id': entity_id,
+        'old_state': core.State(entity_id, 'off'),
+        'new_state': core.State(entity_id, 'on'),
+    }
+
+    start = timer()
+
+    for _ in range(10**6):
+        hass.bus.async_fire(EVENT_STATE_CHANGED, event_data)
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def async_time_changed_pending_timers(hass):
+    """Fire 100k time changed events with 1500 pending timers."""
+    count = 0
+    now = dt_util.utcnow()
+    event = asyncio.Event(loop=hass.loop)
+
+    @core.callback
+    def timer_action(now):
+        """Handle a timer that is due."""
+
+    @core.callback
+    def listener(*args):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 10**5:
+            event.set()
+
+    for idx in range(1500):
+        hass.helpers.event.async_track_point_in_utc_time(
+            timer_action, now + timedelta(days=1, seconds=idx))
+    hass.bus.async_listen(EVENT_TIME_CHANGED, listener)
+    event_data = {ATTR_NOW: now}
+
+    start = timer()
+
+    for _ in range(10**5):
+        hass.bus.async_fire(EVENT_TIME_CHANGED, event_data)
+
+    await event.wait()
+
+    return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
@@ -189,3 +302,186 @@ def _logbook_filtering(hass, last_changed, last_updated):
     list(logbook.humanify(None, events))
 
     return timer() - start
+
+
+@benchmark
+async def json_serialize_states(hass):
+    """Serialize all states with the json module."""
+    from homeassistant.helpers import json
+
+    return _json_serialize_states(hass, json.BACKEND_JSON)
+
+
+@benchmark
+async def json_serialize_states_orjson(hass):
+    """Serialize all states with orjson."""
+    from homeassistant.helpers import json
+
+    return _json_serialize_states(hass, json.BACKEND_ORJSON)
+
+
+def _json_serialize_states(hass, backend):
+    """Serialize the states like the API does.
+
+    The JSON of each state is encoded once and reused by every message,
+    the backend encodes the messages around them.
+    """
+    from homeassistant.helpers import json
+
+    for idx in range(1000):
+        hass.states.async_set('sensor.sensor_{}'.format(idx), idx, {
+            'friendly_name': 'Sensor {}'.format(idx),
+            'unit_of_measurement': '°C',
+            'device_class': 'temperature',
+            'options': ['low', 'medium', 'high'],
+            'measured': dt_util.utcnow(),
+        })
+
+    states = hass.states.async_all()
+
+    start = timer()
+
+    for _ in range(100):
+        json.json_dumps({
+            'id': 1,
+            'type': 'result',
+            'success': True,
+            'result': states,
+        }, backend=backend)
+
+    return timer() - start
+
+
+@benchmark
+async def async_entity_updates(hass):
+    """Update the state of an entity a hundred thousand times."""
+    return await _async_entity_updates(hass, False)
+
+
+@benchmark
+async def async_entity_updates_static_attributes(hass):
+    """Update an entity with static attributes a hundred thousand times."""
+    return await _async_entity_updates(hass, True)
+
+
+async def _async_entity_updates(hass, static_attributes):
+    from homeassistant.config import DATA_CUSTOMIZE
+    from homeassistant.helpers.entity import Entity
+    from homeassistant.helpers.entity_values import EntityValues
+
+    class BenchmarkEntity(Entity):
+        """Sensor that reports a new value every tenth update."""
+
+        entity_id = 'sensor.benchmark'
+        value = 0
+
+        @property
+        def name(self):
+            """Return the name."""
+            return 'Benchmark'
+
+        @property
+        def icon(self):
+            """Return the icon."""
+            return 'mdi:speedometer'
+
+        @property
+        def unit_of_measurement(self):
+            """Return the unit of measurement."""
+            return 'W'
+
+        @property
+        def device_class(self):
+            """Return the device class."""
+            return 'power'
+
+        @property
+        def state(self):
+            """Return the state."""
+            return self.value // 10
+
+    hass.data[DATA_CUSTOMIZE] = EntityValues({
+        'sensor.benchmark': {'friendly_name': 'Customized benchmark'}})
+
+    entity = BenchmarkEntity()
+    entity.hass = hass
+    entity.static_attributes = static_attributes
+
+    start = timer()
+
+    for value in range(10**5):
+        entity.value = value
+        await entity.async_update_ha_state()
+
+    return timer() - start
+
+
+@benchmark
+async def mqtt_message_routing(hass):
+    """Route MQTT messages to 1200 subscriptions, 300 thousand times."""
+    from homeassistant.components.mqtt import Subscription
+    from homeassistant.components.mqtt.trie import TopicTrie
+
+    count = 0
+
+    @core.callback
+    def message_received(topic, payload, qos):
+        """Handle message."""
+        nonlocal count
+        count += 1
+
+    trie = TopicTrie()
+    topics = []
+
+    for idx in range(400):
+        for topic_filter in ('zigbee2mqtt/device_{}',
+                             'tele/tasmota_{}/STATE',
+                             'stat/tasmota_{}/+'):
+            topic_filter = topic_filter.format(idx)
+            trie.add(topic_filter,
+                     Subscription(topic_filter, message_received))
+            topics.append(topic_filter.replace('+', 'POWER'))
+
+    start = timer()
+
+    for idx in range(3 * 10**5):
+        topic = topics[idx % len(topics)]
+
+        for subscription in list(trie.match(topic)):
+            payload = b'{"state": "ON"}'.decode(subscription.encoding)
+            hass.async_run_job(subscription.callback, topic, payload, 0)
+
+    assert count == 3 * 10**5
+
+    return timer() - start
+
+
+@benchmark
+async def async_service_calls(hass):
+    """Make a hundred thousand blocking service calls."""
+    count = 0
+
+    @core.callback
+    def handle_service(call):
+        """Handle service call."""
+        nonlocal count
+        count += 1
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        pass
+
+    hass.services.async_register('benchmark', 'service', handle_service)
+    hass.bus.async_listen(MATCH_ALL, listener)
+
+    start = timer()
+
+    for _ in range(10**5):
+        await hass.services.async_call(
+            'benchmark', 'service', {'entity_id': 'light.kitchen'},
+            blocking=True)
+
+    assert count == 10**5
+
+    return timer() - start
@@ -1,15 +1,17 @@
 """All methods needed to bootstrap a Home Assistant instance."""
 import asyncio
+from collections import OrderedDict
 import logging.handlers
 from timeit import default_timer as timer
 
 from types import ModuleType
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List, Union
 
 from homeassistant import requirements, core, loader, config as conf_util
 from homeassistant.config import async_notify_setup_error
 from homeassistant.const import EVENT_COMPONENT_LOADED, PLATFORM_FORMAT
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_per_platform
 from homeassistant.util.async_ import run_coroutine_threadsafe
 
 
@@ -19,9 +21,19 @@ ATTR_COMPONENT = 'component'
 
 DATA_SETUP = 'setup_tasks'
 DATA_DEPS_REQS = 'deps_reqs_processed'
+DATA_SETUP_TIMINGS = 'setup_timings'
+DATA_IMPORT_SEMAPHORE = 'setup_import_semaphore'
 
 SLOW_SETUP_WARNING = 10
 
+# Maximum number of modules that are imported at the same time
+MAX_PARALLEL_IMPORTS = 8
+
+PHASE_IMPORT = 'import'
+PHASE_DEPENDENCIES = 'dependencies'
+PHASE_REQUIREMENTS = 'requirements'
+PHASE_SETUP = 'setup'
+
 
 def setup_component(hass: core.HomeAssistant, domain: str,
                     config: Optional[Dict] = None) -> bool:
@@ -100,9 +112,16 @@ async def _async_setup_component(hass: core.HomeAssistant,
         _LOGGER.error("Setup failed for %s: %s", domain, msg)
         async_notify_setup_error(hass, domain, link)
 
-    component = loader.get_component(hass, domain)
+    await async_load_manifest_index(hass)
+
+    manifest = loader.get_manifest(hass, domain, load_module=False)
+
+    if manifest is None:
+        component = await async_import_module(hass, domain)
+        if component is not None:
+            manifest = loader.Manifest.from_module(domain, component)
 
-    if not component:
+    if manifest is None:
         log_error("Component not found.", False)
         return False
 
@@ -114,6 +133,23 @@ async def _async_setup_component(hass: core.HomeAssistant,
         log_error("Unable to resolve component or dependencies.")
         return False
 
+    component = await async_import_module(hass, domain)
+
+    if component is None:
+        log_error("Component not found.", False)
+        return False
+
+    if hasattr(component, 'PLATFORM_SCHEMA'):
+        # Import the configured platforms in parallel before validation
+        platforms = set(
+            PLATFORM_FORMAT.format(domain, p_name) for p_name, _
+            in config_per_platform(config, domain)
+            if isinstance(p_name, str))
+        tasks = [async_import_module(hass, platform) for platform in platforms
+                 if loader.get_manifest(hass, platform, load_module=False)]
+        if tasks:
+            await asyncio.wait(tasks, loop=hass.loop)
+
     processed_config = \
         conf_util.async_process_component_config(hass, config, domain)
 
@@ -122,7 +158,7 @@ async def _async_setup_component(hass: core.HomeAssistant,
         return False
 
     try:
-        await async_process_deps_reqs(hass, config, domain, component)
+        await async_process_deps_reqs(hass, config, domain, manifest)
     except HomeAssistantError as err:
         log_error(str(err))
         return False
@@ -152,6 +188,7 @@ async def _async_setup_component(hass: core.HomeAssistant,
         return False
     finally:
         end = timer()
+        async_record_setup_phase(hass, domain, PHASE_SETUP, start, end)
         if warn_task:
             warn_task.cancel()
     _LOGGER.info("Setup of domain %s took %.1f seconds.", domain, end - start)
@@ -166,8 +203,10 @@ async def _async_setup_component(hass: core.HomeAssistant,
         return False
 
     if hass.config_entries:
+        start = timer()
         for entry in hass.config_entries.async_entries(domain):
             await entry.async_setup(hass, component=component)
+        async_record_setup_phase(hass, domain, PHASE_SETUP, start, timer())
 
     hass.config.components.add(component.DOMAIN)  # type: ignore
 
@@ -198,34 +237,91 @@ async def async_prepare_setup_platform(hass: core.HomeAssistant, config: Dict,
                       platform_path, msg)
         async_notify_setup_error(hass, platform_path)
 
-    platform = loader.get_platform(hass, domain, platform_name)
+    await async_load_manifest_index(hass)
 
-    # Not found
-    if platform is None:
-        log_error("Platform not found.")
-        return None
+    manifest = loader.get_manifest(hass, platform_path, load_module=False)
 
-    # Already loaded
-    if platform_path in hass.config.components:
-        return platform
+    # Already loaded or not built-in
+    if manifest is None or platform_path in hass.config.components:
+        platform = await async_import_module(hass, platform_path)
+
+        # Not found
+        if platform is None:
+            log_error("Platform not found.")
+            return None
+
+        # Already loaded
+        if platform_path in hass.config.components:
+            return platform
+
+        manifest = loader.Manifest.from_module(platform_path, platform)
 
     try:
         await async_process_deps_reqs(
-            hass, config, platform_path, platform)
+            hass, config, platform_path, manifest)
     except HomeAssistantError as err:
         log_error(str(err))
         return None
 
+    platform = await async_import_module(hass, platform_path)
+
+    if platform is None:
+        log_error("Platform not found.")
+
     return platform
 
 
+async def async_load_manifest_index(hass: core.HomeAssistant) -> None:
+    """Load the manifest index in the executor if not loaded yet.
+
+    This method is a coroutine.
+    """
+    if loader.DATA_MANIFEST_INDEX not in hass.data:
+        await hass.async_add_executor_job(loader.load_manifest_index, hass)
+
+
+async def async_import_module(hass: core.HomeAssistant,
+                              comp_or_platform: str) -> Optional[ModuleType]:
+    """Import a component or platform in the executor.
+
+    At most MAX_PARALLEL_IMPORTS modules are imported at the same time.
+    This method is a coroutine.
+    """
+    # Created on the loop, the import threads only add to it
+    cache = loader.get_component_cache(hass)
+
+    if cache is None:
+        return None
+
+    if comp_or_platform in cache:
+        return cache[comp_or_platform]
+
+    semaphore = hass.data.get(DATA_IMPORT_SEMAPHORE)
+
+    if semaphore is None:
+        semaphore = hass.data[DATA_IMPORT_SEMAPHORE] = asyncio.Semaphore(
+            MAX_PARALLEL_IMPORTS, loop=hass.loop)
+
+    async with semaphore:
+        start = timer()
+        module = await hass.async_add_executor_job(
+            loader.get_component, hass, comp_or_platform)
+        async_record_setup_phase(
+            hass, comp_or_platform, PHASE_IMPORT, start, timer())
+
+    return module
+
+
 async def async_process_deps_reqs(
         hass: core.HomeAssistant, config: Dict, name: str,
-        module: ModuleType) -> None:
+        module: Union[ModuleType, loader.Manifest]) -> None:
     """Process all dependencies and requirements for a module.
 
-    Module is a Python module of either a component or platform.
+    Module is the manifest or Python module of a component or platform.
     """
+    if not isinstance(module, loader.Manifest):
+        module = loader.Manifest.from_module(name, module)
+
     processed = hass.data.get(DATA_DEPS_REQS)
 
     if processed is None:
@@ -233,18 +329,103 @@ async def async_process_deps_reqs(
     elif name in processed:
         return
 
-    if hasattr(module, 'DEPENDENCIES'):
+    if module.dependencies:
+        start = timer()
         dep_success = await _async_process_dependencies(
-            hass, config, name, module.DEPENDENCIES)  # type: ignore
+            hass, config, name, module.dependencies)
+        async_record_setup_phase(
+            hass, name, PHASE_DEPENDENCIES, start, timer(),
+            module.dependencies)
 
         if not dep_success:
             raise HomeAssistantError("Could not set up all dependencies.")
 
-    if not hass.config.skip_pip and hasattr(module, 'REQUIREMENTS'):
+    if not hass.config.skip_pip and module.requirements:
+        start = timer()
         req_success = await requirements.async_process_requirements(
-            hass, name, module.REQUIREMENTS)  # type: ignore
+            hass, name, module.requirements)
+        async_record_setup_phase(
+            hass, name, PHASE_REQUIREMENTS, start, timer())
 
         if not req_success:
             raise HomeAssistantError("Could not install all requirements.")
 
     processed.add(name)
+
+
+@core.callback
+def async_record_setup_phase(hass: core.HomeAssistant, name: str, phase: str,
+                             start: float, end: float,
+                             dependencies: Optional[List[str]] = None) \
+        -> None:
+    """Record the duration of a setup phase of a component or platform.
+
+    Start and end are timestamps of timeit.default_timer.
+    """
+    timings = hass.data.setdefault(
+        DATA_SETUP_TIMINGS, OrderedDict())  # type: Dict[str, Dict[str, Any]]
+    timing = timings.get(name)  # type: Optional[Dict[str, Any]]
+
+    if timing is None:
+        timing = timings[name] = {
+            'start': start,
+            'end': end,
+            'phases': OrderedDict(),
+            'dependencies': [],
+        }
+    else:
+        timing['start'] = min(timing['start'], start)
+        timing['end'] = max(timing['end'], end)
+
+    timing['phases'][phase] = timing['phases'].get(phase, 0) + end - start
+
+    if dependencies is not None:
+        timing['dependencies'] = list(dependencies)
+
+
+@core.callback
+def async_get_setup_timings(hass: core.HomeAssistant) -> Dict[str, Any]:
+    """Return the setup timeline of components and platforms.
+
+    Times are in seconds since the first recorded setup phase started. A
+    component starts when it is imported, its phases hold how long each
+    phase took in total. The critical path is the chain of dependencies that
+    ends with the setup that finished last, each step being the dependency
+    that finished last.
+    """
+    timings = hass.data.get(
+        DATA_SETUP_TIMINGS, {})  # type: Dict[str, Dict[str, Any]]
+
+    if not timings:
+        return {'total': 0, 'critical_path': [], 'components': {}}
+
+    origin = min(timing['start'] for timing in timings.values())
+
+    critical_path = []  # type: List[str]
+    name = max(
+        timings,
+        key=lambda name: timings[name]['end'])  # type: Optional[str]
+
+    while name is not None and name not in critical_path:
+        critical_path.append(name)
+        dependencies = [dep for dep in timings[name]['dependencies']
+                        if dep in timings]
+        name = max(dependencies, key=lambda dep: timings[dep]['end']) \
+            if dependencies else None
+
+    critical_path.reverse()
+
+    return {
+        'total': round(timings[critical_path[-1]]['end'] - origin, 3),
+        'critical_path': critical_path,
+        'components': OrderedDict(
+            (name, {
+                'start': round(timing['start'] - origin, 3),
+                'end': round(timing['end'] - origin, 3),
+                'phases': OrderedDict(
+                    (phase, round(duration, 3))
+                    for phase, duration in timing['phases'].items()),
+                'dependencies': timing['dependencies'],
+            }) for name, timing in sorted(
+                timings.items(), key=lambda item: item[1]['start'])),
+    }
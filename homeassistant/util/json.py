@@ -1,6 +1,6 @@
 """JSON utility functions."""
 import logging
-from typing import Union, List, Dict
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import json
 import os
@@ -41,14 +41,20 @@ def load_json(filename: str, default: Union[List, Dict, None] = None) \
 
 
 def save_json(filename: str, data: Union[List, Dict],
-              private: bool = False) -> None:
+              private: bool = False,
+              dumps: Optional[Callable[[Any], str]] = None) -> None:
     """Save JSON data to a file.
 
+    The data is serialized by dumps if given.
+
     Returns True on success.
     """
     tmp_filename = filename + "__TEMP__"
     try:
-        json_data = json.dumps(data, sort_keys=True, indent=4)
+        if dumps is None:
+            json_data = json.dumps(data, sort_keys=True, indent=4)
+        else:
+            json_data = dumps(data)
         mode = 0o600 if private else 0o644
         with open(os.open(tmp_filename, O_WRONLY | O_CREAT | O_TRUNC, mode),
                   'w', encoding='utf-8') as fdesc:
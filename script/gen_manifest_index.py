@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Generate the manifest index of components and platforms.
+
+The index holds the dependencies and requirements of every built-in
+component and platform, read from their source without importing them.
+Modules that compute these values are left out of the index and are
+imported when their manifest is needed.
+"""
+import ast
+import json
+import os
+import sys
+
+COMPONENTS_DIR = os.path.join('homeassistant', 'components')
+INDEX_PATH = os.path.join(COMPONENTS_DIR, 'manifest_index.json')
+
+MANIFEST_KEYS = {
+    'DEPENDENCIES': 'dependencies',
+    'REQUIREMENTS': 'requirements',
+}
+
+
+def read_manifest(path):
+    """Read the manifest of a module, None if it is not a literal."""
+    with open(path, encoding='utf-8') as source:
+        tree = ast.parse(source.read(), path)
+
+    manifest = {}
+
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+
+        for target in node.targets:
+            if not isinstance(target, ast.Name) or \
+                    target.id not in MANIFEST_KEYS:
+                continue
+
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                return None
+
+            if not isinstance(value, (list, tuple)) or \
+                    not all(isinstance(item, str) for item in value):
+                return None
+
+            # Assigned more than once, e.g. depending on the platform
+            if MANIFEST_KEYS[target.id] in manifest:
+                return None
+
+            if value:
+                manifest[MANIFEST_KEYS[target.id]] = list(value)
+
+    return manifest
+
+
+def gather_modules():
+    """Return the paths of components and platforms by name."""
+    modules = {}
+
+    for name in os.listdir(COMPONENTS_DIR):
+        path = os.path.join(COMPONENTS_DIR, name)
+
+        if name.endswith('.py') and name != '__init__.py':
+            modules[name[:-3]] = path
+            continue
+
+        init_path = os.path.join(path, '__init__.py')
+        if not os.path.isfile(init_path):
+            continue
+
+        modules[name] = init_path
+
+        for platform in os.listdir(path):
+            platform_path = os.path.join(path, platform)
+
+            if platform.endswith('.py') and platform != '__init__.py':
+                modules['{}.{}'.format(name, platform[:-3])] = platform_path
+            elif os.path.isfile(os.path.join(platform_path, '__init__.py')):
+                modules['{}.{}'.format(name, platform)] = os.path.join(
+                    platform_path, '__init__.py')
+
+    return modules
+
+
+def generate_index():
+    """Generate the content of the manifest index."""
+    index = {}
+
+    for name, path in gather_modules().items():
+        manifest = read_manifest(path)
+
+        if manifest is not None:
+            index[name] = manifest
+
+    return json.dumps(index, indent=1, sort_keys=True) + '\n'
+
+
+def main(validate):
+    """Run the script."""
+    if not os.path.isdir(COMPONENTS_DIR):
+        print('Run this from HA root dir')
+        return 1
+
+    data = generate_index()
+
+    if validate:
+        with open(INDEX_PATH, encoding='utf-8') as index_file:
+            if index_file.read() != data:
+                print("******* ERROR")
+                print("{} is not up to date".format(INDEX_PATH))
+                print("Please run script/gen_manifest_index.py")
+                return 1
+        return 0
+
+    with open(INDEX_PATH, 'w', encoding='utf-8', newline='\n') as index_file:
+        index_file.write(data)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[-1] == 'validate'))
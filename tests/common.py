@@ -816,10 +816,19 @@ def mock_storage(data=None):
         _LOGGER.info('Writing data to %s: %s', store.key, data_to_write)
         data[store.key] = json.loads(json.dumps(data_to_write))
 
+    def mock_write_journal(store, path, journal_id, records, start):
+        """Mock version of write journal."""
+        _LOGGER.info('Writing journal to %s: %s', store.key, records)
+        # pylint: disable=protected-access
+        storage._replay_journal(data[store.key]['data'],
+                                json.loads(json.dumps(records)))
+
     with patch('homeassistant.helpers.storage.Store._async_load',
                side_effect=mock_async_load, autospec=True), \
         patch('homeassistant.helpers.storage.Store._write_data',
-              side_effect=mock_write_data, autospec=True):
+              side_effect=mock_write_data, autospec=True), \
+        patch('homeassistant.helpers.storage.Store._write_journal',
+              side_effect=mock_write_journal, autospec=True):
         yield data
 
 
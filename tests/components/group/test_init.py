@@ -2,6 +2,7 @@
 # pylint: disable=protected-access
 import asyncio
 from collections import OrderedDict
+import threading
 import unittest
 from unittest.mock import patch
 
@@ -10,6 +11,7 @@ from homeassistant.const import (
     STATE_ON, STATE_OFF, STATE_HOME, STATE_UNKNOWN, ATTR_ICON, ATTR_HIDDEN,
     ATTR_ASSUMED_STATE, STATE_NOT_HOME, ATTR_FRIENDLY_NAME)
 import homeassistant.components.group as group
+from homeassistant.helpers.event import DATA_STATE_CHANGE_DISPATCHER
 
 from tests.common import get_test_home_assistant, assert_setup_component
 from tests.components.group import common
@@ -298,6 +300,82 @@ class TestComponentsGroup(unittest.TestCase):
             sorted(group.expand_entity_ids(self.hass,
                                            ['group.group_of_groups'])))
 
+    def test_expand_entity_ids_after_group_changed(self):
+        """Test expanded members follow changes of nested groups."""
+        self.hass.states.set('group.light', STATE_ON, {
+            'entity_id': ['light.test_1']})
+        self.hass.states.set('group.group_of_groups', STATE_ON, {
+            'entity_id': ['group.light', 'switch.test_1']})
+
+        self.assertEqual(
+            ['light.test_1', 'switch.test_1'],
+            group.expand_entity_ids(self.hass, ['group.group_of_groups']))
+
+        self.hass.states.set('group.light', STATE_ON, {
+            'entity_id': ['light.test_1', 'light.test_2']})
+
+        self.assertEqual(
+            ['light.test_1', 'light.test_2', 'switch.test_1'],
+            group.expand_entity_ids(self.hass, ['group.group_of_groups']))
+
+        self.hass.states.remove('group.light')
+
+        self.assertEqual(
+            ['switch.test_1'],
+            group.expand_entity_ids(self.hass, ['group.group_of_groups']))
+
+    def test_membership_groups_of_entity(self):
+        """Test looking up the groups that contain an entity."""
+        group.Group.create_group(
+            self.hass, 'light', ['light.test_1', 'light.test_2'])
+        group.Group.create_group(
+            self.hass, 'upstairs', ['light.test_2', 'switch.test_1'])
+        group.Group.create_group(
+            self.hass, 'group_of_groups', ['group.light', 'group.upstairs'])
+        group.expand_entity_ids(self.hass, ['group.light'])
+        membership = self.hass.data[group.DATA_MEMBERSHIP]
+
+        self.assertEqual(
+            {'group.light', 'group.upstairs', 'group.group_of_groups'},
+            membership.get_groups('light.test_2'))
+        self.assertEqual(
+            {'group.upstairs', 'group.group_of_groups'},
+            membership.get_groups('switch.test_1'))
+        self.assertEqual(set(), membership.get_groups('light.test_3'))
+
+        self.hass.states.remove('group.group_of_groups')
+
+        self.assertEqual(
+            {'group.upstairs'}, membership.get_groups('switch.test_1'))
+
+    def test_membership_updated_from_threads(self):
+        """Test the membership index is updated from several threads."""
+        self.hass.states.set('group.light', STATE_ON, {
+            'entity_id': ['light.test_1']})
+        group.expand_entity_ids(self.hass, ['group.light'])
+        membership = self.hass.data[group.DATA_MEMBERSHIP]
+
+        self.hass.states.set('group.light', STATE_ON, {
+            'entity_id': ['light.test_2']})
+        expand = membership._expand
+
+        def expand_interrupted(group_id):
+            """Update the index from another thread while expanding."""
+            membership._expand = expand
+            thread = threading.Thread(
+                target=membership.get_members, args=(group_id,))
+            thread.start()
+            thread.join()
+            return expand(group_id)
+
+        membership._expand = expand_interrupted
+
+        self.assertEqual(
+            ['light.test_2'], membership.get_members('group.light'))
+        self.assertEqual(
+            {'group.light'}, membership.get_groups('light.test_2'))
+        self.assertEqual(set(), membership.get_groups('light.test_1'))
+
     def test_set_assumed_state_based_on_tracked(self):
         """Test assumed state."""
         self.hass.states.set('light.Bowl', STATE_ON)
@@ -357,7 +435,10 @@ class TestComponentsGroup(unittest.TestCase):
         assert sorted(self.hass.states.entity_ids()) == \
             ['group.all_tests', 'group.empty_group', 'group.second_group',
              'group.test_group']
-        assert self.hass.bus.listeners['state_changed'] == 3
+        assert self.hass.bus.listeners['state_changed'] == 1
+        dispatcher = self.hass.data[DATA_STATE_CHANGE_DISPATCHER]
+        assert len(dispatcher.listeners['light.bowl']) == 1
+        assert len(dispatcher.listeners['hello.world']) == 1
 
         with patch('homeassistant.config.load_yaml_config_file', return_value={
             'group': {
@@ -373,7 +454,9 @@ class TestComponentsGroup(unittest.TestCase):
 
         assert sorted(self.hass.states.entity_ids()) == \
             ['group.all_tests', 'group.hello']
-        assert self.hass.bus.listeners['state_changed'] == 2
+        assert self.hass.bus.listeners['state_changed'] == 1
+        assert len(dispatcher.listeners['light.bowl']) == 1
+        assert 'hello.world' not in dispatcher.listeners
 
     def test_changing_group_visibility(self):
         """Test that a group can be hidden and shown."""
@@ -1,4 +1,7 @@
 """Tests for Home Assistant View."""
+import asyncio
+
+from aiohttp import ClientPayloadError, web
 from aiohttp.web_exceptions import HTTPInternalServerError
 import pytest
 
@@ -13,3 +16,75 @@ async def test_invalid_json(caplog):
         view.json(object)
 
     assert str(object) in caplog.text
+
+
+def _stream_app(hass, fragments):
+    """Return an app that streams the fragments of a generator."""
+    view = HomeAssistantView()
+
+    async def handler(request):
+        """Stream the fragments."""
+        return await view.json_stream(request, fragments)
+
+    app = web.Application()
+    app['hass'] = hass
+    app.router.add_get('/', handler)
+    return app
+
+
+async def test_json_stream(hass, aiohttp_client):
+    """Test streaming a JSON response closes the generator."""
+    closed = []
+
+    def fragments():
+        """Yield a JSON list."""
+        try:
+            yield '['
+            yield '1,'
+            yield '2]'
+        finally:
+            closed.append(True)
+
+    client = await aiohttp_client(_stream_app(hass, fragments()))
+    resp = await client.get('/')
+
+    assert resp.status == 200
+    assert await resp.json() == [1, 2]
+    assert closed == [True]
+
+
+async def test_json_stream_client_disconnect(hass, aiohttp_client):
+    """Test the generator is closed when the client disconnects."""
+    closed = asyncio.Event(loop=hass.loop)
+
+    def fragments():
+        """Yield a JSON list without end."""
+        try:
+            yield '['
+            while True:
+                yield '"{}",'.format('x' * 1000)
+        finally:
+            closed.set()
+
+    client = await aiohttp_client(_stream_app(hass, fragments()))
+    resp = await client.get('/')
+    await resp.content.read(100)
+    resp.close()
+
+    await asyncio.wait_for(closed.wait(), 5, loop=hass.loop)
+
+
+async def test_json_stream_error(hass, aiohttp_client, caplog):
+    """Test an error while streaming aborts the response."""
+    def fragments():
+        """Yield part of a JSON list and fail."""
+        yield '[1,'
+        raise ValueError('Database gone')
+
+    client = await aiohttp_client(_stream_app(hass, fragments()))
+    resp = await client.get('/')
+
+    assert resp.status == 200
+    with pytest.raises(ClientPayloadError):
+        await resp.read()
+    assert 'Error streaming response for /' in caplog.text
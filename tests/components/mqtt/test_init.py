@@ -680,3 +680,63 @@ def test_mqtt_subscribes_topics_on_connect(hass):
 async def test_setup_fails_without_config(hass):
     """Test if the MQTT component fails to load with no config."""
     assert not await async_setup_component(hass, mqtt.DOMAIN, {})
+
+
+async def test_messages_handled_in_batches(hass):
+    """Test received messages are handled in batches and coalesced."""
+    await async_mock_mqtt_client(hass, {
+        mqtt.CONF_BROKER: 'mock-broker',
+        mqtt.CONF_COALESCE_TOPICS: ['state/+'],
+    })
+    mqtt_client = hass.data['mqtt']
+    calls = []
+
+    @callback
+    def record_calls(topic, payload, qos):
+        """Record calls."""
+        calls.append((topic, payload))
+
+    await mqtt.async_subscribe(hass, 'state/+', record_calls)
+    await mqtt.async_subscribe(hass, 'event', record_calls)
+
+    with mock.patch.object(hass.loop, 'call_soon_threadsafe',
+                           wraps=hass.loop.call_soon_threadsafe) as mock_call:
+        for topic, payload in (('event', b'a'), ('state/x', b'1'),
+                               ('state/x', b'2'), ('event', b'b'),
+                               ('state/y', b'1')):
+            mqtt_client._mqtt_on_message(
+                None, None, mqtt.Message(topic, payload))
+
+    assert mock_call.call_count == 1
+
+    await hass.async_block_till_done()
+
+    assert calls == [('event', 'a'), ('state/x', '2'), ('event', 'b'),
+                     ('state/y', '1')]
+    assert mqtt_client.messages_received == 5
+    assert mqtt_client.messages_coalesced == 1
+    assert mqtt_client.messages_dropped == 0
+
+
+async def test_messages_dropped_when_buffer_full(hass):
+    """Test messages are dropped if too many are waiting."""
+    await async_mock_mqtt_client(hass)
+    mqtt_client = hass.data['mqtt']
+    calls = []
+
+    @callback
+    def record_calls(topic, payload, qos):
+        """Record calls."""
+        calls.append(payload)
+
+    await mqtt.async_subscribe(hass, 'test-topic', record_calls)
+
+    with mock.patch('homeassistant.components.mqtt.MAX_PENDING_MESSAGES', 2):
+        for payload in (b'1', b'2', b'3'):
+            mqtt_client._mqtt_on_message(
+                None, None, mqtt.Message('test-topic', payload))
+
+    await hass.async_block_till_done()
+
+    assert calls == ['1', '2']
+    assert mqtt_client.messages_dropped == 1
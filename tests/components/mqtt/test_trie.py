@@ -0,0 +1,63 @@
+"""The tests for the MQTT topic trie."""
+import pytest
+
+from homeassistant.components.mqtt.trie import TopicTrie
+
+
+@pytest.mark.parametrize('topic_filter, topic, matches', [
+    ('test-topic', 'test-topic', True),
+    ('test-topic', 'another-test-topic', False),
+    ('test/+/on', 'test/bier/on', True),
+    ('test/+/on', 'test/bier/off', False),
+    ('test/+/on', 'test/bier/on/more', False),
+    ('test/+', 'test', False),
+    ('+/on', 'test/on', True),
+    ('test/#', 'test/bier/on', True),
+    ('test/#', 'test', True),
+    ('test/#', 'another-test/bier', False),
+    ('+/+/#', 'hi/here/test-topic', True),
+    ('#', 'test/topic', True),
+    ('#', '$SYS/broker', False),
+    ('+/broker', '$SYS/broker', False),
+    ('$SYS/#', '$SYS/broker', True),
+    ('test//on', 'test//on', True),
+])
+def test_match(topic_filter, topic, matches):
+    """Test matching topics against topic filters."""
+    trie = TopicTrie()
+    trie.add(topic_filter, 'value')
+
+    assert list(trie.match(topic)) == (['value'] if matches else [])
+
+
+def test_match_multiple_filters():
+    """Test values of all matching topic filters are returned."""
+    trie = TopicTrie()
+    trie.add('home/kitchen/temperature', 'exact')
+    trie.add('home/kitchen/temperature', 'exact 2')
+    trie.add('home/+/temperature', 'single level')
+    trie.add('home/#', 'multi level')
+    trie.add('home/kitchen/humidity', 'other')
+
+    assert sorted(trie.match('home/kitchen/temperature')) == [
+        'exact', 'exact 2', 'multi level', 'single level']
+
+
+def test_remove():
+    """Test removing values prunes the trie."""
+    trie = TopicTrie()
+    trie.add('home/+/temperature', 'first')
+    trie.add('home/+/temperature', 'second')
+    trie.add('home/#', 'third')
+
+    trie.remove('home/+/temperature', 'first')
+    assert sorted(trie.match('home/kitchen/temperature')) == [
+        'second', 'third']
+
+    trie.remove('home/+/temperature', 'second')
+    trie.remove('home/#', 'third')
+    assert list(trie.match('home/kitchen/temperature')) == []
+    assert not trie._root.children
+
+    with pytest.raises(ValueError):
+        trie.remove('home/#', 'third')
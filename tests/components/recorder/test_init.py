@@ -10,7 +10,8 @@ from homeassistant.const import MATCH_ALL
 from homeassistant.components.recorder import Recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    Events, States, StateAttributes)
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -202,3 +203,54 @@ def test_recorder_setup_failure():
         rec.join()
 
     hass.stop()
+
+
+def test_saving_batch(hass_recorder):
+    """Test saving a batch of events in a single commit."""
+    hass = hass_recorder({'commit_interval': 0.5, 'max_batch_size': 10})
+    instance = hass.data[DATA_INSTANCE]
+    for idx in range(25):
+        hass.states.set('test.batch_{}'.format(idx), 'on')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States))
+        assert len(db_states) == 25
+        for db_state in db_states:
+            assert db_state.event_id is not None
+
+    assert 0 < instance.last_batch_size <= 10
+    assert instance.last_batch_latency > 0
+    assert instance.queue_depth == 0
+
+
+def test_saving_batch_with_excluded_events(hass_recorder):
+    """Test excluded events do not end up in a batch."""
+    hass = hass_recorder({'commit_interval': 0.1,
+                          'exclude': {'event_types': 'test'}})
+    events = _add_events(hass, ['test', 'test2', 'test', 'test2'])
+    assert len(events) == 2
+    assert all(event.event_type == 'test2' for event in events)
+
+
+def test_saving_state_shared_attributes(hass_recorder):
+    """Test identical attributes are stored once."""
+    hass = hass_recorder()
+    attributes = {'unit_of_measurement': 'W', 'friendly_name': 'Power'}
+    for idx in range(5):
+        hass.states.set('sensor.power', str(idx), attributes)
+        hass.block_till_done()
+    hass.states.set('sensor.power_2', '1', attributes)
+    hass.states.set('sensor.power_3', '1', {'friendly_name': 'Other'})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StateAttributes).count() == 2
+        states = [db_state.to_native() for db_state in session.query(States)]
+
+    assert len(states) == 7
+    for state in states:
+        assert state.attributes == \
+            hass.states.get(state.entity_id).attributes
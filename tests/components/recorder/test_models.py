@@ -1,4 +1,5 @@
 """The tests for the Recorder component."""
+import json
 import unittest
 from datetime import datetime
 
@@ -9,7 +10,7 @@ import homeassistant.core as ha
 from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.util import dt
 from homeassistant.components.recorder.models import (
-    Base, Events, States, RecorderRuns)
+    Base, Events, States, StateAttributes, RecorderRuns)
 
 ENGINE = None
 SESSION = None
@@ -78,6 +79,49 @@ class TestStates(unittest.TestCase):
         assert db_state.last_changed == event.time_fired
         assert db_state.last_updated == event.time_fired
 
+    def test_to_native_shared_attributes(self):
+        """Test converting a db state with shared attributes."""
+        state = ha.State('sensor.temperature', '18', {
+            'unit_of_measurement': '°C', 'friendly_name': 'Temperature'})
+        event = ha.Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'sensor.temperature',
+            'old_state': None,
+            'new_state': state,
+        }, context=state.context)
+        db_state = States.from_event(event)
+        assert db_state.attributes is None
+
+        shared_attrs = StateAttributes.shared_attrs_from_state(state)
+        db_state.state_attributes = StateAttributes(
+            attributes_id=StateAttributes.hash_shared_attrs(shared_attrs),
+            shared_attrs=shared_attrs)
+        assert state == db_state.to_native()
+
+
+class TestStateAttributes(unittest.TestCase):
+    """Test StateAttributes model."""
+
+    # pylint: disable=no-self-use
+    def test_hash_is_order_independent(self):
+        """Test equal attributes are stored under the same hash."""
+        state1 = ha.State('sensor.a', 'on', {'a': 1, 'b': 2})
+        state2 = ha.State('sensor.b', 'off', {'b': 2, 'a': 1})
+        state3 = ha.State('sensor.c', 'off', {'a': 2, 'b': 2})
+
+        def attributes_id(state):
+            return StateAttributes.hash_shared_attrs(
+                StateAttributes.shared_attrs_from_state(state))
+
+        assert attributes_id(state1) == attributes_id(state2)
+        assert attributes_id(state1) != attributes_id(state3)
+
+    def test_hash_is_backend_independent(self):
+        """Test the hash does not depend on the installed serializers."""
+        state = ha.State('sensor.a', 'on', {'b': [1, 2], 'a': 'é'})
+
+        assert StateAttributes.shared_attrs_from_state(state) == \
+            json.dumps({'a': 'é', 'b': [1, 2]})
+
 
 class TestRecorderRuns(unittest.TestCase):
     """Test recorder run model."""
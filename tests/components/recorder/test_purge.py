@@ -6,8 +6,10 @@ from unittest.mock import patch
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.purge import purge_old_data
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.purge import (
+    get_unfinished_purge, purge_old_data)
+from homeassistant.components.recorder.models import (
+    States, StateAttributes, Events)
 from homeassistant.components.recorder.util import session_scope
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -147,6 +149,100 @@ class TestRecorderPurge(unittest.TestCase):
             # no state to protect, now we should only have 2 events left
             self.assertEqual(events.count(), 2)
 
+    def test_purge_in_batches(self):
+        """Test purging in batches resumes until everything is purged."""
+        self._add_test_events()
+        self._add_test_states()
+        instance = self.hass.data[DATA_INSTANCE]
+
+        with session_scope(hass=self.hass) as session:
+            states = session.query(States)
+            events = session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%"))
+
+            with patch('homeassistant.components.recorder.purge.'
+                       '_save_progress') as save_progress:
+                assert not purge_old_data(instance, 4, False, batch_size=2)
+                assert len(save_progress.mock_calls) == 1
+                self.assertEqual(states.count(), 5)
+                self.assertEqual(events.count(), 5)
+
+                while not purge_old_data(instance, 4, False, batch_size=2):
+                    pass
+
+            self.assertEqual(states.count(), 3)
+            self.assertEqual(events.count(), 3)
+            self.assertTrue('iamprotected' in (
+                state.state for state in states))
+
+    def test_purge_attributes_in_batches(self):
+        """Test unused attributes are purged in batches."""
+        instance = self.hass.data[DATA_INSTANCE]
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for idx in range(5):
+                session.add(StateAttributes(
+                    attributes_id='attributes_{}'.format(idx),
+                    shared_attrs=json.dumps({'idx': idx})))
+            session.add(States(
+                entity_id='test.recorder', domain='test', state='on',
+                attributes_id='attributes_0', event_id=3000))
+
+        with session_scope(hass=self.hass) as session:
+            attributes = session.query(StateAttributes).filter(
+                StateAttributes.attributes_id.like('attributes_%'))
+
+            with patch('homeassistant.components.recorder.purge.'
+                       '_save_progress'):
+                assert not purge_old_data(instance, 4, False, batch_size=2)
+                self.assertEqual(attributes.count(), 3)
+
+                while not purge_old_data(instance, 4, False, batch_size=2):
+                    pass
+
+            self.assertEqual(
+                ['attributes_0'],
+                [attrs.attributes_id for attrs in attributes])
+
+    def test_repack_in_batches(self):
+        """Test SQLite frees a batch of pages per purge."""
+        instance = self.hass.data[DATA_INSTANCE]
+        self.hass.block_till_done()
+        instance.block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for _ in range(20):
+                session.add(Events(event_type='EVENT_TEST_LARGE',
+                                   event_data='x' * 10000, origin='LOCAL'))
+        with session_scope(hass=self.hass) as session:
+            session.query(Events).filter(
+                Events.event_type == 'EVENT_TEST_LARGE').delete()
+
+        assert instance.engine.execute("PRAGMA freelist_count").scalar() > 2
+
+        with patch('homeassistant.components.recorder.purge.'
+                   '_save_progress'):
+            assert not purge_old_data(instance, 4, True, batch_size=2)
+
+            while not purge_old_data(instance, 4, True, batch_size=2):
+                pass
+
+        assert instance.engine.execute("PRAGMA freelist_count").scalar() == 0
+
+    def test_unfinished_purge(self):
+        """Test an interrupted purge is resumed."""
+        instance = self.hass.data[DATA_INSTANCE]
+
+        with patch('homeassistant.components.recorder.purge.os.path.isfile',
+                   return_value=True), \
+                patch('homeassistant.components.recorder.purge.load_json',
+                      return_value={'purge_days': 3, 'repack': True}):
+            assert get_unfinished_purge(instance) == (3, True)
+
+        assert get_unfinished_purge(instance) is None
+
     def test_purge_method(self):
         """Test purge method."""
         service_data = {'keep_days': 4}
@@ -207,5 +303,5 @@ class TestRecorderPurge(unittest.TestCase):
                                         service_data=service_data)
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
-                self.assertEqual(mock_logger.debug.mock_calls[4][1][0],
-                                 "Vacuuming SQLite to free space")
+                self.assertEqual(mock_logger.debug.mock_calls[6][1][0],
+                                 "Freeing up to %s pages of SQLite")
@@ -0,0 +1,104 @@
+"""The tests for the recorder statistics."""
+# pylint: disable=redefined-outer-name
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.recorder import statistics
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+
+@pytest.fixture
+def hass_recorder():
+    """HASS fixture with in-memory recorder."""
+    hass = get_test_home_assistant()
+    init_recorder_component(hass)
+    hass.start()
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+    yield hass
+    hass.stop()
+
+
+def test_period_start():
+    """Test the start of periods."""
+    timestamp = datetime(2018, 10, 1, 12, 34, 56, 789, tzinfo=dt_util.UTC)
+    assert statistics.period_start(timestamp, statistics.PERIOD_5MINUTE) == \
+        datetime(2018, 10, 1, 12, 30, tzinfo=dt_util.UTC)
+    assert statistics.period_start(timestamp, statistics.PERIOD_HOUR) == \
+        datetime(2018, 10, 1, 12, tzinfo=dt_util.UTC)
+
+
+def test_pick_period():
+    """Test picking the resolution for a time span."""
+    start = dt_util.utcnow()
+    assert statistics.pick_period(
+        start, start + timedelta(hours=1), 1000) is None
+    assert statistics.pick_period(
+        start, start + timedelta(days=1), 288) == statistics.PERIOD_5MINUTE
+    assert statistics.pick_period(
+        start, start + timedelta(days=1), 100) == statistics.PERIOD_HOUR
+    assert statistics.pick_period(
+        start, start + timedelta(days=30), 500) == statistics.PERIOD_HOUR
+
+
+def test_compile_statistics(hass_recorder):
+    """Test numeric states are rolled up."""
+    hass = hass_recorder
+    start = datetime(2018, 10, 1, 12, 0, tzinfo=dt_util.UTC)
+    attributes = {'unit_of_measurement': 'W'}
+
+    for minutes, value in ((1, 10), (2, 20), (3, 60), (6, 5)):
+        with patch('homeassistant.core.dt_util.utcnow',
+                   return_value=start + timedelta(minutes=minutes)):
+            hass.states.set('sensor.power', value, attributes)
+            hass.states.set('sensor.text', 'on', attributes)
+            hass.states.set('sensor.no_unit', value)
+            hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        five_minutes = statistics.statistics_during_period(
+            session, start, None, statistics.PERIOD_5MINUTE)
+        hours = statistics.statistics_during_period(
+            session, start, None, statistics.PERIOD_HOUR)
+
+    assert list(five_minutes) == ['sensor.power']
+    first, second = five_minutes['sensor.power']
+    assert first.state == '30.0'
+    assert first.attributes == {
+        'unit_of_measurement': 'W', 'min': 10, 'max': 60, 'last': 60}
+    assert first.last_changed == start
+    assert second.state == '5.0'
+
+    hour, = hours['sensor.power']
+    assert hour.attributes['min'] == 5
+    assert hour.attributes['max'] == 60
+    assert hour.attributes['last'] == 5
+
+
+def test_compile_statistics_ignores_nan(hass_recorder):
+    """Test states that are not finite numbers are not rolled up."""
+    hass = hass_recorder
+    start = datetime(2018, 10, 1, 12, 0, tzinfo=dt_util.UTC)
+    attributes = {'unit_of_measurement': 'W'}
+
+    for minutes, value in ((1, 10), (2, 'nan'), (3, 'inf'), (4, 20)):
+        with patch('homeassistant.core.dt_util.utcnow',
+                   return_value=start + timedelta(minutes=minutes)):
+            hass.states.set('sensor.power', value, attributes)
+            hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        five_minutes = statistics.statistics_during_period(
+            session, start, None, statistics.PERIOD_5MINUTE)
+
+    bucket, = five_minutes['sensor.power']
+    assert bucket.state == '15.0'
+    assert bucket.attributes['max'] == 20
@@ -494,3 +494,12 @@ async def test_api_set_state_context(hass, mock_api_client, hass_access_token):
 
     state = hass.states.get('light.kitchen')
     assert state.context.user_id == refresh_token.user.id
+
+
+async def test_api_get_setup_timings(hass, mock_api_client):
+    """Test the return of the setup timings."""
+    resp = await mock_api_client.get(const.URL_API_SETUP_TIMINGS)
+    result = await resp.json()
+    assert 'api' in result['components']
+    assert 'setup' in result['components']['api']['phases']
+    assert result['critical_path'][-1] in result['components']
@@ -1,5 +1,6 @@
 """The tests the History component."""
 # pylint: disable=protected-access,invalid-name
+from collections import namedtuple
 from datetime import timedelta
 import unittest
 from unittest.mock import patch, sentinel
@@ -429,6 +430,146 @@ class TestComponentHistory(unittest.TestCase):
                     history.CONF_ENTITIES: ['media_player.test']}}})
         self.check_significant_states(zero, four, states, config)
 
+    def test_get_significant_states_statistics(self):
+        """Test numeric sensors are returned from the statistics."""
+        self.init_recorder()
+        start = dt_util.utcnow().replace(
+            minute=0, second=0, microsecond=0) - timedelta(days=1)
+        attributes = {'unit_of_measurement': 'W', 'friendly_name': 'Power'}
+
+        for minutes, value in ((10, 100), (11, 200), (70, 50)):
+            with patch('homeassistant.core.dt_util.utcnow',
+                       return_value=start + timedelta(minutes=minutes)):
+                self.hass.states.set('sensor.power', value, attributes)
+                self.hass.states.set('light.kitchen', 'on')
+                self.wait_recording_done()
+
+        hist = history.get_significant_states(
+            self.hass, start, include_start_time_state=False, max_points=24)
+
+        assert [state.state for state in hist['sensor.power']] == \
+            ['150.0', '50.0']
+        assert hist['sensor.power'][0].attributes == {
+            'unit_of_measurement': 'W', 'friendly_name': 'Power',
+            'min': 100, 'max': 200, 'last': 200}
+        assert len(hist['light.kitchen']) == 1
+
+        hist = history.get_significant_states(
+            self.hass, start, include_start_time_state=False)
+        assert len(hist['sensor.power']) == 3
+
+    def test_get_significant_states_statistics_partial(self):
+        """Test raw states are returned before the first statistics."""
+        from homeassistant.components.recorder.models import Statistics
+        from homeassistant.components.recorder.util import session_scope
+
+        self.init_recorder()
+        start = dt_util.utcnow().replace(
+            minute=0, second=0, microsecond=0) - timedelta(days=1)
+        attributes = {'unit_of_measurement': 'W'}
+
+        for minutes, value in ((10, 100), (11, 200), (70, 50), (80, 70)):
+            with patch('homeassistant.core.dt_util.utcnow',
+                       return_value=start + timedelta(minutes=minutes)):
+                self.hass.states.set('sensor.power', value, attributes)
+                self.wait_recording_done()
+
+        # Start time state is covered by the statistics
+        hist = history.get_significant_states(
+            self.hass, start + timedelta(minutes=30), max_points=24)
+        assert [state.state for state in hist['sensor.power']] == \
+            ['150.0', '60.0']
+
+        # Like states recorded before the statistics existed
+        with session_scope(hass=self.hass) as session:
+            session.query(Statistics).filter(
+                Statistics.start < start + timedelta(hours=1)).delete()
+
+        hist = history.get_significant_states(
+            self.hass, start + timedelta(minutes=5), max_points=24)
+        assert [state.state for state in hist['sensor.power']] == \
+            ['100', '200', '60.0']
+
+    def test_get_significant_states_minimal_response(self):
+        """Test only the first and last state contain attributes."""
+        zero, four, states = self.record_states()
+        hist = history.get_significant_states(
+            self.hass, zero, four, minimal_response=True)
+
+        mp_states = hist['media_player.test']
+        assert mp_states[0] == states['media_player.test'][0]
+        assert mp_states[-1] == states['media_player.test'][-1]
+
+        therm_states = hist['thermostat.test']
+        assert len(therm_states) == 3
+        assert therm_states[0] == states['thermostat.test'][0]
+        assert therm_states[1] == {
+            'state': '21',
+            'last_changed':
+                states['thermostat.test'][1].last_changed.isoformat(),
+        }
+        assert therm_states[2] == states['thermostat.test'][2]
+
+        assert 'script.cannot_cancel_this_one' not in hist
+        assert len(hist['script.can_cancel_this_one']) == 1
+
+    def test_get_minimal_states_compact_json(self):
+        """Test attributes are decoded from compact JSON."""
+        row = namedtuple('Row', [
+            'entity_id', 'domain', 'state', 'last_changed', 'last_updated',
+            'attributes', 'shared_attrs', 'context_id', 'context_user_id'])
+        now = dt_util.utcnow()
+        rows = [
+            row('light.hidden', 'light', 'on', now, now, None,
+                '{"hidden":true}', None, None),
+            row('light.nested', 'light', 'on', now, now, None,
+                '{"nested":{"hidden": true}}', None, None),
+            row('light.text', 'light', 'on', now, now,
+                '{"text":"\\"hidden\\": true"}', None, None, None),
+            row('script.can_cancel', 'script', 'off', now, now, None,
+                '{"can_cancel":true}', None, None),
+            row('script.cannot_cancel', 'script', 'off', now, now, None,
+                '{"can_cancel":false}', None, None),
+        ]
+
+        hist = history._get_minimal_states(rows)
+
+        assert sorted(hist) == [
+            'light.nested', 'light.text', 'script.can_cancel']
+        assert hist['light.text'][0].attributes == {
+            'text': '"hidden": true'}
+
+    def test_get_minimal_states_decodes_emitted_rows(self):
+        """Test only the attributes of the first and last row are decoded."""
+        row = namedtuple('Row', [
+            'entity_id', 'domain', 'state', 'last_changed', 'last_updated',
+            'attributes', 'shared_attrs', 'context_id', 'context_user_id'])
+        now = dt_util.utcnow()
+        rows = [
+            row('light.kitchen', 'light', str(idx), now, now, None,
+                '{{"brightness":{}}}'.format(idx), None, None)
+            for idx in range(5)]
+
+        with patch('homeassistant.components.history.json.loads',
+                   side_effect=history.json.loads) as mock_loads:
+            hist = history._get_minimal_states(rows)
+
+        assert [call[0][0] for call in mock_loads.call_args_list] == [
+            '{"brightness":0}', '{"brightness":4}']
+        assert hist['light.kitchen'][0].attributes == {'brightness': 0}
+        assert hist['light.kitchen'][2] == {
+            'state': '2', 'last_changed': now.isoformat()}
+        assert hist['light.kitchen'][-1].attributes == {'brightness': 4}
+
+    def test_stream_significant_states(self):
+        """Test streaming significant states grouped by entity."""
+        zero, four, states = self.record_states()
+        hist = {
+            ent_id: list(ent_states) for ent_id, ent_states
+            in history.stream_significant_states(
+                self.hass, zero, four, filters=history.Filters())}
+        assert states == hist
+
     def check_significant_states(self, zero, four, states, config):
         """Check if significant states are retrieved."""
         filters = history.Filters()
@@ -526,3 +667,35 @@ async def test_fetch_period_api(hass, aiohttp_client):
     response = await client.get(
         '/api/history/period/{}'.format(dt_util.utcnow().isoformat()))
     assert response.status == 200
+
+
+async def test_fetch_period_api_invalid_max_points(hass, aiohttp_client):
+    """Test the fetch period view rejects an invalid max_points."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get(
+        '/api/history/period/{}'.format(dt_util.utcnow().isoformat()),
+        params={'max_points': 'many'})
+    assert response.status == 400
+
+
+async def test_fetch_period_api_stream(hass, aiohttp_client):
+    """Test the fetch period view streams the states per entity."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    start = dt_util.utcnow()
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.kitchen', 'off')
+    hass.states.async_set('light.hall', 'on')
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get(
+        '/api/history/period/{}'.format(start.isoformat()))
+    assert response.status == 200
+    result = await response.json()
+    assert [[state['state'] for state in states] for states in result] == \
+        [['on'], ['on', 'off']]
@@ -558,6 +558,27 @@ async def test_logbook_view(hass, aiohttp_client):
     assert response.status == 200
 
 
+async def test_logbook_view_entries(hass, aiohttp_client):
+    """Test the logbook view streams the entries."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'logbook', {})
+    await hass.components.recorder.wait_connection_ready()
+    start = dt_util.utcnow()
+    hass.states.async_set('switch.test', 'off')
+    await hass.async_block_till_done()
+    hass.states.async_set('switch.test', 'on')
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get(
+        '/api/logbook/{}'.format(start.isoformat()))
+    assert response.status == 200
+    entries = await response.json()
+    assert len(entries) == 1
+    assert entries[0]['entity_id'] == 'switch.test'
+    assert entries[0]['message'] == 'turned on'
+
+
 async def test_humanify_alexa_event(hass):
     """Test humanifying Alexa event."""
     hass.states.async_set('light.kitchen', 'on', {
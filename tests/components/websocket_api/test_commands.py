@@ -261,3 +261,104 @@ async def test_call_service_context_no_user(hass, aiohttp_client):
         assert call.service == 'test_service'
         assert call.data == {'hello': 'world'}
         assert call.context.user_id is None
+
+
+async def test_subscribe_entities(hass, websocket_client):
+    """Test subscribe entities command."""
+    hass.states.async_set('light.kitchen', 'on', {'brightness': 100})
+    hass.states.async_set('light.bowl', 'off')
+    hass.states.async_set('switch.fan', 'off')
+    hass.states.async_set('sensor.temperature', '20')
+
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_SUBSCRIBE_ENTITIES,
+        'entity_ids': ['light.kitchen'],
+        'domains': ['switch'],
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == const.TYPE_RESULT
+    assert msg['success']
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == commands.TYPE_EVENT
+    kitchen = hass.states.get('light.kitchen')
+    assert msg['event'] == {
+        'a': {
+            'light.kitchen': {
+                's': 'on',
+                'a': {'brightness': 100},
+                'c': kitchen.context.id,
+                'lu': kitchen.last_updated.timestamp(),
+            },
+            'switch.fan': {
+                's': 'off',
+                'a': {},
+                'c': hass.states.get('switch.fan').context.id,
+                'lu': hass.states.get('switch.fan').last_updated.timestamp(),
+            },
+        }
+    }
+
+    hass.states.async_set('light.bowl', 'on')
+    hass.states.async_set('light.kitchen', 'on', {'color': 'red'})
+
+    msg = await websocket_client.receive_json()
+    kitchen = hass.states.get('light.kitchen')
+    assert msg['event'] == {
+        'c': {
+            'light.kitchen': {
+                '+': {
+                    'a': {'color': 'red'},
+                    'c': kitchen.context.id,
+                    'lu': kitchen.last_updated.timestamp(),
+                },
+                '-': {'a': ['brightness']},
+            }
+        }
+    }
+
+    hass.states.async_remove('switch.fan')
+    msg = await websocket_client.receive_json()
+    assert msg['event'] == {'r': ['switch.fan']}
+
+    await websocket_client.send_json({
+        'id': 6,
+        'type': commands.TYPE_UNSUBSCRIBE_EVENTS,
+        'subscription': 5,
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 6
+    assert msg['success']
+
+
+async def test_subscribe_entities_rate_limit(hass, websocket_client):
+    """Test subscribe entities coalesces changes with a rate limit."""
+    hass.states.async_set('light.kitchen', 'on')
+
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_SUBSCRIBE_ENTITIES,
+        'domains': 'light',
+        'rate_limit': 0.01,
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+    msg = await websocket_client.receive_json()
+    assert list(msg['event']['a']) == ['light.kitchen']
+
+    hass.states.async_set('light.kitchen', 'off')
+    hass.states.async_set('light.kitchen', 'dim')
+    hass.states.async_set('light.bowl', 'on')
+    hass.states.async_remove('light.bowl')
+    hass.states.async_set('light.desk', 'on')
+
+    msg = await websocket_client.receive_json()
+    assert msg['event']['c']['light.kitchen']['+']['s'] == 'dim'
+    assert list(msg['event']['a']) == ['light.desk']
+    assert 'r' not in msg['event']
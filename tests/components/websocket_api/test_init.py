@@ -5,7 +5,8 @@ from unittest.mock import patch, Mock
 from aiohttp import WSMsgType
 import pytest
 
-from homeassistant.components.websocket_api import const, commands, messages
+from homeassistant.components.websocket_api import (
+    const, commands, http, messages)
 
 
 @pytest.fixture
@@ -16,6 +17,14 @@ def mock_low_queue():
         yield
 
 
+@pytest.fixture
+def mock_low_peak():
+    """Mock a low queue peak."""
+    with patch('homeassistant.components.websocket_api.http.PENDING_MSG_PEAK',
+               2):
+        yield
+
+
 @asyncio.coroutine
 def test_invalid_message_format(websocket_client):
     """Test sending invalid JSON."""
@@ -90,3 +99,98 @@ async def test_handler_failing(hass, websocket_client):
     assert msg['type'] == const.TYPE_RESULT
     assert not msg['success']
     assert msg['error']['code'] == const.ERR_UNKNOWN_ERROR
+
+
+def test_coalesce_state_changes():
+    """Test superseded state changes are dropped."""
+    def state_changed(iden, entity_id, state):
+        return {
+            'id': iden,
+            'type': 'event',
+            'event': {
+                'event_type': 'state_changed',
+                'data': {'entity_id': entity_id, 'new_state': state},
+            },
+        }
+
+    pending = [
+        state_changed(1, 'light.kitchen', 'on'),
+        commands.pong_message(2),
+        state_changed(1, 'light.bowl', 'on'),
+        state_changed(3, 'light.kitchen', 'on'),
+        state_changed(1, 'light.kitchen', 'off'),
+        None,
+    ]
+
+    assert http._coalesce_state_changes(pending) == [
+        pending[1], pending[2], pending[3], pending[4], None]
+
+
+async def test_falling_behind_coalesces_state_changes(
+        hass, mock_low_queue, mock_low_peak, websocket_client):
+    """Test a client that falls behind receives the latest states."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_SUBSCRIBE_EVENTS,
+        'event_type': 'state_changed',
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    for idx in range(10):
+        hass.states.async_set('light.kitchen', str(idx))
+
+    msg = await websocket_client.receive_json()
+    assert msg['event']['data']['new_state']['state'] == '9'
+
+    await websocket_client.send_json({
+        'id': 6,
+        'type': commands.TYPE_PING,
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['type'] == commands.TYPE_PONG
+
+
+async def test_keeping_up_receives_all_state_changes(
+        hass, websocket_client):
+    """Test a client that keeps up receives every state change."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_SUBSCRIBE_EVENTS,
+        'event_type': 'state_changed',
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    for idx in range(3):
+        hass.states.async_set('light.kitchen', str(idx))
+
+    for idx in range(3):
+        msg = await websocket_client.receive_json()
+        assert msg['event']['data']['new_state']['state'] == str(idx)
+
+
+async def test_coalesce_messages(hass, websocket_client):
+    """Test pending messages are sent in one frame when supported."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': commands.TYPE_SUPPORTED_FEATURES,
+        'features': {const.FEATURE_COALESCE_MESSAGES: 1},
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    for idx in range(6, 9):
+        await websocket_client.send_json({
+            'id': idx,
+            'type': commands.TYPE_PING,
+        })
+
+    pongs = []
+    while len(pongs) < 3:
+        msg = await websocket_client.receive_json()
+        if isinstance(msg, dict):
+            msg = [msg]
+        pongs.extend(msg)
+
+    assert [pong['id'] for pong in pongs] == [6, 7, 8]
@@ -443,3 +443,56 @@ async def test_set_context_expired(hass):
     assert hass.states.get('hello.world').context != context
     assert ent._context is None
     assert ent._context_set is None
+
+
+async def test_static_attributes(hass):
+    """Test static attributes are read once and shared between states."""
+    class StaticEntity(entity.Entity):
+        """Entity with static attributes."""
+
+        static_attributes = True
+
+        def __init__(self):
+            """Initialize the entity."""
+            self.value = 1
+            self.name_calls = 0
+
+        @property
+        def name(self):
+            """Return the name."""
+            self.name_calls += 1
+            return 'Static'
+
+        @property
+        def state(self):
+            """Return the state."""
+            return self.value
+
+    ent = StaticEntity()
+    ent.hass = hass
+    ent.entity_id = 'test.static'
+    hass.data[DATA_CUSTOMIZE] = EntityValues({
+        'test.static': {ATTR_HIDDEN: True}})
+
+    await ent.async_update_ha_state()
+    first = hass.states.get('test.static')
+    assert first.attributes == {'friendly_name': 'Static', ATTR_HIDDEN: True}
+
+    ent.value = 2
+    await ent.async_update_ha_state()
+    second = hass.states.get('test.static')
+    assert second.state == '2'
+    assert second.attributes is first.attributes
+    assert ent.name_calls == 1
+
+    ent.async_reset_static_attributes()
+    await ent.async_update_ha_state()
+    assert ent.name_calls == 2
+
+    # Reloading the core config replaces the customization
+    hass.data[DATA_CUSTOMIZE] = EntityValues({
+        'test.static': {ATTR_HIDDEN: False}})
+    await ent.async_update_ha_state()
+    assert hass.states.get('test.static').attributes == {
+        'friendly_name': 'Static', ATTR_HIDDEN: False}
+    assert ent.name_calls == 3
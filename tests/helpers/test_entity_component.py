@@ -415,3 +415,33 @@ async def test_unload_entry_fails_if_never_loaded(hass):
 
     with pytest.raises(ValueError):
         await component.async_unload_entry(entry)
+
+
+async def test_get_entity_of_all_platforms(hass):
+    """Test looking up entities added by the component and platforms."""
+    mock_setup_entry = Mock(return_value=mock_coro(True))
+    loader.set_component(
+        hass, 'test_domain.entry_domain',
+        MockPlatform(async_setup_entry=mock_setup_entry))
+
+    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    entry = MockConfigEntry(domain='entry_domain')
+
+    assert await component.async_setup_entry(entry)
+    add_entities = mock_setup_entry.mock_calls[0][1][2]
+    add_entities([MockEntity(name='platform')])
+    await component.async_add_entities([MockEntity(name='component')])
+    await hass.async_block_till_done()
+
+    platform_entity = component.get_entity('test_domain.platform')
+    component_entity = component.get_entity('test_domain.component')
+    assert platform_entity.name == 'platform'
+    assert component_entity.name == 'component'
+    assert component.get_entity('test_domain.non_exist') is None
+    assert sorted(ent.entity_id for ent in component.entities) == [
+        'test_domain.component', 'test_domain.platform']
+
+    assert await component.async_unload_entry(entry)
+
+    assert component.get_entity('test_domain.platform') is None
+    assert list(component.entities) == [component_entity]
@@ -10,9 +10,14 @@ import pytest
 from homeassistant.core import callback
 from homeassistant.setup import setup_component
 import homeassistant.core as ha
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import (
+    EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL)
 from homeassistant.helpers.event import (
     async_call_later,
+    async_track_point_in_utc_time,
+    async_track_state_change,
+    async_track_template,
+    async_track_utc_time_change,
     call_later,
     track_point_in_utc_time,
     track_point_in_time,
@@ -24,12 +29,14 @@ from homeassistant.helpers.event import (
     track_same_state,
     track_sunrise,
     track_sunset,
+    _TimePattern,
 )
 from homeassistant.helpers.template import Template
 from homeassistant.components import sun
 import homeassistant.util.dt as dt_util
 
-from tests.common import get_test_home_assistant, fire_time_changed
+from tests.common import (
+    async_fire_time_changed, get_test_home_assistant, fire_time_changed)
 from unittest.mock import patch
 
 
@@ -680,3 +687,268 @@ def test_async_call_later(hass):
     assert p_action is action
     assert p_point == now + timedelta(seconds=3)
     assert remove is mock()
+
+
+async def test_track_state_change_single_bus_listener(hass):
+    """Test state change listeners share a single bus listener."""
+    kitchen_runs = []
+    all_runs = []
+
+    @callback
+    def kitchen_listener(entity_id, old_state, new_state):
+        kitchen_runs.append(entity_id)
+
+    @callback
+    def all_listener(entity_id, old_state, new_state):
+        all_runs.append(entity_id)
+
+    unsub_kitchen = async_track_state_change(
+        hass, ['light.Kitchen', 'light.kitchen'], kitchen_listener)
+    unsub_all = async_track_state_change(hass, MATCH_ALL, all_listener)
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.bowl', 'on')
+    await hass.async_block_till_done()
+    assert kitchen_runs == ['light.kitchen']
+    assert all_runs == ['light.kitchen', 'light.bowl']
+
+    unsub_kitchen()
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    assert kitchen_runs == ['light.kitchen']
+    assert len(all_runs) == 3
+
+    unsub_all()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_track_state_change_remove_during_dispatch(hass):
+    """Test a failing or removed listener does not affect the others."""
+    runs = []
+    unsubs = []
+
+    @callback
+    def failing_listener(entity_id, old_state, new_state):
+        for unsub in unsubs:
+            unsub()
+        raise ValueError
+
+    @callback
+    def listener(entity_id, old_state, new_state):
+        runs.append(entity_id)
+
+    async_track_state_change(hass, 'light.kitchen', failing_listener)
+    unsubs.append(async_track_state_change(hass, 'light.kitchen', listener))
+
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+    assert runs == ['light.kitchen']
+
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    assert runs == ['light.kitchen']
+
+
+async def test_track_point_in_utc_time_single_bus_listener(hass):
+    """Test pending timers share a single time changed listener."""
+    runs = []
+    now = dt_util.utcnow()
+
+    @callback
+    def action(now):
+        runs.append(now)
+
+    unsubs = [
+        async_track_point_in_utc_time(
+            hass, action, now + timedelta(seconds=idx))
+        for idx in range(1, 11)]
+    assert hass.bus.async_listeners()[EVENT_TIME_CHANGED] == 1
+
+    # Removing more than half of the timers compacts the heap
+    for unsub in unsubs[:6]:
+        unsub()
+    assert len(hass.data['timer_scheduler'].timers) == 4
+
+    async_fire_time_changed(hass, now + timedelta(seconds=8))
+    await hass.async_block_till_done()
+    assert runs == [now + timedelta(seconds=8)] * 2
+
+    # Removing a timer that already ran does nothing
+    unsubs[6]()
+
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert len(runs) == 4
+    assert EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+def test_time_pattern_next_time():
+    """Test computing the next time a pattern matches."""
+    pattern = _TimePattern(None, None, None, '/2', 30, 0, False)
+    now = datetime(2014, 5, 24, 22, 45, 10, 500, tzinfo=dt_util.UTC)
+
+    assert pattern.next_time(now) == \
+        datetime(2014, 5, 25, 0, 30, 0, tzinfo=dt_util.UTC)
+    assert pattern.next_time(now.replace(minute=30, second=0)) == \
+        datetime(2014, 5, 24, 22, 30, 0, tzinfo=dt_util.UTC)
+    assert pattern.matches(datetime(2014, 5, 24, 22, 30, 0, 500,
+                                    tzinfo=dt_util.UTC))
+    assert not pattern.matches(now)
+
+    pattern = _TimePattern(None, 2, 30, None, None, None, False)
+    assert pattern.next_time(now) is None
+
+
+def test_time_pattern_next_time_dst():
+    """Test computing the next local time across DST changes."""
+    orig_time_zone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone('Europe/Amsterdam'))
+
+    try:
+        pattern = _TimePattern(None, None, None, 2, 30, 0, True)
+
+        # 02:30 does not exist on the day DST starts
+        now = datetime(2018, 3, 24, 12, 0, 0, tzinfo=dt_util.UTC)
+        next_time = pattern.next_time(now)
+        assert next_time == datetime(2018, 3, 25, 0, 30, 0,
+                                     tzinfo=dt_util.UTC)
+        assert not pattern.matches(next_time)
+        next_time = pattern.next_time(next_time + timedelta(seconds=1))
+        assert next_time == datetime(2018, 3, 25, 1, 30, 0,
+                                     tzinfo=dt_util.UTC)
+        assert not pattern.matches(next_time)
+        assert pattern.next_time(next_time + timedelta(seconds=1)) == \
+            datetime(2018, 3, 26, 0, 30, 0, tzinfo=dt_util.UTC)
+
+        # 02:30 occurs twice on the day DST ends, both are used
+        now = datetime(2018, 10, 27, 12, 0, 0, tzinfo=dt_util.UTC)
+        next_time = pattern.next_time(now)
+        assert next_time == datetime(2018, 10, 28, 0, 30, 0,
+                                     tzinfo=dt_util.UTC)
+        assert pattern.matches(next_time)
+        next_time = pattern.next_time(next_time + timedelta(seconds=1))
+        assert next_time == datetime(2018, 10, 28, 1, 30, 0,
+                                     tzinfo=dt_util.UTC)
+        assert pattern.matches(next_time)
+    finally:
+        dt_util.set_default_time_zone(orig_time_zone)
+
+
+def test_time_pattern_next_time_dst_fall_back():
+    """Test no match is skipped while the clock is set back."""
+    orig_time_zone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone('Europe/Amsterdam'))
+
+    try:
+        pattern = _TimePattern(None, None, None, None, '/5', 0, True)
+        now = datetime(2018, 10, 28, 0, 50, 0, tzinfo=dt_util.UTC)
+        end = datetime(2018, 10, 28, 2, 30, 0, tzinfo=dt_util.UTC)
+
+        expected = []
+        point_in_time = now
+        while point_in_time < end:
+            if pattern.matches(point_in_time):
+                expected.append(point_in_time)
+            point_in_time += timedelta(seconds=1)
+
+        next_times = []
+        next_time = pattern.next_time(now)
+        while next_time < end:
+            next_times.append(next_time)
+            next_time = pattern.next_time(next_time + timedelta(seconds=1))
+
+        assert len(expected) == 20
+        assert next_times == expected
+    finally:
+        dt_util.set_default_time_zone(orig_time_zone)
+
+
+async def test_track_utc_time_change_scheduled(hass):
+    """Test a time pattern only listens when it is due."""
+    runs = []
+    now = datetime(2018, 3, 24, 12, 0, 10, tzinfo=dt_util.UTC)
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        unsub = async_track_utc_time_change(
+            hass, callback(lambda now: runs.append(now)), second=30)
+
+    scheduler = hass.data['timer_scheduler']
+    assert len(scheduler.timers) == 1
+    assert scheduler.timers[0][0] == now.replace(second=30)
+
+    async_fire_time_changed(hass, now.replace(second=30))
+    await hass.async_block_till_done()
+    assert runs == [now.replace(second=30)]
+    assert scheduler.timers[0][0] == now.replace(minute=1, second=30)
+
+    # The same second does not run the action twice
+    async_fire_time_changed(hass, now.replace(second=30))
+    await hass.async_block_till_done()
+    assert len(runs) == 1
+
+    # Setting the clock back reschedules the pattern
+    async_fire_time_changed(hass, now.replace(hour=11, second=30))
+    await hass.async_block_till_done()
+    assert len(runs) == 2
+
+    unsub()
+    assert EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_track_template_tracks_read_states(hass):
+    """Test a template only listens to the states it read."""
+    runs = []
+    template = Template(
+        "{{ is_state('switch.main', 'on') and "
+        "states.light.kitchen.state == 'on' }}", hass)
+
+    hass.states.async_set('switch.main', 'off')
+    hass.states.async_set('light.kitchen', 'on')
+
+    @callback
+    def action(entity_id, old_state, new_state):
+        runs.append(entity_id)
+
+    unsub = async_track_template(hass, template, action)
+    dispatcher = hass.data['state_change_dispatcher']
+    assert set(dispatcher.listeners) == {'switch.main'}
+    assert not dispatcher.match_all_listeners
+
+    hass.states.async_set('switch.main', 'on')
+    await hass.async_block_till_done()
+    assert runs == ['switch.main']
+    assert set(dispatcher.listeners) == {'switch.main', 'light.kitchen'}
+
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+    hass.states.async_set('light.other', 'on')
+    await hass.async_block_till_done()
+    assert runs == ['switch.main', 'light.kitchen']
+
+    unsub()
+    assert not dispatcher.listeners
+
+
+async def test_track_template_domain(hass):
+    """Test a template iterating a domain listens to all state changes."""
+    runs = []
+    template = Template(
+        "{{ states.light | selectattr('state', 'eq', 'on') | list | count "
+        "== 2 }}", hass)
+
+    @callback
+    def action(entity_id, old_state, new_state):
+        runs.append(entity_id)
+
+    async_track_template(hass, template, action)
+
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+    hass.states.async_set('switch.main', 'on')
+    await hass.async_block_till_done()
+    hass.states.async_set('light.bowl', 'on')
+    await hass.async_block_till_done()
+    assert runs == ['light.bowl']
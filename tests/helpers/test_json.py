@@ -1,8 +1,11 @@
 """Test Home Assistant remote methods and classes."""
+import json
+
 import pytest
 
 from homeassistant import core
-from homeassistant.helpers.json import JSONEncoder
+from homeassistant.helpers import json as json_helper
+from homeassistant.helpers.json import JSONEncoder, json_dumps
 from homeassistant.util import dt as dt_util
 
 
@@ -19,3 +22,59 @@ def test_json_encoder(hass):
 
     now = dt_util.utcnow()
     assert ha_json_enc.default(now) == now.isoformat()
+
+
+def test_json_dumps_splices_states():
+    """Test the cached JSON of states is spliced into messages."""
+    state = core.State('test.test', 'hello', {'list': [1, 2]})
+    message = {'id': 5, 'states': [state, state], 'when': dt_util.utcnow()}
+
+    assert json.loads(json_dumps(message)) == \
+        json.loads(json.dumps(message, cls=JSONEncoder))
+    assert json_dumps(message).count(state.as_json()) == 2
+    assert json_dumps({'id': 5}, backend='json') == '{"id": 5}'
+
+
+@pytest.mark.parametrize('backend', list(json_helper.BACKENDS))
+def test_json_dumps_sorted_states(backend):
+    """Test states are encoded like the rest of a sorted message."""
+    state = core.State('test.test', 'hello', {'b': 1, 'a': 2})
+    message = {'id': 5, 'states': [state]}
+
+    encoded = json_dumps(message, sort_keys=True, backend=backend)
+    assert encoded.index('"attributes"') < encoded.index('"entity_id"')
+    assert encoded.index('"a"') < encoded.index('"b"')
+
+    assert json_dumps(message, sort_keys=True, pretty=True,
+                      backend=backend) == \
+        json.dumps(message, sort_keys=True, indent=4, cls=JSONEncoder)
+
+
+def test_json_dumps_placeholder_in_message():
+    """Test a message containing the placeholder is encoded correctly."""
+    state = core.State('test.test', 'hello')
+    message = {'text': '\x00fragment\x00', 'state': state}
+
+    assert json.loads(json_dumps(message, sort_keys=True)) == \
+        json.loads(json.dumps(message, sort_keys=True, cls=JSONEncoder))
+
+
+@pytest.mark.parametrize('backend', list(json_helper.BACKENDS))
+def test_json_dumps_backends(backend):
+    """Test the serializers encode Home Assistant objects the same."""
+    now = dt_util.utcnow()
+    state = core.State('test.test', 'hello', {'when': now})
+    message = {'b': {1, 2}, 'a': [state], 'when': now, 'key': {1: 'one'}}
+
+    encoded = json_dumps(message, sort_keys=True, backend=backend)
+    assert encoded.index('"a"') < encoded.index('"b"')
+    assert json.loads(encoded) == json.loads(
+        json.dumps(message, sort_keys=True, cls=JSONEncoder))
+
+    assert json.loads(json_dumps(message, pretty=True, backend=backend)) == \
+        json.loads(encoded)
+    assert json_dumps({'a': [1]}, pretty=True, backend=backend) == \
+        json.dumps({'a': [1]}, indent=4)
+
+    with pytest.raises(TypeError):
+        json_dumps({'a': object()}, backend=backend)
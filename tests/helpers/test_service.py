@@ -2,7 +2,9 @@
 import asyncio
 from copy import deepcopy
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+
+import pytest
 
 # To prevent circular import when running just this file
 import homeassistant.components  # noqa
@@ -12,7 +14,7 @@ from homeassistant.helpers import service, template
 from homeassistant.setup import async_setup_component
 import homeassistant.helpers.config_validation as cv
 
-from tests.common import get_test_home_assistant, mock_service
+from tests.common import get_test_home_assistant, mock_service, MockEntity
 
 
 class TestServiceHelpers(unittest.TestCase):
@@ -179,3 +181,69 @@ def test_async_get_all_descriptions(hass):
 
     assert 'description' in descriptions[logger.DOMAIN]['set_level']
     assert 'fields' in descriptions[logger.DOMAIN]['set_level']
+
+
+def _mock_entities(hass, parallel_updates):
+    """Return a mock platform with entities sharing parallel updates."""
+    entities = {}
+    for number in range(3):
+        entity = MockEntity(
+            entity_id='light.test_{}'.format(number), should_poll=False)
+        entity.hass = hass
+        entity.parallel_updates = parallel_updates
+        entities[entity.entity_id] = entity
+    return Mock(entities=entities)
+
+
+async def _async_concurrent_calls(hass, platform):
+    """Return the most entities handling a service call at the same time."""
+    running = []
+    most_running = 0
+
+    async def handle(entity, call):
+        """Handle the call of an entity."""
+        nonlocal most_running
+        running.append(entity)
+        most_running = max(most_running, len(running))
+        await asyncio.sleep(0)
+        running.remove(entity)
+
+    await service.entity_service_call(
+        hass, [platform], handle, ha.ServiceCall('light', 'turn_on'))
+
+    return most_running
+
+
+async def test_entity_service_call_concurrent(hass):
+    """Test the entities of a platform are called concurrently."""
+    platform = _mock_entities(hass, None)
+
+    assert await _async_concurrent_calls(hass, platform) == 3
+
+
+async def test_entity_service_call_parallel_updates(hass):
+    """Test entity calls are limited by the parallel updates."""
+    platform = _mock_entities(hass, asyncio.Semaphore(2, loop=hass.loop))
+
+    assert await _async_concurrent_calls(hass, platform) == 2
+
+
+async def test_entity_service_call_exception(hass):
+    """Test all entities are called when one of them raises."""
+    platform = _mock_entities(hass, None)
+    called = []
+
+    async def handle(entity, call):
+        """Handle the call of an entity."""
+        called.append(entity.entity_id)
+        if entity.entity_id == 'light.test_1':
+            raise ValueError
+
+    with pytest.raises(ValueError):
+        await service.entity_service_call(
+            hass, [platform], handle, ha.ServiceCall('light', 'turn_on', {
+                ATTR_ENTITY_ID: ['light.test_0', 'light.test_1',
+                                 'light.test_2'],
+            }))
+
+    assert sorted(called) == ['light.test_0', 'light.test_1', 'light.test_2']
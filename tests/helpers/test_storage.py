@@ -1,6 +1,8 @@
 """Tests for the storage helper."""
 import asyncio
 from datetime import timedelta
+import json
+import os
 from unittest.mock import patch
 
 import pytest
@@ -176,3 +178,101 @@ async def test_migrator_transforming_config(hass, store, hass_storage):
         'version': MOCK_VERSION,
         'data': data,
     }
+
+
+async def test_journal_save(hass, hass_storage):
+    """Test changes are journaled once the data file has been written."""
+    store = storage.Store(hass, MOCK_VERSION, MOCK_KEY, journal=True)
+    items = [{'id': 'a', 'value': 1}]
+
+    def data_func():
+        """Return the data to save."""
+        return {'items': list(items)}
+
+    # Without a data file the data is saved with a delay
+    items.append({'id': 'b', 'value': 2})
+    store.async_journal_save(
+        data_func, [storage.journal_set('items', 'id', items[-1])], 1)
+    await hass.async_block_till_done()
+    assert store.key not in hass_storage
+
+    async_fire_time_changed(hass, dt.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert hass_storage[store.key]['data'] == {'items': items}
+    assert hass_storage[store.key]['journal'] == 1
+
+    items[0] = {'id': 'a', 'value': 3}
+    items.pop(1)
+    with patch('homeassistant.helpers.storage.Store._write_data') as \
+            mock_write:
+        store.async_journal_save(data_func, [
+            storage.journal_set('items', 'id', items[0]),
+            storage.journal_remove('items', 'id', 'b'),
+        ], 1)
+        await hass.async_block_till_done()
+
+    assert not mock_write.mock_calls
+    assert hass_storage[store.key]['data'] == {
+        'items': [{'id': 'a', 'value': 3}]}
+
+    # The journal is compacted into the data file
+    async_fire_time_changed(hass, dt.utcnow() + timedelta(
+        seconds=storage.JOURNAL_COMPACT_DELAY))
+    await hass.async_block_till_done()
+    assert hass_storage[store.key]['journal'] == 2
+
+
+async def test_journal_compacted_when_full(hass, hass_storage):
+    """Test the journal is compacted once it holds too many records."""
+    store = storage.Store(hass, MOCK_VERSION, MOCK_KEY, journal=True)
+    await store.async_save({'items': []})
+
+    with patch.object(storage, 'JOURNAL_MAX_RECORDS', 2):
+        for value in range(2):
+            store.async_journal_save(lambda: {'items': ['full']}, [
+                storage.journal_set('items', 'id', {'id': value})])
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt.utcnow())
+        await hass.async_block_till_done()
+
+    assert hass_storage[store.key]['data'] == {'items': ['full']}
+    assert hass_storage[store.key]['journal'] == 2
+
+
+async def test_journal_replay(hass, tmpdir):
+    """Test the journal is replayed when loading the data file."""
+    hass.config.config_dir = str(tmpdir)
+    store = storage.Store(hass, MOCK_VERSION, MOCK_KEY, journal=True)
+    os.makedirs(os.path.dirname(store.path))
+
+    with open(store.path, 'w') as fdesc:
+        json.dump({
+            'version': MOCK_VERSION,
+            'key': MOCK_KEY,
+            'journal': 3,
+            'data': {'items': [{'id': 'a'}, {'id': 'b'}]},
+        }, fdesc)
+
+    def write_journal(journal_id, *records):
+        """Write a journal with an interrupted last write."""
+        with open(store.journal_path, 'w') as fdesc:
+            fdesc.write(''.join('\n' + json.dumps(record) for record in
+                                ({'journal': journal_id},) + records))
+            fdesc.write('\n{"op": "set", "li')
+
+    write_journal(
+        3,
+        storage.journal_remove('items', 'id', 'a'),
+        storage.journal_set('items', 'id', {'id': 'c'}),
+        storage.journal_set('items', 'id', {'id': 'b', 'name': 'B'}))
+
+    data, started = store._load_data()
+    assert started
+    assert data['data'] == {'items': [{'id': 'b', 'name': 'B'}, {'id': 'c'}]}
+
+    # A journal left behind by an earlier data file is ignored
+    write_journal(2, storage.journal_remove('items', 'id', 'b'))
+
+    data, started = store._load_data()
+    assert not started
+    assert data['data'] == {'items': [{'id': 'a'}, {'id': 'b'}]}
@@ -1049,3 +1049,74 @@ def test_length_of_states(hass):
 
     tpl = template.Template('{{ states.sensor | length }}', hass)
     assert tpl.async_render() == '2'
+
+
+async def test_render_to_info(hass):
+    """Test collecting the states read by a render."""
+    hass.states.async_set('sensor.test', '23')
+    hass.states.async_set('light.kitchen', 'on')
+
+    info = template.Template(
+        "{{ states('sensor.test') }} {{ is_state('light.Kitchen', 'on') }} "
+        "{{ state_attr('switch.missing', 'name') }}", hass
+    ).async_render_to_info()
+    assert info.result == '23 True None'
+    assert info.entities == {'sensor.test', 'light.kitchen', 'switch.missing'}
+    assert not info.domains
+    assert not info.all_states
+    assert info.filter('light.kitchen')
+    assert not info.filter('light.bowl')
+
+    info = template.Template(
+        '{{ states.light | list | length }}', hass).async_render_to_info()
+    assert info.domains == {'light'}
+    assert info.filter('light.bowl')
+    assert not info.filter('sensor.test')
+
+    info = template.Template(
+        '{{ states | length }}', hass).async_render_to_info()
+    assert info.all_states
+    assert info.filter('sensor.test')
+
+    info = template.Template(
+        '{{ states.sensor.test.state | float | bad_filter }}', hass
+    ).async_render_to_info()
+    assert info.exception is not None
+
+
+async def test_compiled_templates_shared(hass):
+    """Test that identical template sources share compiled code."""
+    tpl = template.Template('{{ value | int + 1 }}', hass)
+    other = template.Template('{{ value | int + 1 }}', hass)
+
+    assert tpl.async_render(value='1') == '2'
+    assert other.async_render(value='2') == '3'
+    assert tpl._compiled_code is other._compiled_code
+    assert tpl._compiled is other._compiled
+
+
+async def test_render_with_possible_json_value_memoized(hass):
+    """Test that renders of templates not reading states are remembered."""
+    tpl = template.Template('{{ value_json.temp }}', hass)
+
+    with patch.object(template.json, 'loads',
+                      side_effect=template.json.loads) as mock_loads:
+        assert tpl.async_render_with_possible_json_value(
+            '{"temp": 21}') == '21'
+        assert tpl.async_render_with_possible_json_value(
+            '{"temp": 21}') == '21'
+        assert tpl.async_render_with_possible_json_value(
+            '{"temp": 22}') == '22'
+
+    assert mock_loads.call_count == 2
+
+    hass.states.async_set('sensor.offset', '2')
+    tpl = template.Template(
+        "{{ value | int + states('sensor.offset') | int }}", hass)
+    assert tpl.async_render_with_possible_json_value('1') == '3'
+    hass.states.async_set('sensor.offset', '3')
+    assert tpl.async_render_with_possible_json_value('1') == '4'
+
+    tpl = template.Template('{{ now().year }} {{ value }}', hass)
+    tpl.ensure_valid()
+    assert tpl._render_cache is None
@@ -6,10 +6,11 @@ from unittest.mock import Mock, patch
 import logging
 
 import homeassistant.config as config_util
-from homeassistant import bootstrap
+from homeassistant import bootstrap, loader
 import homeassistant.util.dt as dt_util
 
-from tests.common import patch_yaml_files, get_test_config_dir, mock_coro
+from tests.common import (
+    patch_yaml_files, get_test_config_dir, mock_coro, MockModule)
 
 ORIG_TIMEZONE = dt_util.DEFAULT_TIME_ZONE
 VERSION_PATH = os.path.join(get_test_config_dir(), config_util.VERSION_FILE)
@@ -52,6 +53,73 @@ def test_home_assistant_core_config_validation(hass):
     assert result is None
 
 
+@patch(
+    'homeassistant.bootstrap.conf_util.process_ha_config_upgrade', Mock())
+@patch('homeassistant.bootstrap.async_enable_logging', Mock())
+async def test_stage_2_waits_for_stage_1_tasks(hass):
+    """Test stage 2 is set up after the tasks of stage 1 finished."""
+    order = []
+
+    async def async_setup_first(hass, config):
+        """Import a config entry, like MQTT does."""
+        async def import_entry():
+            await asyncio.sleep(0.1)
+            order.append('first')
+
+        hass.async_create_task(import_entry())
+        return True
+
+    async def async_setup_second(hass, config):
+        """Set up a component that relies on the first one."""
+        order.append('second')
+        return True
+
+    loader.set_component(hass, 'first', MockModule(
+        'first', async_setup=async_setup_first))
+    loader.set_component(hass, 'second', MockModule(
+        'second', async_setup=async_setup_second))
+
+    with patch('homeassistant.bootstrap.FIRST_INIT_COMPONENT', {'first'}):
+        await bootstrap.async_from_config_dict({
+            'homeassistant': {}, 'first': {}, 'second': {}}, hass)
+
+    assert order == ['first', 'second']
+
+
+@patch('homeassistant.bootstrap.MAX_PARALLEL_SETUPS', 2)
+async def test_setup_components_in_dependency_order(hass):
+    """Test components are set up after their dependencies, bounded."""
+    running = []
+    order = []
+    most_running = 0
+
+    def mock_async_setup(domain):
+        """Return a setup that records when it runs."""
+        async def async_setup(hass, config):
+            """Set up the component."""
+            nonlocal most_running
+            running.append(domain)
+            most_running = max(most_running, len(running))
+            await asyncio.sleep(0.01)
+            running.remove(domain)
+            order.append(domain)
+            return True
+        return async_setup
+
+    loader.set_component(hass, 'comp', MockModule(
+        'comp', dependencies=['dep'], async_setup=mock_async_setup('comp')))
+    for domain in ('dep', 'other_1', 'other_2'):
+        loader.set_component(hass, domain, MockModule(
+            domain, async_setup=mock_async_setup(domain)))
+
+    await bootstrap._async_setup_components(
+        hass, ['comp', 'other_1', 'other_2'], {})
+
+    assert sorted(order) == ['comp', 'dep', 'other_1', 'other_2']
+    assert order.index('dep') < order.index('comp')
+    assert most_running == 2
+
+
 def test_from_config_dict_not_mount_deps_folder(loop):
     """Test that we do not mount the deps folder inside from_config_dict."""
     with patch('homeassistant.bootstrap.is_virtual_env', return_value=False), \
@@ -1,6 +1,7 @@
 """Test to verify that Home Assistant core works."""
 # pylint: disable=protected-access
 import asyncio
+import json
 import logging
 import os
 import unittest
@@ -21,7 +22,8 @@ from homeassistant.const import (
     __version__, EVENT_STATE_CHANGED, ATTR_FRIENDLY_NAME, CONF_UNIT_SYSTEM,
     ATTR_NOW, EVENT_TIME_CHANGED, EVENT_HOMEASSISTANT_STOP,
     EVENT_HOMEASSISTANT_CLOSE, EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED,
-    EVENT_SERVICE_EXECUTED)
+    EVENT_SERVICE_EXECUTED, EVENT_CALL_SERVICE, ATTR_DOMAIN, ATTR_SERVICE,
+    ATTR_SERVICE_CALL_ID)
 
 from tests.common import get_test_home_assistant, async_mock_service
 
@@ -80,6 +82,66 @@ def test_async_create_task_schedule_coroutine(mock_iscoro):
     assert len(hass.add_job.mock_calls) == 0
 
 
+def test_hass_job_types():
+    """Test the job type is determined when the job is created."""
+    @ha.callback
+    def callback_job():
+        """Run as callback."""
+
+    async def coroutine_job():
+        """Run as coroutine."""
+
+    def executor_job():
+        """Run in executor."""
+
+    assert ha.HassJob(callback_job).job_type == ha.HassJobType.Callback
+    assert ha.HassJob(coroutine_job).job_type == \
+        ha.HassJobType.Coroutinefunction
+    assert ha.HassJob(executor_job).job_type == ha.HassJobType.Executor
+
+    coro = coroutine_job()
+    with pytest.raises(ValueError):
+        ha.HassJob(coro)
+    coro.close()
+
+
+def test_async_add_hass_job_schedule_callback():
+    """Test that callback jobs are scheduled on the loop."""
+    hass = MagicMock()
+    job = MagicMock()
+
+    ha.HomeAssistant.async_add_hass_job(hass, ha.HassJob(ha.callback(job)))
+    assert len(hass.loop.call_soon.mock_calls) == 1
+    assert len(hass.loop.create_task.mock_calls) == 0
+    assert len(hass._pending_tasks.append.mock_calls) == 0
+
+
+def test_async_add_hass_job_schedule_coroutinefunction():
+    """Test that coroutine function jobs are scheduled as task."""
+    hass = MagicMock()
+
+    async def job():
+        """Run as coroutine."""
+
+    ha.HomeAssistant.async_add_hass_job(hass, ha.HassJob(job))
+    assert len(hass.loop.call_soon.mock_calls) == 0
+    assert len(hass.loop.create_task.mock_calls) == 1
+    hass.loop.create_task.mock_calls[0][1][0].close()
+
+
+def test_async_add_hass_job_add_threaded_job_to_pool():
+    """Test that executor jobs are run in the executor."""
+    hass = MagicMock()
+
+    def job():
+        """Run in executor."""
+
+    ha.HomeAssistant.async_add_hass_job(hass, ha.HassJob(job))
+    assert len(hass.loop.call_soon.mock_calls) == 0
+    assert len(hass.loop.create_task.mock_calls) == 0
+    assert len(hass.loop.run_in_executor.mock_calls) == 1
+
+
 def test_async_run_job_calls_callback():
     """Test that the callback annotation is respected."""
     hass = MagicMock()
@@ -319,6 +381,38 @@ class TestEventBus(unittest.TestCase):
         # Should do nothing now
         unsub()
 
+    def test_dispatch_cache_updated(self):
+        """Test listeners added after firing receive events."""
+        calls = []
+
+        @ha.callback
+        def listener(event):
+            """Mock listener."""
+            calls.append(event.event_type)
+
+        self.bus.fire('test')
+        self.hass.block_till_done()
+
+        unsub_all = self.bus.listen(ha.MATCH_ALL, listener)
+        self.bus.fire('test')
+        self.hass.block_till_done()
+        assert calls == ['test']
+
+        unsub = self.bus.listen('test', listener)
+        self.bus.fire('test')
+        self.hass.block_till_done()
+        assert calls == ['test'] * 3
+
+        unsub_all()
+        self.bus.fire('test')
+        self.hass.block_till_done()
+        assert calls == ['test'] * 4
+
+        unsub()
+        self.bus.fire('test')
+        self.hass.block_till_done()
+        assert calls == ['test'] * 4
+
     def test_unsubscribe_listener(self):
         """Test unsubscribe listener from returned function."""
         calls = []
@@ -471,6 +565,16 @@ class TestState(unittest.TestCase):
         state = ha.State('domain.hello', 'world', {'some': 'attr'})
         self.assertEqual(state, ha.State.from_dict(state.as_dict()))
 
+    def test_as_json_cached(self):
+        """Test the JSON of a state is created once."""
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        assert state.as_json() is state.as_json()
+        assert ha.State.from_dict(json.loads(state.as_json())) == state
+
+        state_dict = state.as_dict()
+        state_dict['attributes']['some'] = 'changed'
+        assert state.as_dict()['attributes'] == {'some': 'attr'}
+
     def test_dict_conversion_with_wrong_data(self):
         """Test conversion with wrong data."""
         self.assertIsNone(ha.State.from_dict(None))
@@ -1013,3 +1117,80 @@ async def test_service_executed_with_subservices(hass):
     assert [call.service for call in calls] == [
         'outer', 'inner', 'inner', 'outer']
     assert len(hass.bus.async_listeners().get(EVENT_SERVICE_EXECUTED, [])) == 0
+
+
+async def test_service_called_directly(hass):
+    """Test services are called directly and the call is notified."""
+    calls = async_mock_service(hass, 'test', 'service')
+    events = []
+
+    @ha.callback
+    def record_event(event):
+        """Record the call_service events."""
+        events.append(event)
+
+    hass.bus.async_listen(EVENT_CALL_SERVICE, record_event)
+
+    assert await hass.services.async_call(
+        'test', 'service', {'hello': 'world'}, blocking=True)
+    assert len(calls) == 1
+    assert calls[0].data == {'hello': 'world'}
+
+    await hass.async_block_till_done()
+    assert len(events) == 1
+    assert events[0].data == {
+        'domain': 'test', 'service': 'service',
+        'service_data': {'hello': 'world'}}
+
+    # Local events only notify of the call
+    hass.bus.async_fire(EVENT_CALL_SERVICE, {
+        ATTR_DOMAIN: 'test', ATTR_SERVICE: 'service'})
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+
+async def test_service_called_by_remote_event(hass):
+    """Test call_service events of remote instances execute the service."""
+    calls = async_mock_service(hass, 'test', 'service')
+    executed = []
+
+    @ha.callback
+    def record_event(event):
+        """Record the service_executed events."""
+        executed.append(event)
+
+    hass.bus.async_listen(EVENT_SERVICE_EXECUTED, record_event)
+
+    hass.bus.async_fire(EVENT_CALL_SERVICE, {
+        ATTR_DOMAIN: 'test', ATTR_SERVICE: 'service',
+        ATTR_SERVICE_CALL_ID: 'abcd'}, ha.EventOrigin.remote)
+    await hass.async_block_till_done()
+
+    assert len(calls) == 1
+    assert len(executed) == 1
+    assert executed[0].data == {ATTR_SERVICE_CALL_ID: 'abcd'}
+
+
+async def test_blocking_service_call_fails(hass):
+    """Test a blocking call returns False when the service raises."""
+    async def failing_service(call):
+        """Raise an error."""
+        raise ValueError
+
+    hass.services.async_register('test', 'fail', failing_service)
+
+    assert not await hass.services.async_call('test', 'fail', blocking=True)
+
+
+async def test_state_machine_shares_attributes(hass):
+    """Test equal attributes are shared between the states of an entity."""
+    hass.states.async_set('light.bowl', 'on', {'brightness': 100})
+    first = hass.states.get('light.bowl')
+
+    hass.states.async_set('light.bowl', 'off', {'brightness': 100})
+    second = hass.states.get('light.bowl')
+    assert second.attributes is first.attributes
+
+    # Passing the shared attributes again is not a change
+    hass.states.async_set('light.bowl', 'off', second.attributes)
+    assert hass.states.get('light.bowl') is second
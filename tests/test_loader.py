@@ -2,6 +2,7 @@
 # pylint: disable=protected-access
 import asyncio
 import unittest
+from unittest.mock import patch
 
 import pytest
 
@@ -134,3 +135,39 @@ async def test_log_warning_custom_component(hass, caplog):
 
     loader.get_component(hass, 'light.test')
     assert 'You are using a custom component for light.test' in caplog.text
+
+
+async def test_get_manifest_from_index(hass):
+    """Test the manifest of built-in modules is read from the index."""
+    assert loader.get_manifest(hass, 'light.hue', load_module=False) is None
+
+    await hass.async_add_executor_job(loader.load_manifest_index, hass)
+
+    with patch('homeassistant.loader.get_component') as mock_get:
+        manifest = loader.get_manifest(hass, 'light.hue')
+
+    assert not mock_get.called
+    assert manifest.name == 'light.hue'
+    assert manifest.dependencies == ['hue']
+    assert manifest.requirements == []
+
+    loader.set_component(
+        hass, 'light.hue', MockModule('hue', ['mock_dependency']))
+    manifest = loader.get_manifest(hass, 'light.hue')
+    assert manifest.dependencies == ['mock_dependency']
+
+
+async def test_get_manifest_custom_component(hass):
+    """Test the manifest of custom components is read from the module."""
+    await hass.async_add_executor_job(loader.load_manifest_index, hass)
+    assert 'light.test' in hass.data[loader.DATA_CUSTOM_COMPONENTS]
+    assert 'test_package' in hass.data[loader.DATA_CUSTOM_COMPONENTS]
+
+    assert loader.get_manifest(
+        hass, 'light.test', load_module=False) is None
+
+    manifest = loader.get_manifest(hass, 'light.test')
+    assert manifest.name == 'light.test'
+    assert 'light.test' in hass.data[loader.DATA_KEY]
+
+    assert loader.get_manifest(hass, 'non_existing') is None
@@ -205,6 +205,18 @@ class TestSetup:
         assert not setup.setup_component(self.hass, 'comp')
         assert 'comp' not in self.hass.config.components
 
+    @mock.patch('homeassistant.util.package.install_package')
+    def test_requirements_not_installed_if_config_invalid(self, mock_install):
+        """Test the config is validated before requirements are installed."""
+        self.hass.config.skip_pip = False
+        loader.set_component(
+            self.hass, 'comp', MockModule(
+                'comp', requirements=['package==0.0.1'],
+                config_schema=vol.Schema({'comp': str}, required=True)))
+
+        assert not setup.setup_component(self.hass, 'comp', {'comp': {}})
+        assert not mock_install.called
+
     def test_component_not_setup_twice_if_loaded_during_other_setup(self):
         """Test component setup while waiting for lock is not set up twice."""
         result = []
@@ -459,3 +471,46 @@ def test_platform_no_warn_slow(hass):
             hass, 'test_component1', {})
         assert result
         assert not mock_call.called
+
+
+async def test_setup_timings(hass):
+    """Test the setup phases of components and the critical path."""
+    loader.set_component(
+        hass, 'test_component1', MockModule('test_component1'))
+    loader.set_component(
+        hass, 'test_component2',
+        MockModule('test_component2', dependencies=['test_component1']))
+
+    assert await setup.async_setup_component(hass, 'test_component2', {})
+
+    timings = setup.async_get_setup_timings(hass)
+    assert timings['critical_path'] == ['test_component1', 'test_component2']
+
+    component2 = timings['components']['test_component2']
+    assert component2['dependencies'] == ['test_component1']
+    # Mock modules are not imported
+    assert set(component2['phases']) == {
+        setup.PHASE_DEPENDENCIES, setup.PHASE_SETUP}
+    assert timings['components']['test_component1']['end'] <= \
+        component2['end'] <= timings['total']
+
+
+async def test_import_modules_in_parallel(hass):
+    """Test the component cache is created before importing in threads."""
+    hass.data.pop(loader.DATA_KEY, None)
+    names = ['light', 'switch', 'light.demo', 'switch.demo']
+    get_component = loader.get_component
+
+    def mock_get_component(hass, comp_or_platform):
+        """Check the cache exists when an import thread starts."""
+        assert loader.DATA_KEY in hass.data
+        return get_component(hass, comp_or_platform)
+
+    with mock.patch('homeassistant.loader.get_component',
+                    side_effect=mock_get_component) as mock_get:
+        modules = await asyncio.gather(
+            *(setup.async_import_module(hass, name) for name in names))
+
+    assert mock_get.call_count == len(names)
+    assert all(modules)
+    assert set(names) <= set(hass.data[loader.DATA_KEY])